@@ -0,0 +1,183 @@
+"""Vectorized spending analytics for Aza Man financial assistant.
+
+This module loads a user's expense history into NumPy arrays (pre-summed per day and
+category in SQL, so the arrays stay small however many rows the ledger holds) and answers
+the usual insight questions in one pass: totals per category, average weekly spend, the
+rolling daily average, this month's burn rate and month-end projection, and when the
+expense budget runs out at the current pace. It backs the `spending_analytics` tool, so the model
+gets every figure from a single tool call instead of chaining `math_tool` calls.
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import ledger
+
+# Categories listed individually in the report; the rest are folded into "other"
+TOP_CATEGORIES = 8
+
+
+def to_arrays(rows: Iterable[Tuple[str, str, float, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Convert (YYYY-MM-DD, category, total, count) rows into parallel arrays.
+
+    Args:
+        rows: Grouped expense rows, e.g. from `ExpenseLedger.day_category_totals`.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: datetime64[D] days, category
+            strings, float64 amounts and int64 expense counts.
+    """
+    rows = list(rows)
+    if not rows:
+        return (np.array([], dtype="datetime64[D]"), np.array([], dtype=str),
+                np.array([], dtype=np.float64), np.array([], dtype=np.int64))
+    days, categories, amounts, counts = zip(*rows)
+    return (np.array(days, dtype="datetime64[D]"), np.array(categories),
+            np.array(amounts, dtype=np.float64), np.array(counts, dtype=np.int64))
+
+
+def legacy_rows(expenses: List[Dict[str, Any]], today: date) -> List[Tuple[str, str, float, int]]:
+    """Return ledger-style rows for an expense list kept in state (pre-ledger checkpoints)."""
+    default = today.isoformat()
+    return [
+        (ledger.expense_timestamp(e, default)[:10], ledger.normalize_category(e.get("category")), float(e.get("amount") or 0.0), 1)
+        for e in expenses
+    ]
+
+
+def analyze(days: np.ndarray, categories: np.ndarray, amounts: np.ndarray, counts: np.ndarray,
+            budget_for_expenses: float, today: date, window_days: int = 7,
+            category: Optional[str] = None) -> Dict[str, Any]:
+    """Compute the spending report from expense arrays.
+
+    Budget figures always use every expense, matching the dashboard's remaining budget;
+    `category` narrows the totals, averages and projections.
+
+    Args:
+        days: datetime64[D] expense dates.
+        categories: Expense categories.
+        amounts: Amount per row.
+        counts: Number of expenses each row stands for.
+        budget_for_expenses: The user's expense budget.
+        today: The reference date for month-to-date figures.
+        window_days: Length of the rolling average window, in days.
+        category: Optional category to report on.
+
+    Returns:
+        Dict[str, Any]: Report values (see `spending_analytics` in the tools module).
+    """
+    window_days = max(1, int(window_days))
+    today64 = np.datetime64(today, "D")
+    remaining = float(budget_for_expenses) - float(amounts.sum())
+    if category:
+        mask = categories == ledger.normalize_category(category)
+        days, categories, amounts, counts = days[mask], categories[mask], amounts[mask], counts[mask]
+
+    report: Dict[str, Any] = {
+        "category": ledger.normalize_category(category) if category else None,
+        "count": int(counts.sum()),
+        "total": float(amounts.sum()),
+        "window_days": window_days,
+        "budget_remaining": remaining,
+    }
+    month_start = today64.astype("datetime64[M]").astype("datetime64[D]")
+    month_end = (today64.astype("datetime64[M]") + 1).astype("datetime64[D]")
+    days_in_month = int((month_end - month_start).astype(int))
+    elapsed = int((today64 - month_start).astype(int)) + 1
+
+    if amounts.size:
+        names, inverse = np.unique(categories, return_inverse=True)
+        totals = np.bincount(inverse, weights=amounts, minlength=names.size)
+        # One bucket per calendar day from the first expense to today
+        first = days.min()
+        span = max(int((max(days.max(), today64) - first).astype(int)) + 1, 1)
+        daily = np.bincount((days - first).astype(int), weights=amounts, minlength=span)
+        cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+        window = min(window_days, span)
+        weeks = span / 7.0
+        order = np.argsort(totals)[::-1]
+        by_category = {str(names[i]): float(totals[i]) for i in order[:TOP_CATEGORIES]}
+        if order.size > TOP_CATEGORIES:
+            by_category["other"] = float(totals[order[TOP_CATEGORIES:]].sum())
+        month_to_date = float(amounts[(days >= month_start) & (days <= today64)].sum())
+        report.update({
+            "first_date": str(first),
+            "by_category": by_category,
+            "weekly_average": float(amounts.sum() / weeks),
+            "weekly_average_by_category": {name: total / weeks for name, total in by_category.items()},
+            "rolling_daily_average": float((cumulative[-1] - cumulative[-1 - window]) / window),
+        })
+    else:
+        month_to_date = 0.0
+        report.update({"first_date": None, "by_category": {}, "weekly_average": 0.0,
+                       "weekly_average_by_category": {}, "rolling_daily_average": 0.0})
+
+    burn_rate = month_to_date / elapsed
+    report.update({
+        "month_to_date": month_to_date,
+        "burn_rate_per_day": burn_rate,
+        "projected_month_end": month_to_date + burn_rate * (days_in_month - elapsed),
+    })
+    if burn_rate > 0 and remaining > 0:
+        days_left = remaining / burn_rate
+        report["days_until_budget_exhausted"] = round(days_left, 1)
+        report["budget_exhausted_on"] = str(today64 + int(days_left))
+    else:
+        report["days_until_budget_exhausted"] = 0.0 if remaining <= 0 else None
+        report["budget_exhausted_on"] = str(today64) if remaining <= 0 else None
+    return report
+
+
+def format_report(report: Dict[str, Any], currency: str) -> str:
+    """Render a report as the short text returned to the model."""
+    def money(value: float) -> str:
+        return f"{value:,.2f} {currency}".strip()
+
+    scope = f"'{report['category']}' expenses" if report["category"] else "All expenses"
+    if not report["count"]:
+        return f"{scope}: none logged yet. Budget remaining: {money(report['budget_remaining'])}."
+    lines = [
+        f"{scope}: {report['count']:,} entries since {report['first_date']}, total {money(report['total'])}.",
+        "By category: " + ", ".join(f"{name} {money(total)}" for name, total in report["by_category"].items()) + ".",
+        "Average weekly spend: " + money(report["weekly_average"]) + " ("
+        + ", ".join(f"{name} {money(avg)}" for name, avg in report["weekly_average_by_category"].items()) + ").",
+        f"Rolling {report['window_days']}-day average: {money(report['rolling_daily_average'])} per day.",
+        f"This month: {money(report['month_to_date'])} spent, burn rate {money(report['burn_rate_per_day'])} per day, "
+        f"projected month-end spend {money(report['projected_month_end'])}.",
+    ]
+    if report["budget_remaining"] <= 0:
+        lines.append(f"Budget exhausted: {money(-report['budget_remaining'])} over the budget for expenses.")
+    elif report["days_until_budget_exhausted"] is not None:
+        lines.append(f"Budget remaining: {money(report['budget_remaining'])}, lasting about "
+                     f"{report['days_until_budget_exhausted']:,.1f} more days (until {report['budget_exhausted_on']}) at this month's pace.")
+    else:
+        lines.append(f"Budget remaining: {money(report['budget_remaining'])}; nothing spent this month yet.")
+    return "\n".join(lines)
+
+
+def spending_report(user_id: str, budget_for_expenses: float, currency: str = "", category: Optional[str] = None,
+                    window_days: int = 7, expenses: Optional[List[Dict[str, Any]]] = None,
+                    today: Optional[date] = None) -> Dict[str, Any]:
+    """Build the spending report for a user from their ledger (or a legacy expense list).
+
+    Args:
+        user_id: The user whose ledger to read.
+        budget_for_expenses: The user's expense budget.
+        currency: Currency code used in the message.
+        category: Optional category to report on.
+        window_days: Length of the rolling average window, in days.
+        expenses: Expense list from a checkpoint that predates the ledger; used instead of
+            the ledger when given.
+        today: Reference date; defaults to today.
+
+    Returns:
+        Dict[str, Any]: The report, with a "message" summarizing it.
+    """
+    today = today or date.today()
+    rows = legacy_rows(expenses, today) if expenses else ledger.get_ledger().day_category_totals(user_id)
+    report = analyze(*to_arrays(rows), budget_for_expenses, today, window_days, category)
+    report["currency"] = currency
+    report["message"] = format_report(report, currency)
+    return report
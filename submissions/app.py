@@ -1,14 +1,15 @@
 import streamlit as st
 from uuid import uuid4
 from langchain_core.messages import AIMessage, HumanMessage
+import expense_import
 import graph
+import ledger
+import sharding
 from st_callable_util import get_streamlit_cb
 import re
 import os
 from dotenv import load_dotenv
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+from datetime import date, datetime
 
 # Load environment variables
 load_dotenv()
@@ -92,19 +93,47 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def invoke_our_graph(input_messages, config, callables=None):
-    """Invoke the LangGraph graph with streaming support, using the checkpointer for persistence."""
+    """Invoke the LangGraph graph with token streaming, using the checkpointer for persistence."""
     response = {"messages": []}
-    for chunk in graph.graph.stream({"messages": input_messages}, config, stream_mode="updates"):
+    streamed = False
+    for mode, chunk in graph.stream_with_tokens({"messages": input_messages}, config):
+        if mode == "token":
+            streamed = True
+            for cb in callables or []:
+                cb.on_llm_new_token(chunk)
+            continue
         for node, updates in chunk.items():
-            if "messages" in updates and updates["messages"]:
+            # Nodes that leave the state unchanged stream None
+            if updates and updates.get("messages"):
                 response["messages"].extend(updates["messages"])
-                if callables and node == "call_model":
+                # Fall back to pushing the full reply when the provider didn't stream it
+                if callables and node in ("call_model", "fast_path") and not streamed:
                     for msg in updates["messages"]:
                         if isinstance(msg, AIMessage):
                             for cb in callables:
                                 cb.on_llm_new_token(msg.content)
+            if node == "call_model":
+                streamed = False
     return response
 
+def load_state(config):
+    """Return ((thread_id, checkpoint_id), state values), cached in the session.
+
+    Call it once per rerun and pass the result down. The newest checkpoint id lookup (one
+    indexed SELECT) is the deliberate freshness check: the cached values are reused only
+    while it is unchanged, so writes from main.py, another tab or the expense_import CLI
+    show up on the next rerun.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    key = (thread_id, sharding.latest_checkpoint_id(graph.checkpointer, config))
+    cached = st.session_state.get("state_cache")
+    if cached and cached["key"] == key:
+        return cached["key"], cached["values"]
+    snapshot = graph.graph.get_state(config)
+    key = (thread_id, (snapshot.config or {}).get("configurable", {}).get("checkpoint_id"))
+    st.session_state.state_cache = {"key": key, "values": snapshot.values or {}}
+    return key, st.session_state.state_cache["values"]
+
 def show_welcome_popup():
     # Initialize session state variables if not present
     if "hide_welcome_popup" not in st.session_state:
@@ -157,8 +186,8 @@ def login_page():
                 st.session_state.config["configurable"]["user_id"] = user_id
                 st.session_state.config["configurable"]["thread_id"] = st.session_state.thread_id
             # Load state from checkpointer using the user's unique thread_id
-            current_state = graph.graph.get_state(st.session_state.config).values or {}
-            st.session_state.messages = current_state.get("messages", [])
+            _, current_state = load_state(st.session_state.config)
+            st.session_state.messages = list(current_state.get("messages", []))
             if current_state.get("username"):
                 st.session_state.messages.append(AIMessage(content=f"Welcome back, {current_state['username']}! Your last session data is loaded. How can I assist you today?"))
             else:
@@ -199,8 +228,8 @@ def chat_interface():
         unsafe_allow_html=True
     )
     
-    # Load state 
-    current_state = graph.graph.get_state(st.session_state.config).values or {}
+    # Load state (served from the session cache until the graph writes again)
+    _, current_state = load_state(st.session_state.config)
     st.session_state.messages = current_state.get("messages", [])
     
     chat_container = st.container()
@@ -222,49 +251,115 @@ def chat_interface():
             with st.spinner("**...Thinking...**"):
                 st_callback = get_streamlit_cb(chat_container)
                 response = invoke_our_graph(new_message, st.session_state.config, callables=[st_callback])
-                # Update messages from checkpointer
-                st.session_state.messages = graph.graph.get_state(st.session_state.config).values["messages"]
+                # The rerun reloads the messages from the new checkpoint
                 st.rerun()
 
+def build_dashboard_data(current_state):
+    """Compute the dashboard metrics and figures from a state snapshot."""
+    # plotly takes ~0.3 s to import; load it with the first dashboard, not on the login page
+    import plotly.express as px
+    import plotly.graph_objects as go
+    currency = current_state.get('currency', '')
+    if current_state.get('expenses_by_day') or current_state.get('expense_ledger'):
+        # Aggregates are maintained in state as expenses are logged
+        by_category = current_state.get('expenses_by_category', {})
+        by_day = current_state.get('expenses_by_day') or dict(ledger.get_ledger().daily_totals(current_state['expense_ledger']))
+    else:
+        # Checkpoints from before the ledger keep the raw expense list in state
+        today = datetime.now().strftime('%Y-%m-%d')
+        by_category, by_day = {}, {}
+        for e in current_state.get('expenses', []):
+            by_category[e["category"]] = by_category.get(e["category"], 0.0) + e["amount"]
+            day = str(e.get('date') or today)[:10]
+            by_day[day] = by_day.get(day, 0.0) + e["amount"]
+
+    data = {
+        "income": f"{current_state.get('income', 0.0):,.2f} {currency}",
+        "expense": f"{current_state.get('expense', 0.0):,.2f} {currency}",
+        "remaining": f"{current_state.get('budget_for_expenses', 0.0) - current_state.get('expense', 0.0):,.2f} {currency}",
+        "savings": f"{current_state.get('savings', 0.0):,.2f} {currency}",
+        "fig_gauge": go.Figure(go.Indicator(
+            mode="gauge+number", value=current_state.get('savings', 0.0), domain={'x': [0, 1], 'y': [0, 1]},
+            title={"text": "Savings vs Goal"}, gauge={"axis": {"range": [0, current_state.get('savings_goal', 0.0)]}, "bar": {"color": "green"}}
+        )),
+        "fig_pie": None,
+        "fig_line": None,
+    }
+    if by_category:
+        data["fig_pie"] = px.pie(values=list(by_category.values()), names=list(by_category.keys()), color_discrete_sequence=px.colors.sequential.Reds)
+    if by_day:
+        days = sorted(by_day)
+        data["fig_line"] = px.line(x=[date.fromisoformat(day) for day in days], y=[by_day[day] for day in days], labels={"x": "Date", "y": f"Amount ({currency})"})
+    return data
+
+def load_dashboard_data(key, current_state):
+    """Return dashboard data for a load_state result, cached by (thread_id, checkpoint_id)."""
+    cached = st.session_state.get("dashboard_cache")
+    if cached and cached["key"] == key:
+        return cached["data"]
+    data = build_dashboard_data(current_state)
+    st.session_state.dashboard_cache = {"key": key, "data": data}
+    return data
+
 def dashboard_page():
     if "config" not in st.session_state:
         st.error("Please log in first!")
         return
     
-    # Load state 
-    current_state = graph.graph.get_state(st.session_state.config).values or {}
+    # Load state once per rerun; the import form reuses it
+    key, current_state = load_state(st.session_state.config)
+    data = load_dashboard_data(key, current_state)
     
     st.subheader("Summary Metrics")
     col1, col2, col3, col4 = st.columns(4)
-    with col1: st.metric("Total Income", f"{current_state.get('income', 0.0):,.2f} {current_state.get('currency', '')}")
-    with col2: st.metric("Total Expenses", f"{current_state.get('expense', 0.0):,.2f} {current_state.get('currency', '')}")
-    with col3: st.metric("Remaining Budget", f"{current_state.get('budget_for_expenses', 0.0) - current_state.get('expense', 0.0):,.2f} {current_state.get('currency', '')}")
-    with col4: st.metric("Current Savings", f"{current_state.get('savings', 0.0):,.2f} {current_state.get('currency', '')}")
+    with col1: st.metric("Total Income", data["income"])
+    with col2: st.metric("Total Expenses", data["expense"])
+    with col3: st.metric("Remaining Budget", data["remaining"])
+    with col4: st.metric("Current Savings", data["savings"])
 
     st.subheader("Savings Progress")
-    fig_gauge = go.Figure(go.Indicator(
-        mode="gauge+number", value=current_state.get('savings', 0.0), domain={'x': [0, 1], 'y': [0, 1]},
-        title={"text": "Savings vs Goal"}, gauge={"axis": {"range": [0, current_state.get('savings_goal', 0.0)]}, "bar": {"color": "green"}}
-    ))
-    st.plotly_chart(fig_gauge)
+    st.plotly_chart(data["fig_gauge"])
 
     st.subheader("Expense Distribution")
-    expenses = current_state.get('expenses', [])
-    if expenses:
-        fig_pie = px.pie(values=[e["amount"] for e in expenses], names=[e["category"] for e in expenses], color_discrete_sequence=px.colors.sequential.Reds)
-        st.plotly_chart(fig_pie)
+    if data["fig_pie"] is not None:
+        st.plotly_chart(data["fig_pie"])
     else:
         st.write("No expenses logged yet.")
 
     st.subheader("Expense Trends")
-    if expenses:
-        dates = [datetime.now().date() if 'date' not in e else datetime.strptime(e['date'], '%Y-%m-%d').date() for e in expenses]
-        amounts = [e["amount"] for e in expenses]
-        fig_line = px.line(x=dates, y=amounts, labels={"x": "Date", "y": f"Amount ({current_state.get('currency', '')})"})
-        st.plotly_chart(fig_line)
+    if data["fig_line"] is not None:
+        st.plotly_chart(data["fig_line"])
     else:
         st.write("No expense trends to display yet.")
 
+    import_expenses_form(st.session_state.config, current_state)
+
+def import_expenses_form(config, current_state):
+    """Upload a CSV/OFX bank export straight into the ledger, without the chat model."""
+    with st.expander("Import transactions", expanded="import_report" in st.session_state):
+        for line in st.session_state.pop("import_report", []):
+            st.caption(line)
+        uploaded = st.file_uploader("Bank export (CSV, OFX or QFX)", type=["csv", "ofx", "qfx"])
+        currency = st.text_input("Currency for rows without one", value=current_state.get("currency", ""))
+        signed = st.checkbox("Positive amounts are credits (skip them)")
+        date_format = st.text_input("Date format (blank to detect)", placeholder="%d/%m/%Y")
+        if uploaded is not None and st.button("Import"):
+            user_id = config["configurable"]["user_id"]
+            try:
+                with st.spinner("Importing..."):
+                    result = expense_import.import_file(uploaded, uploaded.name, user_id, currency, signed,
+                                                        date_format.strip() or None)
+                    expense_import.refresh_state(graph.graph, config)
+            except ValueError as e:
+                st.error(f"Could not import {uploaded.name}: {e}")
+                return
+            st.session_state.import_report = [
+                f"Imported {result.imported:,} expenses ({result.total:,.2f} {currency}); "
+                f"skipped {result.skipped:,}, rejected {result.rejected:,}.",
+                *result.errors,
+            ]
+            st.rerun()
+
 def main():
     if "page" not in st.session_state:
         st.session_state.page = "Login"
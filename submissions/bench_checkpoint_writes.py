@@ -0,0 +1,153 @@
+"""Benchmark checkpoint writes per turn for Aza Man.
+
+Compares the legacy commit path (stream, then re-read the state and put a filtered copy)
+with the current single-write path, where messages are compacted by
+`serializer.CompactSerializer` during the checkpoint write LangGraph already performs.
+A stub chat model replaces the provider so only graph and SQLite overhead is measured.
+
+Usage: python bench_checkpoint_writes.py --turns 50
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, List, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+import configuration
+import graph
+import serializer
+
+
+class StubChatModel(BaseChatModel):
+    """Replies with a math_tool call after a user message and with text after a tool result."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StubChatModel":
+        return self
+
+    def _generate(self, messages: List[Any], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if messages[-1].type == "tool":
+            msg = AIMessage(content="You have 268,000.00 NGN left.", response_metadata={"model_name": "stub", "logprobs": list(range(50))})
+        else:
+            msg = AIMessage(content="", tool_calls=[{"name": "math_tool", "args": {"numbers": [450000, 182000], "operation": "subtract"}, "id": f"call_{len(messages)}"}])
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+
+class CountingSaver(SqliteSaver):
+    """SqliteSaver that counts and times reads and writes.
+
+    LangGraph issues `put_writes` from its background executor while the next task runs,
+    so write calls overlap. `write_seconds` sums them per call (cumulative thread time);
+    `write_wall_seconds` counts only the wall time during which some write was running.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.puts = self.put_writes_calls = self.reads = 0
+        self.write_seconds = 0.0
+        self._intervals: List[Tuple[float, float]] = []
+        self._intervals_lock = threading.Lock()
+
+    @property
+    def write_wall_seconds(self) -> float:
+        total, end = 0.0, float("-inf")
+        with self._intervals_lock:
+            intervals = sorted(self._intervals)
+        for start, stop in intervals:
+            if stop > end:
+                total += stop - max(start, end)
+                end = stop
+        return total
+
+    def _timed(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stop = time.perf_counter()
+            with self._intervals_lock:
+                self.write_seconds += stop - start
+                self._intervals.append((start, stop))
+
+    def put(self, *args, **kwargs):
+        self.puts += 1
+        return self._timed(super().put, *args, **kwargs)
+
+    def put_writes(self, *args, **kwargs):
+        self.put_writes_calls += 1
+        return self._timed(super().put_writes, *args, **kwargs)
+
+    def get_tuple(self, config):
+        self.reads += 1
+        return super().get_tuple(config)
+
+
+def legacy_commit(compiled, saver: CountingSaver, config) -> None:
+    """Reproduce the old post-stream read-modify-write round trip.
+
+    The old path re-put a content-only copy of the messages, which drops their roles and
+    makes the next turn fail to load; the checkpoint is re-put unchanged here so the
+    benchmark can keep running while paying the same extra read and write.
+    """
+    compiled.get_state(config)
+    saved = saver.get_tuple(config)
+    saver.put(saved.config, saved.checkpoint, saved.metadata, {})
+
+
+def run(mode: str, turns: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), f"{mode}.db")
+    serde = JsonPlusSerializer() if mode == "legacy" else serializer.CompactSerializer()
+    saver = CountingSaver(sqlite3.connect(path, check_same_thread=False), serde=serde)
+    compiled = graph.builder.compile(checkpointer=saver)
+    config = {"configurable": {"user_id": "bench00", "thread_id": "thread_bench00", "summary_trigger": 10 ** 6}}
+
+    start = time.perf_counter()
+    for i in range(turns):
+        for _ in compiled.stream({"messages": [HumanMessage(content=f"Am I on track? ({i})")]}, config, stream_mode="updates"):
+            pass
+        if mode == "legacy":
+            legacy_commit(compiled, saver, config)
+    elapsed = time.perf_counter() - start
+    saver.conn.close()
+    return {
+        "mode": mode,
+        "puts/turn": saver.puts / turns,
+        "put_writes/turn": saver.put_writes_calls / turns,
+        "reads/turn": saver.reads / turns,
+        "write wall ms/turn": 1000 * saver.write_wall_seconds / turns,
+        "write thread ms/turn": 1000 * saver.write_seconds / turns,
+        "total ms/turn": 1000 * elapsed / turns,
+        "db bytes": sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark checkpoint writes per turn")
+    parser.add_argument("--turns", type=int, default=50, help="Conversation turns per mode")
+    args = parser.parse_args()
+
+    stub = StubChatModel()
+    configuration.Configuration.get_llm = lambda self: stub
+
+    results = [run("legacy", args.turns), run("single-write", args.turns)]
+    columns = list(results[0].keys())
+    widths = {c: max(15, len(c)) for c in columns}
+    print(" | ".join(f"{c:>{widths[c]}}" for c in columns))
+    for row in results:
+        print(" | ".join(f"{row[c]:>{widths[c]},.2f}" if isinstance(row[c], float) else f"{row[c]:>{widths[c]}}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
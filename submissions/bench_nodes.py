@@ -0,0 +1,255 @@
+"""Micro-benchmarks for Aza Man graph nodes and checkpoint I/O.
+
+Times `Configuration.format_system_prompt`, `State.__post_init__`, `call_model` overhead,
+`store_memory` and a put/get round trip through the app's checkpointer (`sharding.from_env`,
+so CHECKPOINT_BACKEND and CHECKPOINT_SHARDS apply) against synthetic states of 10 to
+100k messages and expenses. The stub chat model from `bench_checkpoint_writes` replaces
+the provider, so only local overhead is measured. Results can be saved as a baseline and
+later runs compared against it, flagging anything slower than the tolerance.
+
+Usage:
+    python bench_nodes.py --save              # record bench_baseline.json
+    python bench_nodes.py --compare           # fail if a benchmark regressed
+    python bench_nodes.py --sizes 10,1000 --only checkpoint
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+
+import configuration
+import graph
+import ledger
+import serializer
+import sharding
+import state
+from bench_checkpoint_writes import StubChatModel
+
+BASELINE_FILE = "bench_baseline.json"
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+CATEGORIES = ["food", "transport", "rent", "utilities", "data", "fuel", "school fees", "health", "church", "outings"]
+
+
+def synthetic_messages(count: int) -> List[Any]:
+    """Build `count` messages cycling through user, tool-calling, tool and reply turns."""
+    messages = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            messages.append(HumanMessage(content=f"I spent {1_000 + i:,} on food today, log it please ({i}).", id=f"m{i}"))
+        elif kind == 1:
+            messages.append(AIMessage(content="", id=f"m{i}", tool_calls=[{
+                "name": "log_expenses", "id": f"call_{i}",
+                "args": {"expenses": [{"amount": 1_000 + i, "category": "food"}], "currency": "NGN"},
+            }]))
+        elif kind == 2:
+            messages.append(ToolMessage(content=f"Expenses logged! Total: {1_000 + i:,.2f} NGN", tool_call_id=f"call_{i - 1}", id=f"m{i}"))
+        else:
+            messages.append(AIMessage(content=f"Done! You've spent {1_000 + i:,.2f} NGN so far. Anything else?", id=f"m{i}"))
+    return messages
+
+
+def synthetic_expenses(count: int) -> List[Dict[str, Any]]:
+    """Build `count` expenses spread over the categories and the last 90 days."""
+    start = datetime(2025, 1, 1)
+    return [
+        {"amount": float(500 + i % 9_500), "category": CATEGORIES[i % len(CATEGORIES)],
+         "date": (start + timedelta(days=i % 90)).strftime("%Y-%m-%d")}
+        for i in range(count)
+    ]
+
+
+def synthetic_values(messages: int, expenses: int, legacy: bool = False, user_id: str = "bench00") -> Dict[str, Any]:
+    """Build state values; expenses go in the legacy list or as ledger aggregates."""
+    values = {
+        "messages": synthetic_messages(messages),
+        "username": "Blaq", "income": 750_000.0, "budget_for_expenses": 450_000.0,
+        "savings_goal": 300_000.0, "savings": 300_000.0, "currency": "NGN",
+        "summary": "Blaq set a monthly budget and has been logging food and transport expenses.",
+    }
+    rows = synthetic_expenses(expenses)
+    if legacy:
+        values["expenses"] = rows
+    else:
+        by_category, by_day = {}, {}
+        for e in rows:
+            by_category[e["category"]] = by_category.get(e["category"], 0.0) + e["amount"]
+            by_day[e["date"]] = by_day.get(e["date"], 0.0) + e["amount"]
+        values.update({
+            "expense_ledger": user_id, "expense_count": len(rows), "expense": sum(by_category.values()),
+            "expenses_by_category": by_category, "expenses_by_day": by_day,
+        })
+    return values
+
+
+def measure(fn: Callable[[], Any], min_time: float = 0.2, repeat: int = 5) -> float:
+    """Return the median seconds per call, calibrating loops per sample like timeit.autorange."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1 if elapsed / number < 1.0 else 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def bench_format_system_prompt(size: int, workdir: str) -> Dict[str, float]:
+    configurable = configuration.Configuration()
+    ledger_state = state.State(**synthetic_values(0, size))
+    legacy_state = state.State(**synthetic_values(0, size, legacy=True))
+    return {
+        "format_system_prompt[ledger]": measure(lambda: configurable.format_system_prompt(ledger_state)),
+        "format_system_prompt[legacy]": measure(lambda: configurable.format_system_prompt(legacy_state)),
+    }
+
+
+def bench_state_post_init(size: int, workdir: str) -> Dict[str, float]:
+    values = synthetic_values(size, size, legacy=True)
+    return {"State.__post_init__": measure(lambda: state.State(**values))}
+
+
+def bench_call_model(size: int, workdir: str) -> Dict[str, float]:
+    current_state = state.State(**synthetic_values(size, size))
+    current_state.messages.append(HumanMessage(content="Am I on track?", id="last"))
+    config = {"configurable": {"user_id": "bench00", "thread_id": "thread_bench00", "response_cache": False}}
+    return {"call_model": measure(lambda: graph.call_model(current_state, config))}
+
+
+def bench_store_memory(size: int, workdir: str) -> Dict[str, float]:
+    user_id = f"bench{size}"
+    expense_ledger = ledger.ExpenseLedger(os.path.join(workdir, f"ledger_{size}.db"))
+    expense_ledger.append(user_id, synthetic_expenses(size), "NGN")
+    previous = ledger.set_ledger(expense_ledger)
+    current_state = state.State(**synthetic_values(size, size, user_id=user_id))
+    current_state.messages.append(AIMessage(content="", id="last", tool_calls=[{
+        "name": "log_expenses", "id": "call_last",
+        "args": {"expenses": [{"amount": 2_500, "category": "food"}], "currency": "NGN"},
+    }]))
+    config = {"configurable": {"user_id": user_id, "thread_id": f"thread_{user_id}"}}
+    calls = itertools.count()
+
+    def store():
+        # A new message id per call, so the ledger inserts instead of skipping a replayed call
+        current_state.messages[-1].id = f"last{next(calls)}"
+        return graph.store_memory(current_state, config)
+
+    try:
+        return {"store_memory[log_expenses]": measure(store)}
+    finally:
+        ledger.set_ledger(previous)
+
+
+def bench_checkpoint(size: int, workdir: str) -> Dict[str, float]:
+    saver = sharding.from_env(os.path.join(workdir, f"checkpoints_{size}.db"), serde=serializer.CompactSerializer())
+    values = synthetic_values(size, size)
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = values
+    checkpoint["channel_versions"] = {key: 1 for key in values}
+    config = {"configurable": {"thread_id": f"thread_bench{size}", "checkpoint_ns": ""}}
+    metadata = {"source": "update", "step": 0, "writes": {}, "parents": {}}
+    saved = {}
+
+    def put():
+        saved["config"] = saver.put(config, {**checkpoint, "id": empty_checkpoint()["id"]}, metadata, checkpoint["channel_versions"])
+
+    put()
+    results = {
+        # Names kept from the raw SqliteSaver runs so bench_baseline.json still compares
+        "SqliteSaver.put": measure(put),
+        "SqliteSaver.get_tuple": measure(lambda: saver.get_tuple(saved["config"])),
+    }
+    for shard in sharding.sqlite_shards(saver):
+        shard.manager.close()
+    return results
+
+
+BENCHMARKS: List[Tuple[str, Callable[[int, str], Dict[str, float]]]] = [
+    ("format_system_prompt", bench_format_system_prompt),
+    ("state", bench_state_post_init),
+    ("call_model", bench_call_model),
+    ("store_memory", bench_store_memory),
+    ("checkpoint", bench_checkpoint),
+]
+
+
+def run(sizes: List[int], only: List[str]) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    workdir = tempfile.mkdtemp(prefix="aza_bench_")
+    for group, bench in BENCHMARKS:
+        if only and group not in only:
+            continue
+        for size in sizes:
+            for name, seconds in bench(size, workdir).items():
+                results.setdefault(name, {})[str(size)] = seconds
+                print(f"{name:>30} | {size:>8,} | {seconds * 1000:>12,.3f} ms", flush=True)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> int:
+    regressions = 0
+    print(f"\n{'benchmark':>30} | {'size':>8} | {'baseline ms':>12} | {'current ms':>12} | {'ratio':>6}")
+    for name, by_size in results.items():
+        for size, seconds in by_size.items():
+            before = baseline.get(name, {}).get(size)
+            if before is None:
+                continue
+            ratio = seconds / before if before else float("inf")
+            flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+            regressions += bool(flag)
+            print(f"{name:>30} | {int(size):>8,} | {before * 1000:>12,.3f} | {seconds * 1000:>12,.3f} | {ratio:>6.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graph nodes and checkpoint I/O")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated message/expense counts")
+    parser.add_argument("--only", default="", help=f"Comma-separated groups to run: {', '.join(g for g, _ in BENCHMARKS)}")
+    parser.add_argument("--save", action="store_true", help=f"Write results to {BASELINE_FILE}")
+    parser.add_argument("--compare", action="store_true", help=f"Compare against {BASELINE_FILE} and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    stub = StubChatModel()
+    configuration.Configuration.get_llm = lambda self: stub
+    results = run([int(s) for s in args.sizes.split(",") if s], [g for g in args.only.split(",") if g])
+
+    if args.compare:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\n{regressions} regression(s) beyond {args.tolerance:.0%}")
+        if regressions:
+            sys.exit(1)
+    if args.save:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "recorded": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
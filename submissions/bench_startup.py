@@ -0,0 +1,133 @@
+"""Startup benchmark for Aza Man entry points.
+
+Imports each entry point (check_db, main, app) in a fresh interpreter under
+`python -X importtime` and reports the cumulative import time, the slowest modules it
+pulled in, and any modules that should only load on first use (provider SDKs, plotly).
+Importing an entry point must not compile the graph or open the database; that happens
+in `graph.get_graph()`. Like bench_nodes, results can be saved as a baseline and later
+runs compared against it.
+
+Usage:
+    python bench_startup.py                    # median of 5 runs per entry point
+    python bench_startup.py --save             # record bench_startup_baseline.json
+    python bench_startup.py --compare          # fail if startup regressed
+    python bench_startup.py --only check_db --top 15
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+BASELINE_FILE = "bench_startup_baseline.json"
+ENTRY_POINTS = ["check_db", "main", "app"]
+# Loaded by _build_llm / the dashboard when needed; importing an entry point shouldn't pull them in.
+# (streamlit itself imports a thin slice of plotly; plotly.express is the expensive part.)
+DEFERRED_MODULES = ["langchain_groq", "langchain_together", "langchain_openai", "plotly.express"]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, float]]:
+    """Parse `-X importtime` output into (module, depth, cumulative seconds) rows.
+
+    Args:
+        stderr: The interpreter's stderr.
+
+    Returns:
+        List[Tuple[str, int, float]]: One row per imported module, in import order.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), depth, int(cumulative) / 1e6))
+    return rows
+
+
+def measure(module: str) -> Dict[str, object]:
+    """Import a module in a fresh interpreter and return its import profile."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    names = {name for name, _, _ in rows}
+    return {
+        "seconds": next((seconds for name, depth, seconds in rows if name == module and depth == 0), 0.0),
+        "modules": len(rows),
+        "slowest": sorted(((name, seconds) for name, depth, seconds in rows if depth == 1), key=lambda r: -r[1]),
+        "deferred": [d for d in DEFERRED_MODULES if any(n == d or n.startswith(d + ".") for n in names)],
+    }
+
+
+def run(entry_points: List[str], repeat: int, top: int) -> Tuple[Dict[str, float], int]:
+    results: Dict[str, float] = {}
+    eager = 0
+    print(f"{'entry point':>12} | {'import ms':>10} | {'modules':>7} | eagerly loaded")
+    for module in entry_points:
+        runs = [measure(module) for _ in range(repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs)
+        profile = runs[-1]
+        results[module] = seconds
+        eager += bool(profile["deferred"])
+        print(f"{module:>12} | {seconds * 1000:>10,.1f} | {profile['modules']:>7} | {', '.join(profile['deferred']) or '-'}")
+        for name, cumulative in profile["slowest"][:top]:
+            print(f"{'':>12}   {cumulative * 1000:>10,.1f}   {name}")
+    return results, eager
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> int:
+    regressions = 0
+    print(f"\n{'entry point':>12} | {'baseline ms':>12} | {'current ms':>12} | {'ratio':>6}")
+    for module, seconds in results.items():
+        before = baseline.get(module)
+        if before is None:
+            continue
+        ratio = seconds / before if before else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        regressions += bool(flag)
+        print(f"{module:>12} | {before * 1000:>12,.1f} | {seconds * 1000:>12,.1f} | {ratio:>6.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark entry point import time with python -X importtime")
+    parser.add_argument("--only", default="", help=f"Comma-separated entry points: {', '.join(ENTRY_POINTS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point (median is reported)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest direct imports to list per entry point")
+    parser.add_argument("--save", action="store_true", help=f"Write results to {BASELINE_FILE}")
+    parser.add_argument("--compare", action="store_true", help=f"Compare against {BASELINE_FILE} and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    entry_points = [m for m in args.only.split(",") if m] or ENTRY_POINTS
+    results, eager = run(entry_points, max(1, args.repeat), args.top)
+
+    if args.compare:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance) + eager
+        print(f"\n{regressions} regression(s) beyond {args.tolerance:.0%} or eagerly loaded modules")
+        if regressions:
+            sys.exit(1)
+    if args.save:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "recorded": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
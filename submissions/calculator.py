@@ -0,0 +1,102 @@
+"""Safe arithmetic expression evaluator for Aza Man financial assistant.
+
+This module evaluates expressions such as "(450k - 182,000) / 30" or "40% of 750k" for
+`tools.math_tool`, so a whole calculation takes one tool call. The expression is parsed
+with `ast` and only numeric literals, + - * / // % ** and parentheses are evaluated;
+names, calls, attributes and everything else are rejected, and the expression length,
+node count and exponent size are bounded.
+"""
+
+import ast
+import operator
+import re
+from typing import Union
+
+MAX_EXPRESSION_LENGTH = 200
+MAX_NODES = 64
+MAX_EXPONENT = 100
+MAX_MAGNITUDE = 1e18
+
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+"
+_SUFFIXED = re.compile(rf"(?P<number>{_NUMBER})\s*(?P<suffix>[kmb])\b", re.IGNORECASE)
+_GROUPED = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+# "40%" is a percentage unless another operand follows (then % is modulo)
+_PERCENT = re.compile(rf"(?P<number>{_NUMBER})\s*%(?!\s*[\d.(])")
+_OF = re.compile(r"\bof\b", re.IGNORECASE)
+
+_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _normalize(expression: str) -> str:
+    # Rewrite the money shorthand into plain Python arithmetic
+    text = expression.replace("×", "*").replace("÷", "/").replace("−", "-")
+    text = _SUFFIXED.sub(lambda m: f"({m.group('number')}*{_MULTIPLIERS[m.group('suffix').lower()]})", text)
+    text = _GROUPED.sub(lambda m: m.group(0).replace(",", ""), text)
+    text = _PERCENT.sub(lambda m: f"({m.group('number')}/100)", text)
+    return _OF.sub("*", text)
+
+
+def _eval(node: ast.AST) -> Union[int, float]:
+    if isinstance(node, ast.Expression):
+        return _eval(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # Literals such as 1e999 (inf) or 25 digits are out of range before any arithmetic
+        if not abs(node.value) <= MAX_MAGNITUDE:
+            raise ValueError("Number is out of range.")
+        return node.value
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        return _UNARY[type(node.op)](_eval(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        left, right = _eval(node.left), _eval(node.right)
+        if isinstance(node.op, (ast.Div, ast.FloorDiv, ast.Mod)) and right == 0:
+            raise ValueError("Division by zero is not allowed.")
+        if isinstance(node.op, ast.Pow) and (abs(right) > MAX_EXPONENT or abs(left) > MAX_MAGNITUDE):
+            raise ValueError(f"Exponent too large (limit {MAX_EXPONENT}).")
+        try:
+            result = _BINARY[type(node.op)](left, right)
+        except ZeroDivisionError:
+            # 0 ** -1
+            raise ValueError("Division by zero is not allowed.")
+        except OverflowError:
+            raise ValueError("Result is out of range.")
+        if isinstance(result, complex) or not abs(result) <= MAX_MAGNITUDE:
+            raise ValueError("Result is out of range.")
+        return result
+    raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+
+
+def evaluate(expression: str) -> float:
+    """Evaluate an arithmetic expression safely.
+
+    Supports parentheses, + - * / // % and **, thousands separators ("35,000"), k/m/b
+    suffixes ("750k", "1.2m") and percentages ("40% of 750k", "750k * 40%").
+
+    Args:
+        expression: The expression to evaluate.
+
+    Returns:
+        float: The result.
+
+    Raises:
+        ValueError: If the expression is too long or complex, uses anything but arithmetic,
+            divides by zero, or a number or result is out of range.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression is too long (limit {MAX_EXPRESSION_LENGTH} characters).")
+    try:
+        tree = ast.parse(_normalize(expression).strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Invalid expression: {expression}")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ValueError(f"Expression is too complex (limit {MAX_NODES} nodes).")
+    return float(_eval(tree))
@@ -1,6 +1,6 @@
 import argparse
 import json
-from graph import graph
+import graph
 
 def main():
     parser = argparse.ArgumentParser(description="Check saved state for a user ID using LangGraph")
@@ -12,7 +12,7 @@ def main():
     config = {"configurable": {"user_id": user_id, "thread_id": thread_id}}
 
     try:
-        graph_state = graph.get_state(config)
+        graph_state = graph.get_graph().get_state(config)
         if graph_state.values:
             state_values = graph_state.values
             print(f"Saved state for user_id '{user_id}':")
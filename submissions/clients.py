@@ -0,0 +1,174 @@
+"""Shared LLM client registry for Aza Man financial assistant.
+
+This module keeps a process-wide, size-bounded cache of tool-bound chat model clients
+so that repeated turns reuse warm HTTP connections and pre-converted tool schemas
+instead of rebuilding a provider client on every node invocation. An httpx.AsyncClient
+only works on the event loop that opened its connections, so async clients, and the
+chat models built on them, are kept per running loop.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import httpx
+
+# Connection pool limits shared by every provider client in the process
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+_http_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+# Per event loop, dropped when the loop is garbage collected
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_loop_ids: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+_next_loop_id = itertools.count(1)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def loop_id() -> Optional[int]:
+    """Return an id for the running event loop, or None outside one.
+
+    Unlike id(loop), ids are never reused, so a client cached for a closed loop can't be
+    mistaken for one belonging to a new loop at the same address.
+    """
+    loop = _running_loop()
+    if loop is None:
+        return None
+    with _http_lock:
+        if loop not in _loop_ids:
+            _loop_ids[loop] = next(_next_loop_id)
+        return _loop_ids[loop]
+
+
+def get_http_client() -> httpx.Client:
+    """Return the shared keep-alive HTTP client, creating it on first use.
+
+    Returns:
+        httpx.Client: Process-wide synchronous HTTP client with pooled connections.
+    """
+    global _http_client
+    with _http_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _http_client
+
+
+def get_async_http_client() -> Optional[httpx.AsyncClient]:
+    """Return the keep-alive async HTTP client for the running event loop.
+
+    Returns:
+        Optional[httpx.AsyncClient]: The loop's pooled client, created on first use, or
+            None outside an event loop (the provider SDK then manages its own).
+    """
+    loop = _running_loop()
+    if loop is None:
+        return None
+    with _http_lock:
+        client = _async_http_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_http_clients[loop] = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return client
+
+
+def make_key(provider: str, model: str, api_key: Optional[str], tool_set: Sequence[Any],
+             loop: Optional[int] = None) -> Tuple[str, str, str, Tuple[str, ...], Optional[int]]:
+    """Build a registry key for a provider/model/credential/tool/event loop combination.
+
+    The API key is hashed so raw credentials are never held in the cache key.
+
+    Args:
+        provider: The LLM provider name (e.g., "groq").
+        model: The model name.
+        api_key: The provider API key, if any; for the router, all backend keys joined.
+        tool_set: The tools that will be bound to the client.
+        loop: `loop_id()` of the loop the client's async HTTP client belongs to.
+
+    Returns:
+        Tuple[str, str, str, Tuple[str, ...], Optional[int]]: A hashable cache key.
+    """
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    tool_names = tuple(getattr(t, "name", str(t)) for t in tool_set)
+    return (provider.lower(), model, key_digest, tool_names, loop)
+
+
+class ClientRegistry:
+    """Thread-safe LRU cache of constructed LLM clients with hit/miss counters.
+
+    Attributes:
+        max_size (int): Maximum number of clients retained before LRU eviction.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that constructed a new client.
+        evictions (int): Number of clients dropped to respect max_size.
+    """
+
+    def __init__(self, max_size: int = 16):
+        self.max_size = max(1, max_size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached client for key, building it with factory on a miss.
+
+        Args:
+            key: Registry key, typically produced by make_key.
+            factory: Zero-argument callable that constructs the client.
+
+        Returns:
+            Any: The cached or newly constructed client.
+        """
+        with self._lock:
+            if key in self._clients:
+                self.hits += 1
+                self._clients.move_to_end(key)
+                return self._clients[key]
+            self.misses += 1
+        # Build outside the lock so a slow constructor doesn't block other lookups
+        client = factory()
+        with self._lock:
+            if key in self._clients:
+                # Another thread won the race; keep its instance
+                self._clients.move_to_end(key)
+                return self._clients[key]
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        return client
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters and current size.
+
+        Returns:
+            Dict[str, int]: Hits, misses, evictions and size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._clients),
+            }
+
+    def clear(self) -> None:
+        """Drop all cached clients and reset counters."""
+        with self._lock:
+            self._clients.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+registry = ClientRegistry(max_size=int(os.environ.get("LLM_CLIENT_CACHE_SIZE", "16")))
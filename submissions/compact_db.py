@@ -0,0 +1,53 @@
+import argparse
+import os
+import sqlite3
+import db
+import retention
+import sharding
+
+def main():
+    parser = argparse.ArgumentParser(description="Report and reclaim checkpoint storage in memory_agent.db")
+    parser.add_argument("--db", default="memory_agent.db", help="Path to the SQLite checkpoint database")
+    parser.add_argument("--user_id", help="Only report on / compact this user's thread")
+    parser.add_argument("--shards", type=int, default=int(os.environ.get("CHECKPOINT_SHARDS", "1")),
+                        help="Number of checkpoint shard files (CHECKPOINT_SHARDS)")
+    parser.add_argument("--keep-last", type=int, help="Keep at most this many checkpoints per thread")
+    parser.add_argument("--max-age-days", type=float, help="Delete checkpoints older than this many days")
+    parser.add_argument("--vacuum", action="store_true", help="Run VACUUM afterwards to shrink the file")
+    args = parser.parse_args()
+
+    thread_id = f"thread_{args.user_id}" if args.user_id else None
+    paths = sharding.shard_paths(args.db, args.shards)
+    if thread_id:
+        paths = [paths[sharding.shard_index(thread_id, len(paths))]]
+    for path in paths:
+        if args.shards > 1:
+            print(f"== {path}")
+        compact_file(path, thread_id, args)
+
+def compact_file(path, thread_id, args):
+    conn = db.connect(path)
+    try:
+        size_before = retention.db_size(path)
+        report = retention.thread_stats(conn, thread_id)
+        if not report:
+            print("No checkpoints found.")
+        else:
+            print(f"{'thread_id':<30} {'checkpoints':>12} {'ckpt_bytes':>12} {'writes':>8} {'write_bytes':>12}")
+            for row in report:
+                print(f"{row['thread_id']:<30} {row['checkpoints']:>12} {row['checkpoint_bytes']:>12,} {row['writes']:>8} {row['write_bytes']:>12,}")
+
+        if args.keep_last is not None or args.max_age_days is not None:
+            policy = retention.RetentionPolicy(keep_last=args.keep_last, max_age_days=args.max_age_days)
+            deleted = retention.compact(conn, policy, thread_id)
+            print(f"Deleted {deleted['checkpoints']} checkpoints and {deleted['writes']} pending writes.")
+        if args.vacuum:
+            retention.vacuum(conn)
+        print(f"Database size: {size_before:,} -> {retention.db_size(path):,} bytes")
+    except sqlite3.Error as e:
+        print(f"Error compacting database: {e}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,41 @@
 
 This module defines the configurable parameters for initializing and running the Aza Man
 application, including user identification, model selection, and system prompt formatting.
-Supports multiple LLM providers (Groq, Together, OpenRouter) for flexible model switching.
+Supports multiple LLM providers (Groq, Together, OpenRouter) for flexible model switching,
+a "router" provider that spreads requests over several of them by observed latency, and
+an offline "scripted" provider that replays a recorded conversation.
 """
 
-from dataclasses import dataclass, field, fields
-from typing import Optional, Union
+from dataclasses import dataclass, field, fields, replace
+from typing import TYPE_CHECKING, Optional, Union
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated
-from langchain_groq import ChatGroq
-from langchain_together import ChatTogether
-from langchain_openai import ChatOpenAI
 import os
+import clients
+import context
 import prompts
+import router
+import scripted
 import tools
+from router import RouterChatModel
+from scripted import ScriptedChatModel
+
+if TYPE_CHECKING:
+    # Provider SDKs are imported in _build_llm, so only the configured one is ever loaded
+    from langchain_groq import ChatGroq
+    from langchain_openai import ChatOpenAI
+    from langchain_together import ChatTogether
+
+# Environment variable holding the API key for each supported provider
+PROVIDER_API_KEYS = {
+    "groq": "GROQ_API_KEY",
+    "together": "TOGETHER_API_KEY",
+    "openrouter": "OPENROUTER_API_KEY",
+    "scripted": None,
+    "router": None,
+}
+# Providers the router may send requests to
+ROUTER_PROVIDERS = ("groq", "together", "openrouter", "scripted")
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -28,8 +50,30 @@ class Configuration:
         thread_id (str): Identifier for the conversation thread. Defaults to "default".
         model (Annotated[str, dict]): Language model name with metadata. Defaults to
             "google/gemini-2.0-flash-lite-preview-02-05:free".
-        provider (str): LLM provider ("groq", "together", "openrouter"). Defaults to "openrouter".
-        system_prompt (str): Template for the system prompt, sourced from prompts module.
+        provider (str): LLM provider ("groq", "together", "openrouter", "router" to pick
+            among router_backends per request, or "scripted" to replay a recorded
+            conversation offline, with model naming the JSON script or "default").
+            Defaults to "openrouter".
+        system_prompt (str): Static instructions sent first on every request, sourced from
+            prompts module.
+        state_prompt (str): Template for the per-user state block appended after
+            system_prompt.
+        summary_trigger (int): Message count above which older turns are folded into the
+            rolling summary. Defaults to 10.
+        messages_to_keep (int): Most recent messages left verbatim in state after a
+            summary. Defaults to 4.
+        context_token_budget (int): Maximum prompt tokens sent to the model per turn; 0
+            disables trimming. Defaults to 6000.
+        fast_path (bool): Answer unambiguous commands without calling the LLM. Defaults
+            to True.
+        response_cache (bool): Reuse earlier replies to repeated questions while the
+            user's financial fields are unchanged. Defaults to True.
+        prompt_metrics (bool): Report prompt tokens and the share that repeats the
+            previous turn's prefix after every model call. Defaults to False.
+        router_backends (str): Comma-separated provider:model pairs the "router" provider
+            chooses from; pairs whose API key is not set are skipped.
+        router_hedge (bool): With the "router" provider, also start the next fastest
+            backend when the first is slower than its own p95. Defaults to True.
     """
     user_id: str = "default"
     thread_id: str = "default"
@@ -39,51 +83,147 @@ class Configuration:
     )
     provider: str = field(
         default="openrouter",
-        metadata={"description": "The LLM provider to use: 'groq', 'together', or 'openrouter'."}
+        metadata={"description": "The LLM provider to use: 'groq', 'together', 'openrouter', 'router', or 'scripted'."}
     )
     system_prompt: str = prompts.SYSTEM_PROMPT
+    state_prompt: str = prompts.STATE_PROMPT
+    summary_trigger: int = field(
+        default=10,
+        metadata={"description": "Summarize once the conversation holds more than this many messages."}
+    )
+    messages_to_keep: int = field(
+        default=4,
+        metadata={"description": "Number of recent messages kept verbatim after summarizing."}
+    )
+    context_token_budget: int = field(
+        default=6000,
+        metadata={"description": "Maximum prompt tokens per model call; 0 disables trimming."}
+    )
+    fast_path: bool = field(
+        default=True,
+        metadata={"description": "Answer unambiguous commands deterministically without the LLM."}
+    )
+    response_cache: bool = field(
+        default=True,
+        metadata={"description": "Reuse cached replies to repeated questions while financial state is unchanged."}
+    )
+    prompt_metrics: bool = field(
+        default=False,
+        metadata={"description": "Print prompt token counts and the stable-prefix ratio for each model call."}
+    )
+    router_backends: str = field(
+        default="groq:llama-3.3-70b-versatile,together:meta-llama/Llama-3.3-70B-Instruct-Turbo,openrouter:google/gemini-2.0-flash-lite-preview-02-05:free",
+        metadata={"description": "Comma-separated provider:model backends for the 'router' provider."}
+    )
+    router_hedge: bool = field(
+        default=True,
+        metadata={"description": "Send a hedged request to a second backend when the first is slower than its p95."}
+    )
 
-    def get_llm(self) -> Union[ChatGroq, ChatTogether, ChatOpenAI]:
-        """Initialize and return the language model with bound tools based on the provider.
+    def get_llm(self, with_tools: bool = True) -> "Union[ChatGroq, ChatTogether, ChatOpenAI, RouterChatModel, ScriptedChatModel]":
+        """Return the language model with bound tools based on the provider.
 
-        Configures the appropriate LLM client (Groq, Together, or OpenRouter) using the
-        specified model and provider settings, binding available financial tools.
+        Clients are served from the process-wide registry in the clients module, keyed by
+        provider, model, API key(s), tool set and the running event loop, so repeat turns
+        reuse warm HTTP connections and pre-bound tool schemas instead of constructing a
+        new client.
+
+        Args:
+            with_tools: Bind the assistant's tools; False for plain-text calls such as
+                summarization, where a tool call would leave the reply empty.
 
         Returns:
-            Union[ChatGroq, ChatTogether, ChatOpenAI]: Configured language model instance.
+            Union[ChatGroq, ChatTogether, ChatOpenAI, RouterChatModel, ScriptedChatModel]:
+                Configured language model instance.
 
         Raises:
             ValueError: If an invalid provider is specified.
         """
-        if self.provider.lower() == "groq":
-            llm = ChatGroq(
-                model=self.model,
-                api_key=os.environ.get("GROQ_API_KEY")
+        provider = self.provider.lower()
+        if provider not in PROVIDER_API_KEYS:
+            raise ValueError(f"Unsupported provider: {self.provider}. Use 'groq', 'together', 'openrouter', 'router', or 'scripted'.")
+        api_key = os.environ.get(PROVIDER_API_KEYS[provider]) if PROVIDER_API_KEYS[provider] else None
+        model, key_material = self.model, api_key
+        if provider == "router":
+            model = f"{self.router_backends}|hedge={self.router_hedge}"
+            # Rotating any backend's key must build a new router
+            key_material = "|".join(
+                (os.environ.get(PROVIDER_API_KEYS[backend]) or "") if PROVIDER_API_KEYS[backend] else ""
+                for backend, _ in router.parse_backends(self.router_backends, ROUTER_PROVIDERS)
             )
-        elif self.provider.lower() == "together":
-            llm = ChatTogether(
+        tool_set = tools.ALL_TOOLS if with_tools else []
+        # Async HTTP clients are bound to the loop they were created on
+        key = clients.make_key(provider, model, key_material, tool_set, clients.loop_id())
+        if not with_tools:
+            return clients.registry.get_or_create(key, lambda: self._build_llm(provider, api_key))
+        return clients.registry.get_or_create(
+            key, lambda: self._build_llm(provider, api_key).bind_tools(tool_set)
+        )
+
+    def _build_llm(self, provider: str, api_key: Optional[str]) -> "Union[ChatGroq, ChatTogether, ChatOpenAI, RouterChatModel, ScriptedChatModel]":
+        """Construct a new provider client that shares the pooled HTTP connections.
+
+        Args:
+            provider: The lower-cased provider name.
+            api_key: The provider API key.
+
+        Returns:
+            Union[ChatGroq, ChatTogether, ChatOpenAI, RouterChatModel, ScriptedChatModel]:
+                Unbound language model instance.
+
+        Raises:
+            ValueError: If the router has no backend with an API key.
+        """
+        if provider == "router":
+            backends = []
+            for backend_provider, model in router.parse_backends(self.router_backends, ROUTER_PROVIDERS):
+                env = PROVIDER_API_KEYS[backend_provider]
+                if env and not os.environ.get(env):
+                    continue
+                backend = replace(self, provider=backend_provider, model=model)
+                backends.append((f"{backend_provider}:{model}", backend._build_llm(backend_provider, os.environ.get(env) if env else None)))
+            if not backends:
+                raise ValueError("The router provider needs at least one backend in router_backends with its API key set.")
+            return RouterChatModel(backends=backends, hedge=self.router_hedge)
+        if provider == "scripted":
+            return scripted.from_env(self.model)
+        http_kwargs = {"http_client": clients.get_http_client()}
+        async_client = clients.get_async_http_client()
+        if async_client is not None:
+            http_kwargs["http_async_client"] = async_client
+        if provider == "groq":
+            from langchain_groq import ChatGroq
+            return ChatGroq(
                 model=self.model,
-                api_key=os.environ.get("TOGETHER_API_KEY")
+                api_key=api_key,
+                **http_kwargs
             )
-        elif self.provider.lower() == "openrouter":
-            llm = ChatOpenAI(
+        elif provider == "together":
+            from langchain_together import ChatTogether
+            return ChatTogether(
                 model=self.model,
-                base_url="https://openrouter.ai/api/v1",
-                api_key=os.environ.get("OPENROUTER_API_KEY"),
-                default_headers={
-                    #"HTTP-Referer": "http://localhost:your-port",  
-                    "X-Title": "Aza Man"       
-                }
+                api_key=api_key,
+                **http_kwargs
             )
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}. Use 'groq', 'together', or 'openrouter'.")
-        return llm.bind_tools(tools.ALL_TOOLS)
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=self.model,
+            base_url="https://openrouter.ai/api/v1",
+            api_key=api_key,
+            default_headers={
+                #"HTTP-Referer": "http://localhost:your-port",  
+                "X-Title": "Aza Man"       
+            },
+            **http_kwargs
+        )
 
     def format_system_prompt(self, state) -> str:
         """Format the system prompt with current state values.
 
-        Substitutes state variables into the system prompt template. Falls back to the
-        unformatted prompt if formatting fails due to missing keys.
+        The static system_prompt comes first so every request shares a byte-identical
+        prefix that providers can cache; the per-user state block follows it. Custom
+        system prompts may still use the state placeholders. Falls back to the
+        unformatted template if formatting fails due to missing keys.
 
         Args:
             state: The current state object containing user and financial data.
@@ -96,17 +236,20 @@ class Configuration:
             "income": float(state.income or 0.0),
             "budget_for_expenses": float(state.budget_for_expenses or 0.0),
             "expense": float(state.expense or 0.0),
-            "expenses": str(state.expenses or []),
+            "expenses": (
+                context.format_expense_aggregate(state.expense_count, state.expenses_by_category)
+                if state.expense_ledger else context.summarize_expenses(state.expenses or [])
+            ),
             "savings_goal": float(state.savings_goal or 0.0),
             "savings": float(state.savings or 0.0),
             "currency": state.currency or "",
             "summary": state.summary or "No prior conversation summary available."
         }
         try:
-            return self.system_prompt.format(**format_args)
+            return self.system_prompt.format(**format_args) + self.state_prompt.format(**format_args)
         except KeyError:
             # Silently fall back to unformatted prompt if state data is incomplete
-            return self.system_prompt
+            return self.system_prompt + self.state_prompt
 
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "Configuration":
@@ -126,4 +269,11 @@ class Configuration:
             f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
             for f in fields(cls) if f.init
         }
+        # Environment variables arrive as strings; coerce numeric and boolean settings
+        for f in fields(cls):
+            value = values.get(f.name)
+            if f.type is bool and isinstance(value, str):
+                values[f.name] = value.strip().lower() in ("1", "true", "yes", "on")
+            elif f.type in (int, float) and value is not None:
+                values[f.name] = f.type(value)
         return cls(**{k: v for k, v in values.items() if v is not None})
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""Context assembly for Aza Man financial assistant.
+
+This module keeps the prompt sent by `graph.call_model` within a token budget: it counts
+tokens per model, keeps the system prompt (which carries the conversation summary) and
+the most recent turns, drops older turns first, and records how many tokens each turn
+saved compared with sending the full history.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AnyMessage, HumanMessage, ToolMessage
+
+# Approximate characters per token when no tokenizer is available
+CHARS_PER_TOKEN = 4
+# Per-message overhead for role markers and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+# Number of categories listed individually in the compact expense aggregate
+TOP_CATEGORIES = 5
+
+
+@lru_cache(maxsize=32)
+def _encoding_for(model: str) -> Optional[Any]:
+    """Return a tiktoken encoding for model, or None if tiktoken can't provide one.
+
+    Models tiktoken doesn't know (most Groq/Together/OpenRouter models) fall back to
+    cl100k_base as a close proxy. Failures (e.g., no network to fetch the BPE file) are
+    cached so the character heuristic is used without retrying.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model.split("/")[-1])
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, model: str = "") -> int:
+    """Count the tokens in text for the given model.
+
+    Args:
+        text: The text to measure.
+        model: The model name, used to pick the tokenizer.
+
+    Returns:
+        int: Token count (exact when a tokenizer is available, estimated otherwise).
+    """
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(msg: AnyMessage, model: str = "") -> int:
+    """Count the tokens a message contributes to the prompt, including tool calls.
+
+    Args:
+        msg: The message to measure.
+        model: The model name, used to pick the tokenizer.
+
+    Returns:
+        int: Estimated prompt tokens for the message.
+    """
+    content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content, default=str)
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(content, model)
+    for tc in getattr(msg, "tool_calls", None) or []:
+        tokens += count_tokens(f"{tc['name']}{json.dumps(tc['args'], default=str)}", model)
+    return tokens
+
+
+def summarize_expenses(expenses: Sequence[Dict[str, Any]]) -> str:
+    """Render a compact per-category aggregate of the expense list.
+
+    Replaces the raw list dump in the system prompt, so its size depends on the number
+    of categories rather than the number of expenses.
+
+    Args:
+        expenses: Expense dictionaries with "amount" and "category" keys.
+
+    Returns:
+        str: e.g. "3 expenses; food: 80,000.00, transport: 35,000.00".
+    """
+    totals = defaultdict(float)
+    for e in expenses:
+        totals[str(e.get("category") or "miscellaneous").lower()] += float(e.get("amount") or 0.0)
+    return format_expense_aggregate(len(expenses), totals)
+
+
+def format_expense_aggregate(count: int, by_category: Dict[str, float]) -> str:
+    """Render an expense count and per-category totals for the system prompt.
+
+    Args:
+        count: Number of expenses logged.
+        by_category: Total spend per category.
+
+    Returns:
+        str: e.g. "3 expenses; food: 80,000.00, transport: 35,000.00".
+    """
+    if not count:
+        return "None logged yet"
+    ranked = sorted(by_category.items(), key=lambda item: item[1], reverse=True)
+    parts = [f"{category}: {amount:,.2f}" for category, amount in ranked[:TOP_CATEGORIES]]
+    if len(ranked) > TOP_CATEGORIES:
+        parts.append(f"{len(ranked) - TOP_CATEGORIES} other categories: {sum(a for _, a in ranked[TOP_CATEGORIES:]):,.2f}")
+    return f"{count} expenses; " + ", ".join(parts)
+
+
+class ContextStats:
+    """Thread-safe counters describing how much context assembly trimmed.
+
+    Attributes:
+        turns (int): Number of prompts assembled.
+        prompt_tokens (int): Total tokens actually sent.
+        tokens_saved (int): Total tokens dropped versus sending the full history.
+        last (Dict[str, int]): Metrics for the most recent turn.
+    """
+
+    def __init__(self):
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.tokens_saved = 0
+        self.last: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, full_tokens: int, sent_tokens: int, dropped_messages: int) -> Dict[str, int]:
+        """Record one assembled prompt and return its metrics.
+
+        The returned dict belongs to this call; `last` may already hold another thread's
+        turn by the time the caller reads it.
+        """
+        metrics = {
+            "full_tokens": full_tokens,
+            "sent_tokens": sent_tokens,
+            "tokens_saved": full_tokens - sent_tokens,
+            "dropped_messages": dropped_messages,
+        }
+        with self._lock:
+            self.turns += 1
+            self.prompt_tokens += sent_tokens
+            self.tokens_saved += full_tokens - sent_tokens
+            self.last = metrics
+        return dict(metrics)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative and last-turn metrics."""
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "prompt_tokens": self.prompt_tokens,
+                "tokens_saved": self.tokens_saved,
+                "avg_tokens_saved": self.tokens_saved / self.turns if self.turns else 0.0,
+                "last": dict(self.last),
+            }
+
+
+stats = ContextStats()
+
+
+def prompt_text(prompt: Sequence[Any]) -> str:
+    """Serialize prompt messages in send order, as a provider's prefix cache sees them."""
+    parts = []
+    for msg in prompt:
+        role, content = (msg["role"], msg["content"]) if isinstance(msg, dict) else (msg.type, msg.content)
+        if not isinstance(content, str):
+            content = json.dumps(content, default=str)
+        parts.append(f"{role}\n{content}\n")
+    return "".join(parts)
+
+
+class PrefixStats:
+    """Tracks how much of each prompt repeats the previous prompt of the same thread.
+
+    Provider prompt caches match on the longest shared prefix, so the stable-prefix ratio
+    (shared prefix tokens / prompt tokens) estimates how much of a prompt can be cached.
+
+    Attributes:
+        max_threads (int): Threads whose last prompt is remembered before LRU eviction.
+        turns (int): Prompts measured.
+        prompt_tokens (int): Total tokens measured.
+        stable_prefix_tokens (int): Total tokens shared with the thread's previous prompt.
+        last (Dict[str, Any]): Metrics for the most recent prompt.
+    """
+
+    def __init__(self, max_threads: int = 256):
+        self.max_threads = max_threads
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.stable_prefix_tokens = 0
+        self.last: Dict[str, Any] = {}
+        self._previous: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, thread_id: str, prompt: Sequence[Any], model: str = "") -> Dict[str, Any]:
+        """Measure one prompt against the thread's previous prompt.
+
+        Args:
+            thread_id: The conversation thread.
+            prompt: The prompt messages about to be sent.
+            model: The model name, used to pick the tokenizer.
+
+        Returns:
+            Dict[str, Any]: "prompt_tokens", "stable_prefix_tokens" and "stable_prefix_ratio".
+        """
+        text = prompt_text(prompt)
+        with self._lock:
+            previous = self._previous.pop(thread_id, "")
+            self._previous[thread_id] = text
+            while len(self._previous) > self.max_threads:
+                self._previous.popitem(last=False)
+        shared = len(os.path.commonprefix([previous, text]))
+        total = count_tokens(text, model)
+        prefix = count_tokens(text[:shared], model)
+        metrics = {
+            "prompt_tokens": total,
+            "stable_prefix_tokens": prefix,
+            "stable_prefix_ratio": prefix / total if total else 0.0,
+        }
+        with self._lock:
+            self.turns += 1
+            self.prompt_tokens += total
+            self.stable_prefix_tokens += prefix
+            self.last = metrics
+        return metrics
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative and last-prompt metrics."""
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "prompt_tokens": self.prompt_tokens,
+                "stable_prefix_tokens": self.stable_prefix_tokens,
+                "stable_prefix_ratio": self.stable_prefix_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+                "last": dict(self.last),
+            }
+
+
+prefix_stats = PrefixStats()
+
+
+def assemble_context(system_prompt: str, messages: Sequence[AnyMessage], token_budget: int,
+                     model: str = "") -> Tuple[List[Any], Dict[str, int]]:
+    """Build the prompt for call_model within a token budget.
+
+    The system prompt (with the rolling summary) is always kept. Messages are then added
+    from newest to oldest until the budget is reached. The current user turn (the latest
+    user message and the tool calls and results after it) is always sent whole, even over
+    budget, and an older window is widened back to the AI message whose tool call its
+    first ToolMessage answers, so a tool result is never sent without its call. Windows
+    prefer to start at a user turn.
+
+    Args:
+        system_prompt: The formatted system prompt.
+        messages: The conversation messages in state.
+        token_budget: Maximum prompt tokens; 0 or less disables trimming.
+        model: The model name, used to pick the tokenizer.
+
+    Returns:
+        Tuple[List[Any], Dict[str, int]]: The prompt messages and this turn's metrics.
+    """
+    system_tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(system_prompt, model)
+    sizes = [message_tokens(msg, model) for msg in messages]
+    full_tokens = system_tokens + sum(sizes)
+
+    start = 0
+    if token_budget > 0 and full_tokens > token_budget:
+        used = system_tokens
+        start = len(messages)
+        while start > 0 and (start == len(messages) or used + sizes[start - 1] <= token_budget):
+            start -= 1
+            used += sizes[start]
+        # Back off to a user turn inside the window so tool calls keep their results
+        turn_start = next((i for i in range(start, len(messages)) if isinstance(messages[i], HumanMessage)), None)
+        if turn_start is not None:
+            start = turn_start
+        current_turn = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), None)
+        if current_turn is not None:
+            start = min(start, current_turn)
+        while start > 0 and isinstance(messages[start], ToolMessage):
+            start -= 1
+
+    kept = list(messages[start:])
+    sent_tokens = system_tokens + sum(sizes[start:])
+    metrics = stats.record(full_tokens, sent_tokens, start)
+    return [{"role": "system", "content": system_prompt}, *kept], metrics
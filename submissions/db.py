@@ -0,0 +1,189 @@
+"""SQLite connection management for Aza Man financial assistant.
+
+Every store in the app (checkpoints, expense ledger, response cache) lives in
+memory_agent.db and is used from many Streamlit session threads at once. This module
+gives each database file one `ConnectionManager`: connections run in WAL mode with a
+busy timeout, each thread reads through its own connection so readers never queue
+behind one another or behind a writer, and all writes in the process go through a
+single writer connection guarded by one lock, so in-process writers wait on the lock
+instead of failing with "database is locked".
+
+Environment:
+    SQLITE_BUSY_TIMEOUT: Seconds a connection waits on another process's lock (default 10).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+DEFAULT_DB_PATH = "memory_agent.db"
+BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", "10"))
+
+
+def connect(path: str, busy_timeout: float = BUSY_TIMEOUT, read_only: bool = False) -> sqlite3.Connection:
+    """Open a connection configured for concurrent use.
+
+    Args:
+        path: Database file, or ":memory:".
+        busy_timeout: Seconds to wait for a lock held by another connection.
+        read_only: Reject writes on this connection (PRAGMA query_only).
+
+    Returns:
+        sqlite3.Connection: A connection usable from any thread.
+    """
+    conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+    if path != ":memory:" and not read_only:
+        conn.execute("PRAGMA journal_mode = WAL")
+    # WAL only needs fsync at checkpoints for durability against power loss
+    conn.execute("PRAGMA synchronous = NORMAL")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ConnectionManager:
+    """One serialized writer connection plus a read connection per thread for a database.
+
+    An in-memory database exists only on the connection that created it, so for
+    ":memory:" reads share the writer connection and must hold `write_lock`.
+
+    Attributes:
+        path (str): The database file.
+        writer (sqlite3.Connection): The connection all writes go through.
+        write_lock (threading.Lock): Serializes use of `writer`.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, busy_timeout: float = BUSY_TIMEOUT):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.writer = connect(path, busy_timeout)
+        self.write_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def shared(self) -> bool:
+        """Whether readers must use the writer connection (in-memory databases)."""
+        return self.path == ":memory:"
+
+    def reader(self) -> sqlite3.Connection:
+        """Return this thread's read connection, opening it on first use."""
+        if self.shared:
+            return self.writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path, self.busy_timeout, read_only=True)
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Yield a connection for reads, holding the write lock only when it is shared."""
+        if self.shared:
+            with self.write_lock:
+                yield self.writer
+        else:
+            yield self.reader()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer connection inside a transaction, one writer at a time."""
+        with self.write_lock, self.writer:
+            yield self.writer
+
+    def close(self) -> None:
+        """Close the writer and this thread's reader; other threads' readers close with them."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        with self.write_lock:
+            self.writer.close()
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(path: str = DEFAULT_DB_PATH) -> ConnectionManager:
+    """Return the process-wide manager for a database file, creating it on first use.
+
+    Args:
+        path: Database file.
+
+    Returns:
+        ConnectionManager: The shared manager, so every store writing to the file uses
+            the same writer lock.
+    """
+    key = path if path == ":memory:" else os.path.abspath(path)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ConnectionManager(path)
+        return _managers[key]
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """SqliteSaver that reads through per-thread connections and writes through the manager.
+
+    `get_tuple` and `list` no longer queue behind each other or behind `put`; `put` and
+    `put_writes` share the manager's writer and lock with the ledger and response cache.
+
+    Attributes:
+        manager (ConnectionManager): Connections for the checkpoint database.
+    """
+
+    def __init__(self, manager: ConnectionManager, *, serde=None):
+        super().__init__(manager.writer, serde=serde)
+        self.manager = manager
+        self.lock = manager.write_lock
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        if transaction or self.manager.shared:
+            with super().cursor(transaction) as cur:
+                yield cur
+            return
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+        cur = self.manager.reader().cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+    def latest_checkpoint_id(self, config: RunnableConfig) -> Optional[str]:
+        """Return the id of the thread's newest checkpoint without loading it.
+
+        Args:
+            config: Config with the thread id (and optionally checkpoint_ns).
+
+        Returns:
+            Optional[str]: The checkpoint id, or None if the thread has no checkpoints.
+        """
+        configurable = config["configurable"]
+        with self.cursor(transaction=False) as cur:
+            cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")),
+            )
+            row = cur.fetchone()
+        return row[0] if row else None
+
+
+def checkpointer(path: str = DEFAULT_DB_PATH, serde=None) -> PooledSqliteSaver:
+    """Return a PooledSqliteSaver on the shared manager for path.
+
+    Args:
+        path: Checkpoint database file.
+        serde: Optional serializer for checkpoint blobs.
+
+    Returns:
+        PooledSqliteSaver: The checkpointer.
+    """
+    return PooledSqliteSaver(get_manager(path), serde=serde)
@@ -2,6 +2,12 @@
 
 import os
 import csv
+import argparse
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from langchain_together import ChatTogether
 from openevals.llm import create_llm_as_judge
@@ -44,16 +50,73 @@ Evaluate the <output> for the last input in the sequence, updating the state bas
 - If an output logs expenses with a total (e.g., 'Total: X CURRENCY'), update state.expense = X and append expenses to state.expenses from the input, using 'miscellaneous' for uncategorized expenses if specified.
 """
 
+JUDGE_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo"
+RESULTS_CSV = "aza_man_eval_results.csv"
+CACHE_FILE = "aza_man_eval_cache.jsonl"
+FIELDNAMES = ["Test Number", "Input", "Output", "Expected", "Score", "Comment"]
+
 # Initialize OpenEvals evaluator
 evaluator = create_llm_as_judge(
     prompt=AZA_EVAL_PROMPT,
     judge=ChatTogether(
-        model="meta-llama/Llama-3.3-70B-Instruct-Turbo",
+        model=JUDGE_MODEL,
         api_key=os.environ.get("TOGETHER_API_KEY")
     ),
     feedback_key="aza_correctness",
 )
 
+class RateLimiter:
+    """Spaces out judge calls across threads to at most `rate` calls per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class EvalCache:
+    """Append-only JSONL store of judge results, keyed by everything that affects a score.
+
+    Results are appended as soon as each case finishes, so an interrupted run resumes
+    from where it stopped and unchanged cases are never re-judged.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._results = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._results[entry["key"]] = entry["result"]
+                    except (ValueError, KeyError):
+                        continue  # a run killed mid-write can leave a partial last line
+
+    @staticmethod
+    def key(inputs, outputs, reference_outputs):
+        payload = json.dumps([AZA_EVAL_PROMPT, inputs, outputs, reference_outputs, JUDGE_MODEL])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            return self._results.get(key)
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "result": result}) + "\n")
+
 def load_test_cases_from_csv(csv_file="aza_man_eval_dataset.csv"):
     """Load test cases from a CSV file."""
     test_cases = []
@@ -73,53 +136,97 @@ def load_test_cases_from_csv(csv_file="aza_man_eval_dataset.csv"):
         print(f"Error loading test cases: {e}")
         return []
 
-def evaluate_aza_man():
-    """Run evaluations using test cases from CSV, print results, and save to CSV."""
+def build_eval_cases(test_cases):
+    """Attach the conversation so far to each test case.
+
+    Every case only depends on the dataset rows before it, not on earlier judge results,
+    so all cases can be judged independently.
+    """
+    cases = []
+    conversation_history = []
+    for i, test in enumerate(test_cases, 1):
+        conversation_history.append(test["inputs"])
+        cases.append({"number": i, "full_inputs": "\n".join(conversation_history), **test})
+        conversation_history.append(test["outputs"])
+    return cases
+
+def judge_case(case, cache, limiter):
+    """Score one case, serving it from the cache when nothing that affects it changed."""
+    key = EvalCache.key(case["full_inputs"], case["outputs"], case["outputs"])
+    eval_result = cache.get(key)
+    cached = eval_result is not None
+    if not cached:
+        limiter.wait()
+        try:
+            result = evaluator(
+                inputs=case["full_inputs"],
+                outputs=case["outputs"],
+                reference_outputs=case["outputs"]
+            )
+            eval_result = {"score": result["score"], "comment": result["comment"]}
+            cache.put(key, eval_result)
+        except Exception as e:
+            # Failed cases are reported but not cached, so the next run retries them
+            eval_result = {"score": "", "comment": f"Error: {e}"}
+    return {
+        "Test Number": case["number"],
+        "Input": case["inputs"],
+        "Output": case["outputs"],
+        "Expected": case["outputs"],
+        "Score": eval_result["score"],
+        "Comment": eval_result["comment"]
+    }, cached
+
+def evaluate_aza_man(dataset="aza_man_eval_dataset.csv", results_csv=RESULTS_CSV, concurrency=4,
+                     rate=2.0, cache_file=CACHE_FILE):
+    """Run evaluations using test cases from CSV, print results, and save to CSV.
+
+    Cases are judged concurrently (at most `concurrency` in flight and `rate` judge calls
+    per second) and rows are written to results_csv in test order as soon as they are
+    ready. Cases already judged with the same prompt, inputs, outputs and judge model
+    are read from cache_file instead of calling the judge again.
+    """
     print("Running Aza Man Evaluations with Test Cases from CSV...\n")
     
-    test_cases = load_test_cases_from_csv()
+    test_cases = load_test_cases_from_csv(dataset)
     if not test_cases:
         print("No test cases loaded. Exiting.")
         return
     
-    results = []
-    conversation_history = []  
-    
-    for i, test in enumerate(test_cases, 1):
-        conversation_history.append(test["inputs"])
-        full_inputs = "\n".join(conversation_history)
-        
-        print(f"Test {i}:")
-        print(f"Input: {test['inputs']}")
-        print(f"Output: {test['outputs']}")
-        print(f"Expected: {test['outputs']}")
-        eval_result = evaluator(
-            inputs=full_inputs,
-            outputs=test["outputs"],
-            reference_outputs=test["outputs"]
-        )
-        print(f"Score: {eval_result['score']}")
-        print(f"Comment: {eval_result['comment']}")
-        print("-" * 50)
-        
-        results.append({
-            "Test Number": i,
-            "Input": test["inputs"],
-            "Output": test["outputs"],
-            "Expected": test["outputs"],
-            "Score": eval_result["score"],
-            "Comment": eval_result["comment"]
-        })
-        
-        conversation_history.append(test["outputs"])
-
-    csv_file = "aza_man_eval_results.csv"
-    with open(csv_file, "w", newline="", encoding="utf-8") as f:
-        fieldnames = ["Test Number", "Input", "Output", "Expected", "Score", "Comment"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    cache = EvalCache(cache_file)
+    limiter = RateLimiter(rate)
+    cached_count = 0
+    with open(results_csv, "w", newline="", encoding="utf-8") as f, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="aza-eval") as executor:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
-        writer.writerows(results)
-    print(f"Evaluation results saved to {csv_file}")
+        # map() yields in submission order, so the CSV stays in test order
+        for row, cached in executor.map(lambda case: judge_case(case, cache, limiter), build_eval_cases(test_cases)):
+            cached_count += cached
+            print(f"Test {row['Test Number']}:{' (cached)' if cached else ''}")
+            print(f"Input: {row['Input']}")
+            print(f"Output: {row['Output']}")
+            print(f"Expected: {row['Expected']}")
+            print(f"Score: {row['Score']}")
+            print(f"Comment: {row['Comment']}")
+            print("-" * 50)
+            writer.writerow(row)
+            f.flush()
+    print(f"{cached_count} of {len(test_cases)} results served from {cache_file}")
+    print(f"Evaluation results saved to {results_csv}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate Aza Man outputs with an LLM judge")
+    parser.add_argument("--dataset", default="aza_man_eval_dataset.csv", help="Test case CSV to evaluate")
+    parser.add_argument("--output", default=RESULTS_CSV, help="CSV file to write results to")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("EVAL_CONCURRENCY", "4")),
+                        help="Maximum judge calls in flight")
+    parser.add_argument("--rate", type=float, default=float(os.environ.get("EVAL_RATE", "2")),
+                        help="Maximum judge calls per second (0 for no limit)")
+    parser.add_argument("--cache", default=CACHE_FILE, help="Result cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Judge every case again and keep no cache")
+    args = parser.parse_args()
+    evaluate_aza_man(args.dataset, args.output, args.concurrency, args.rate, None if args.no_cache else args.cache)
 
 if __name__ == "__main__":
-    evaluate_aza_man()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,406 @@
+"""Bulk expense import for Aza Man financial assistant.
+
+This module loads bank exports (CSV or OFX/QFX) straight into the expense ledger without
+going through the chat model. Files are streamed record by record and written in batched
+transactions, so memory stays flat however many rows a file holds; the thread's state
+aggregates are then refreshed from the ledger with a single `update_state` call.
+
+Usage:
+    python expense_import.py transactions.csv --user_id jake00 --currency NGN
+    python expense_import.py statement.ofx --user_id jake00
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+import ledger
+import response_cache
+
+# Rows written per ledger transaction
+BATCH_SIZE = 5000
+
+# Header names (lower-cased) recognised for each field, in order of preference
+AMOUNT_COLUMNS = ("amount", "value", "transaction amount", "amt")
+DEBIT_COLUMNS = ("debit", "withdrawal", "withdrawals", "money out", "paid out", "dr")
+CREDIT_COLUMNS = ("credit", "deposit", "deposits", "money in", "paid in", "cr")
+DATE_COLUMNS = ("date", "transaction date", "trans date", "posted date", "posting date", "value date", "booking date")
+CATEGORY_COLUMNS = ("category", "categories", "budget category")
+DESCRIPTION_COLUMNS = ("description", "narration", "details", "memo", "payee", "merchant", "name", "remarks")
+CURRENCY_COLUMNS = ("currency", "ccy")
+
+DATE_FORMATS = (
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
+    "%d/%m/%y", "%m/%d/%Y", "%m-%d-%Y", "%m/%d/%y", "%d %b %Y", "%d-%b-%Y", "%d-%b-%y",
+    "%b %d, %Y", "%d %B %Y", "%Y%m%d",
+)
+# Rows read ahead to tell day/month from month/day order before the file is called ambiguous
+DATE_DETECT_ROWS = 10000
+
+# Description keywords used to categorize rows that have no category column
+CATEGORY_KEYWORDS = {
+    "food": ("restaurant", "eatery", "kitchen", "cafe", "pizza", "chicken", "food", "grocer", "supermarket", "market", "shoprite", "spar"),
+    "transport": ("uber", "bolt", "taxi", "ride", "bus", "transport", "fuel", "petrol", "filling station", "parking", "toll"),
+    "utilities": ("electric", "power", "water", "nepa", "phcn", "disco", "gas", "waste"),
+    "data": ("airtime", "data", "mtn", "glo", "airtel", "9mobile", "internet", "wifi"),
+    "entertainment": ("netflix", "spotify", "dstv", "gotv", "showmax", "cinema", "apple.com", "youtube"),
+    "rent": ("rent", "landlord", "lease"),
+    "health": ("pharmacy", "hospital", "clinic", "health", "medical"),
+    "fees": ("charge", "fee", "vat", "levy", "stamp duty", "sms alert", "commission"),
+}
+
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+_NUMBER = re.compile(r"[^\d.\-]")
+
+
+@dataclass
+class ImportResult:
+    """Summary of one import run.
+
+    Attributes:
+        imported (int): Rows written to the ledger.
+        skipped (int): Credits and zero-amount rows left out.
+        rejected (int): Rows whose amount or date could not be parsed.
+        total (float): Sum of the imported amounts.
+        errors (list): The first few rejection reasons, for display.
+    """
+    imported: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    total: float = 0.0
+    errors: list = field(default_factory=list)
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < 10:
+            self.errors.append(f"row {line}: {reason}")
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse bank-formatted amounts such as "₦1,250.00", "(350.00)" or "-42.10".
+
+    Returns:
+        Optional[float]: The signed amount, or None if the value holds no number.
+    """
+    text = "" if value is None else str(value).strip()
+    if not text:
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    number = _NUMBER.sub("", text)
+    if number in ("", "-", ".", "-."):
+        return None
+    try:
+        amount = float(number)
+    except ValueError:
+        return None
+    return -abs(amount) if negative else amount
+
+
+def _date_text(value: Any) -> str:
+    text = str(value or "").strip()
+    if re.fullmatch(r"\d{8}(\d{4,6})?(\.\d+)?(\[.*\])?", text):
+        text = text[:8]
+    return text
+
+
+def _strptime(text: str, date_format: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.strptime(text, date_format)
+    except ValueError:
+        return None
+    # %Y also reads "25" as the year 25; two-digit years are %y's
+    return parsed if "%Y" not in date_format or parsed.year >= 1000 else None
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: Any, date_format: Optional[str] = None) -> Optional[str]:
+    """Return the value as an ISO "YYYY-MM-DD HH:MM:SS" timestamp, or None if unparseable.
+
+    Args:
+        value: The date text; OFX dates like "20250301120000[0:GMT]" are accepted.
+        date_format: strptime format to use instead of trying DATE_FORMATS.
+    """
+    text = _date_text(value)
+    if not text:
+        return None
+    for fmt in (date_format,) if date_format else DATE_FORMATS:
+        parsed = _strptime(text, fmt)
+        if parsed is not None:
+            return parsed.isoformat(sep=" ", timespec="seconds")
+    try:
+        return datetime.fromisoformat(text).isoformat(sep=" ", timespec="seconds")
+    except ValueError:
+        return None
+
+
+def detect_date_format(records: Iterable[Tuple[int, Dict[str, Any]]], limit: int = DATE_DETECT_ROWS
+                       ) -> Tuple[Iterator[Tuple[int, Dict[str, Any]]], Optional[str]]:
+    """Pick the one DATE_FORMATS entry that reads the file's dates.
+
+    Records are read until a single format fits every date so far (the first day above
+    12 settles day/month order), the file ends, or `limit` rows have been read. Rows whose
+    date fits none of the remaining formats are left to be rejected on import.
+
+    Args:
+        records: (line, record) pairs from iter_records.
+        limit: Rows to read ahead at most.
+
+    Returns:
+        Tuple[Iterator, Optional[str]]: The records, including the ones read ahead, and the
+            format, or None if no date matched any format.
+
+    Raises:
+        ValueError: If the dates fit several formats that read them differently,
+            e.g. only "03/04/2025"-style dates that could be day or month first.
+    """
+    records = iter(records)
+    buffered = []
+    candidates: Optional[list] = None
+    dates = set()
+    for line, record in records:
+        buffered.append((line, record))
+        text = _date_text(record.get("date"))
+        matches = [fmt for fmt in candidates or DATE_FORMATS if _strptime(text, fmt)] if text else []
+        if not matches:
+            continue
+        candidates = matches
+        dates.add(text)
+        if len(candidates) == 1 or len(buffered) >= limit:
+            break
+    rows = itertools.chain(buffered, records)
+    if not candidates:
+        return rows, None
+    for text in sorted(dates):
+        readings = {_strptime(text, fmt) for fmt in candidates}
+        if len(readings) > 1:
+            raise ValueError(f"Dates like {text!r} could be read as {' or '.join(candidates)}; "
+                             "set the date format, e.g. %d/%m/%Y.")
+    return rows, candidates[0]
+
+
+def infer_category(category: Optional[str], description: Optional[str]) -> str:
+    """Return the ledger category: the file's own category, else one guessed from the description."""
+    if category and category.strip():
+        return ledger.normalize_category(category.strip())
+    text = (description or "").lower()
+    for name, keywords in CATEGORY_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return name
+    return ledger.normalize_category(None)
+
+
+def _pick(header: Dict[str, str], candidates: Tuple[str, ...]) -> Optional[str]:
+    for candidate in candidates:
+        if candidate in header:
+            return header[candidate]
+    return None
+
+
+def iter_csv(f: TextIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line, record) pairs from a CSV export, mapping its columns onto our fields.
+
+    Records carry "amount" (signed, debits negative when the file has debit/credit
+    columns), "date", "category", "description" and "currency".
+
+    Raises:
+        ValueError: If no amount or debit column can be found.
+    """
+    reader = csv.DictReader(f)
+    header = {name.strip().lower(): name for name in reader.fieldnames or [] if name}
+    amount_col = _pick(header, AMOUNT_COLUMNS)
+    debit_col = _pick(header, DEBIT_COLUMNS)
+    credit_col = _pick(header, CREDIT_COLUMNS)
+    if not amount_col and not debit_col:
+        raise ValueError(f"No amount column found in CSV header: {', '.join(reader.fieldnames or [])}")
+    date_col = _pick(header, DATE_COLUMNS)
+    category_col = _pick(header, CATEGORY_COLUMNS)
+    description_col = _pick(header, DESCRIPTION_COLUMNS)
+    currency_col = _pick(header, CURRENCY_COLUMNS)
+    for row in reader:
+        if amount_col:
+            amount = row.get(amount_col)
+        else:
+            debit = parse_amount(row.get(debit_col))
+            credit = parse_amount(row.get(credit_col)) if credit_col else None
+            # Split debit/credit columns become one signed amount, debits negative
+            amount = -abs(debit) if debit else (abs(credit) if credit else row.get(debit_col) or "0")
+        yield reader.line_num, {
+            "amount": amount,
+            "date": row.get(date_col) if date_col else None,
+            "category": row.get(category_col) if category_col else None,
+            "description": row.get(description_col) if description_col else None,
+            "currency": row.get(currency_col) if currency_col else None,
+            "signed": not amount_col,
+        }
+
+
+def iter_ofx(f: TextIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line, record) pairs for each <STMTTRN> in an OFX/QFX file (SGML or XML)."""
+    currency = None
+    record: Optional[Dict[str, Any]] = None
+    start = 0
+    for line_num, line in enumerate(f, 1):
+        upper = line.upper()
+        if "<STMTTRN>" in upper:
+            record, start = {"signed": True}, line_num
+        for tag, value in _OFX_FIELD.findall(line):
+            tag, value = tag.upper(), value.strip()
+            if tag == "CURDEF":
+                currency = value
+            elif record is not None and tag == "TRNAMT":
+                record["amount"] = value
+            elif record is not None and tag == "DTPOSTED":
+                record["date"] = value
+            elif record is not None and tag in ("NAME", "MEMO", "PAYEE"):
+                record["description"] = " ".join(filter(None, (record.get("description"), value)))
+        if "</STMTTRN>" in upper and record is not None:
+            record.setdefault("currency", currency)
+            yield start, record
+            record = None
+
+
+def iter_records(f: TextIO, filename: str = "") -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line, record) pairs from a CSV or OFX/QFX stream, chosen by name or content."""
+    if filename.lower().endswith((".ofx", ".qfx")):
+        return iter_ofx(f)
+    if not filename.lower().endswith(".csv"):
+        head = f.read(512)
+        f.seek(0)
+        if "OFXHEADER" in head.upper() or "<OFX>" in head.upper():
+            return iter_ofx(f)
+    return iter_csv(f)
+
+
+def import_rows(records: Iterable[Tuple[int, Dict[str, Any]]], user_id: str, currency: str = "",
+                signed: bool = False, date_format: Optional[str] = None,
+                expense_ledger: Optional[ledger.ExpenseLedger] = None,
+                batch_size: int = BATCH_SIZE) -> ImportResult:
+    """Normalize records and append them to the ledger in batched transactions.
+
+    Args:
+        records: (line, record) pairs from iter_records.
+        user_id: The user the expenses belong to.
+        currency: Currency for records that don't name one.
+        signed: Treat positive amounts in a single amount column as credits and skip them
+            (debit/credit columns and OFX files are always signed).
+        date_format: strptime format for the date column; detected once for the whole
+            file when None (see detect_date_format).
+        expense_ledger: Ledger to write to; defaults to the shared ledger.
+        batch_size: Rows per transaction.
+
+    Returns:
+        ImportResult: Counts and total of what was written.
+
+    Raises:
+        ValueError: If date_format is None and the file's dates are ambiguous.
+    """
+    if date_format is None:
+        records, date_format = detect_date_format(records)
+    expense_ledger = expense_ledger or ledger.get_ledger()
+    result = ImportResult()
+    batch = []
+    for line, record in records:
+        amount = parse_amount(record.get("amount"))
+        if amount is None:
+            result.reject(line, f"unreadable amount {record.get('amount')!r}")
+            continue
+        if amount == 0 or ((signed or record.get("signed")) and amount > 0):
+            result.skipped += 1
+            continue
+        timestamp = parse_date(record.get("date"), date_format)
+        if timestamp is None:
+            result.reject(line, f"unreadable date {record.get('date')!r}")
+            continue
+        category = infer_category(record.get("category"), record.get("description"))
+        batch.append((user_id, timestamp, abs(amount), category, (record.get("currency") or currency or "").strip().upper()))
+        result.total += abs(amount)
+        if len(batch) >= batch_size:
+            result.imported += expense_ledger.append_rows(batch)
+            batch = []
+    result.imported += expense_ledger.append_rows(batch)
+    return result
+
+
+def import_file(f, filename: str, user_id: str, currency: str = "", signed: bool = False,
+                date_format: Optional[str] = None, batch_size: int = BATCH_SIZE) -> ImportResult:
+    """Stream a text or binary file object into the user's ledger.
+
+    Args:
+        f: An open file; binary streams (e.g. a Streamlit upload) are decoded as UTF-8.
+        filename: Name used to tell CSV from OFX.
+        user_id: The user the expenses belong to.
+        currency: Currency for rows that don't name one.
+        signed: See import_rows.
+        date_format: See import_rows.
+        batch_size: Rows per transaction.
+
+    Returns:
+        ImportResult: Counts and total of what was written.
+
+    Raises:
+        ValueError: If a CSV has no amount column or the file's dates are ambiguous.
+    """
+    if not isinstance(f, io.TextIOBase):
+        f = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+    return import_rows(iter_records(f, filename), user_id, currency, signed, date_format, batch_size=batch_size)
+
+
+def refresh_state(compiled_graph, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute the thread's expense aggregates from the ledger and write them to state.
+
+    Checkpoints that still carry a legacy expense list have it moved to the ledger first,
+    as the log_expenses tool does on its first write.
+
+    Args:
+        compiled_graph: The compiled graph holding the user's thread.
+        config: Config with "user_id" and "thread_id" in "configurable".
+
+    Returns:
+        Dict[str, Any]: The state update that was applied.
+    """
+    user_id = config["configurable"]["user_id"]
+    expense_ledger = ledger.get_ledger()
+    values = compiled_graph.get_state(config).values or {}
+    if not values.get("expense_ledger") and values.get("expenses"):
+        expense_ledger.append(user_id, values["expenses"], values.get("currency", ""), source="legacy")
+    updates = {**expense_ledger.aggregates(user_id), "expense_ledger": user_id, "expenses": []}
+    # summarize_conversation only leads to END, so no node is left pending afterwards
+    compiled_graph.update_state(config, updates, as_node="summarize_conversation")
+    response_cache.get_cache().invalidate_user(user_id)
+    return updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import expenses from a CSV or OFX bank export")
+    parser.add_argument("file", help="CSV or OFX/QFX file to import")
+    parser.add_argument("--user_id", required=True, help="User ID to import for (same as entered in Streamlit)")
+    parser.add_argument("--currency", default="", help="Currency for rows that don't name one (e.g., NGN)")
+    parser.add_argument("--signed", action="store_true", help="Skip positive amounts as credits (single amount column)")
+    parser.add_argument("--date-format", default=None, help="strptime format of the date column, e.g. %%d/%%m/%%Y")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per ledger transaction")
+    args = parser.parse_args()
+
+    from graph import graph
+    config = {"configurable": {"user_id": args.user_id, "thread_id": f"thread_{args.user_id}"}}
+    currency = args.currency or (graph.get_state(config).values or {}).get("currency", "")
+    with open(args.file, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        try:
+            result = import_file(f, args.file, args.user_id, currency, args.signed, args.date_format, args.batch_size)
+        except ValueError as e:
+            parser.error(f"{args.file}: {e}")
+    updates = refresh_state(graph, config)
+    print(f"Imported {result.imported:,} expenses ({result.total:,.2f} {currency}); "
+          f"skipped {result.skipped:,} credits/zero rows, rejected {result.rejected:,}.")
+    for error in result.errors:
+        print(f"  {error}")
+    print(f"Total expenses for '{args.user_id}': {updates['expense']:,.2f} across {updates['expense_count']:,} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Deterministic command parser for Aza Man financial assistant.
+
+This module recognizes short, unambiguous commands ("call me Blaq", "budget 750k 40% NGN",
+"log 80k food, 35,000 transport", "am I on track?") and maps them straight onto tool
+calls, so `graph.fast_path` can answer them without an LLM round trip. Anything it does
+not fully understand returns None and goes to `call_model` as before.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+_AMOUNT = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+AMOUNT_PATTERN = re.compile(rf"^(?P<number>{_AMOUNT})\s*(?P<suffix>[km])?$", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000}
+
+_FILLER = r"(?:(?:sure|ok|okay|hi|hello|hey|wait)[,.!]?\s+)?"
+USERNAME_PATTERN = re.compile(
+    rf"^{_FILLER}(?:my name is|call me|you can call me)\s+(?P<username>[A-Za-z][A-Za-z'-]{{0,30}})\s*[.!]?$",
+    re.IGNORECASE,
+)
+# Words that follow "call me" without being a name ("call me later", "call me back")
+NOT_NAMES = frozenset({
+    "later", "tomorrow", "today", "tonight", "now", "soon", "back", "again", "maybe", "please",
+    "sometime", "anytime", "whenever", "asap", "yesterday", "first", "next", "then", "instead",
+    "something", "anything", "nothing", "whatever", "sometimes", "never", "always", "once",
+})
+BUDGET_PATTERN = re.compile(
+    rf"^(?:(?:set|create)\s+(?:a\s+|my\s+)?)?budget\s+(?P<income>(?:{_AMOUNT})\s*[km]?)\s+"
+    rf"(?:(?:save|saving|savings)\s+)?(?P<savings>\d+(?:\.\d+)?%|(?:{_AMOUNT})\s*[km]?)\s+(?P<currency>[A-Za-z]{{3}})\s*[.!]?$",
+    re.IGNORECASE,
+)
+# "add" is left out: "add 450000 and 182000" is arithmetic, not two expenses
+LOG_PATTERN = re.compile(r"^(?:log|spent|i spent)\s+(?P<items>.+?)\s*[.!]?$", re.IGNORECASE)
+LOG_ITEM_PATTERN = re.compile(
+    rf"^(?P<amount>(?:{_AMOUNT})\s*[km]?)(?:\s+(?:(?:on|for)\s+)?(?P<category>[A-Za-z][A-Za-z &'-]*))?$",
+    re.IGNORECASE,
+)
+# Categories of more than one word the fast path accepts; anything else multi-word
+# ("80k last tuesday", "5 minutes thinking") goes to the model
+KNOWN_CATEGORIES = frozenset({
+    "school fees", "eating out", "personal care", "phone bill", "car repair", "car maintenance",
+    "health insurance", "house help", "public transport",
+})
+# Date and time words: "spent 80k yesterday" needs the model to work out the date, and
+# "spent 5 minutes" is not an expense at all
+TIME_WORDS = frozenset({
+    "yesterday", "today", "tonight", "tomorrow", "last", "this", "next", "ago", "morning", "afternoon",
+    "evening", "night", "week", "weeks", "weekend", "month", "months", "year", "years", "day", "days",
+    "hour", "hours", "hr", "hrs", "minute", "minutes", "min", "mins", "second", "seconds", "secs",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december",
+})
+LOG_SEPARATOR = re.compile(r"\s*(?:,\s+|;\s*|\s+and\s+)\s*", re.IGNORECASE)
+ON_TRACK_PATTERN = re.compile(
+    rf"^{_FILLER}(?:am i on track|how am i doing|how much (?:do i have |have i got )?left)\s*[?.!]*$",
+    re.IGNORECASE,
+)
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """Parse an amount such as "80k", "1.2m" or "35,000".
+
+    Args:
+        text: The amount text.
+
+    Returns:
+        Optional[float]: The numeric value, or None if text is not an amount.
+    """
+    match = AMOUNT_PATTERN.match(text.strip())
+    if not match:
+        return None
+    value = float(match.group("number").replace(",", ""))
+    suffix = (match.group("suffix") or "").lower()
+    return value * _MULTIPLIERS.get(suffix, 1)
+
+
+def _parse_expenses(items: str) -> Optional[List[Dict[str, Any]]]:
+    expenses = []
+    for item in LOG_SEPARATOR.split(items):
+        match = LOG_ITEM_PATTERN.match(item.strip())
+        if not match:
+            return None
+        amount = parse_amount(match.group("amount"))
+        category = _category(match.group("category"))
+        if amount is None or category is None:
+            return None
+        expenses.append({"amount": amount, "category": category})
+    return expenses or None
+
+
+def _category(text: Optional[str]) -> Optional[str]:
+    # One word or a known category, and never a date or duration
+    if not text:
+        return "miscellaneous"
+    category = " ".join(text.lower().split())
+    words = category.split()
+    if any(word in TIME_WORDS for word in words):
+        return None
+    if len(words) > 1 and category not in KNOWN_CATEGORIES:
+        return None
+    return category
+
+
+def parse_command(text: str, current_state) -> Optional[Dict[str, Any]]:
+    """Map a user message onto a tool call when it is an unambiguous command.
+
+    Commands follow the same rules the system prompt gives the model: budgets only when
+    none is set yet, expenses and progress checks only once income and currency exist.
+
+    Args:
+        text: The user's message.
+        current_state: The current graph state.
+
+    Returns:
+        Optional[Dict[str, Any]]: {"name": tool name, "args": tool args}, or None to
+            fall back to the LLM.
+    """
+    text = text.strip()
+    if not text or len(text) > 200:
+        return None
+
+    match = USERNAME_PATTERN.match(text)
+    if match and match.group("username").lower() not in NOT_NAMES:
+        return {"name": "set_username", "args": {"username": match.group("username")}}
+
+    match = BUDGET_PATTERN.match(text)
+    if match and not current_state.income:
+        income = parse_amount(match.group("income"))
+        savings = match.group("savings")
+        savings_goal = savings if savings.endswith("%") else parse_amount(savings)
+        if income and savings_goal is not None:
+            return {"name": "budget", "args": {"income": income, "savings_goal": savings_goal, "currency": match.group("currency").upper()}}
+        return None
+
+    if not current_state.income or not current_state.currency:
+        return None
+
+    match = LOG_PATTERN.match(text)
+    if match:
+        expenses = _parse_expenses(match.group("items"))
+        if expenses:
+            return {"name": "log_expenses", "args": {"expenses": expenses, "currency": current_state.currency}}
+        return None
+
+    if ON_TRACK_PATTERN.match(text):
+        return {"name": "math_tool", "args": {"numbers": [current_state.budget_for_expenses, current_state.expense], "operation": "subtract"}}
+    return None
+
+
+def format_reply(name: str, tool_output: str, current_state, updates: Dict[str, Any]) -> str:
+    """Compose the assistant reply for a fast-path tool call.
+
+    Args:
+        name: The tool that ran.
+        tool_output: The tool message content.
+        current_state: The state before the tool ran.
+        updates: The state updates produced by the tool.
+
+    Returns:
+        str: The reply shown to the user, mirroring the model's usual phrasing.
+    """
+    username = updates.get("username") or current_state.username
+    currency = updates.get("currency") or current_state.currency
+    if name == "set_username":
+        return f"{tool_output}\nHi {username}! How can I help you today?"
+    if name == "budget":
+        return f"{tool_output}\nYour budget is now set! How can I assist you further?"
+    if name == "log_expenses":
+        spent = updates.get("expense", current_state.expense)
+        remaining = current_state.budget_for_expenses - spent
+        position = (
+            f"leaving {remaining:,.2f} {currency} of your budget" if remaining >= 0
+            else f"which is {-remaining:,.2f} {currency} over your budget"
+        )
+        return f"{tool_output}\nYou've spent {spent:,.2f} {currency} so far, {position}. What else can I help you with{', ' + username if username else ''}?"
+    remaining = float(tool_output)
+    reply = (
+        f"Your budget for expenses is {current_state.budget_for_expenses:,.2f} {currency}, and you've spent "
+        f"{current_state.expense:,.2f} {currency} so far. Result: {remaining:,.2f} {currency}\n"
+    )
+    if remaining >= 0:
+        return reply + f"You have {remaining:,.2f} {currency} left, so you're within your budget!"
+    return reply + f"You're over budget by {-remaining:,.2f} {currency}."
+
+
+class FastPathStats:
+    """Thread-safe hit/miss counters for the fast path.
+
+    Attributes:
+        hits (int): Messages answered without the LLM.
+        misses (int): Messages passed on to call_model.
+        by_tool (Dict[str, int]): Hits per tool.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.by_tool: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tool_name: Optional[str]) -> None:
+        """Record one routed message; tool_name is None for a miss."""
+        with self._lock:
+            if tool_name is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.by_tool[tool_name] = self.by_tool.get(tool_name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters, the hit rate and LLM calls avoided.
+
+        A hit saves two model calls: the one that would choose the tool and the one that
+        would phrase the reply.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "llm_calls_avoided": 2 * self.hits,
+                "by_tool": dict(self.by_tool),
+            }
+
+
+stats = FastPathStats()
@@ -1,22 +1,49 @@
-import sqlite3
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
-from langgraph.checkpoint.sqlite import SqliteSaver
 import configuration
+import context
+import db
+import fastpath
+import ledger
+import response_cache
+import retention
+import serializer
+import sharding
 import tools
 import utils
 import state
+import telemetry
 import json
-from langchain_core.messages import AIMessage, HumanMessage
+from datetime import datetime
+from uuid import uuid4
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, RemoveMessage
 
-def call_model(current_state: state.State, config: RunnableConfig) -> dict:
+def _model_inputs(current_state: state.State, config: RunnableConfig):
     configurable = configuration.Configuration.from_runnable_config(config)
     llm = configurable.get_llm()
     sys_prompt = configurable.format_system_prompt(current_state)
-    msg = llm.invoke(
-        [{"role": "system", "content": sys_prompt}, *current_state.messages],
-        {"configurable": utils.split_model_and_provider(configurable.model)}
+    messages, trim = context.assemble_context(
+        sys_prompt, current_state.messages, configurable.context_token_budget, configurable.model
     )
+    if configurable.prompt_metrics:
+        metrics = context.prefix_stats.record(configurable.thread_id, messages, configurable.model)
+        print(
+            f"[prompt] tokens={metrics['prompt_tokens']} stable_prefix={metrics['stable_prefix_tokens']} "
+            f"ratio={metrics['stable_prefix_ratio']:.2f} saved={trim['tokens_saved']} "
+            f"dropped_messages={trim['dropped_messages']}",
+            file=sys.stderr,
+        )
+    # Pass the node config through so LangGraph's "messages" stream mode sees token callbacks
+    llm_config = {**config, "configurable": utils.split_model_and_provider(configurable.model)}
+    return llm, messages, llm_config
+
+def _parse_manual_tool_call(msg):
+    # Some models emit the tool call as JSON text instead of using tool calling
     if not msg.tool_calls and msg.content:
         try:
             tool_call = json.loads(msg.content)
@@ -28,95 +55,420 @@ def call_model(current_state: state.State, config: RunnableConfig) -> dict:
                 msg.content = ""
         except json.JSONDecodeError:
             pass
+    return msg
+
+def _response_cache_key(current_state: state.State, config: RunnableConfig):
+    # Only the first model call of a turn is cacheable; calls after tool results aren't
+    configurable = configuration.Configuration.from_runnable_config(config)
+    messages = current_state.messages
+    if not configurable.response_cache or not messages:
+        return None
+    msg = messages[-1]
+    if not isinstance(msg, HumanMessage) or not isinstance(msg.content, str):
+        return None
+    # Follow-ups ("why?", "yes", "and the second one?") and replies to the assistant's
+    # question mean nothing on their own, so their key includes the recent turns
+    preceding = ""
+    asked = len(messages) > 1 and isinstance(messages[-2], AIMessage) and isinstance(messages[-2].content, str) \
+        and messages[-2].content.rstrip().endswith("?")
+    if asked or not response_cache.is_standalone(msg.content):
+        preceding = response_cache.context_digest(messages[:-1], current_state.summary)
+    return configurable.user_id, response_cache.make_key(configurable.user_id, current_state, msg.content, preceding)
+
+def _cached_reply(cache_key):
+    if cache_key is None:
+        return None
+    content = response_cache.get_cache().get(cache_key[1])
+    return None if content is None else {"messages": [AIMessage(content=content)]}
+
+def _cache_reply(cache_key, msg):
+    # Tool-calling replies must run their tools, so only plain text answers are kept
+    if cache_key is not None and not msg.tool_calls and isinstance(msg.content, str) and msg.content.strip():
+        response_cache.get_cache().put(cache_key[1], cache_key[0], msg.content)
+
+def call_model(current_state: state.State, config: RunnableConfig) -> dict:
+    cache_key = _response_cache_key(current_state, config)
+    cached = _cached_reply(cache_key)
+    if cached is not None:
+        return cached
+    llm, messages, llm_config = _model_inputs(current_state, config)
+    msg = _parse_manual_tool_call(llm.invoke(messages, llm_config))
+    _cache_reply(cache_key, msg)
+    return {"messages": [msg]}
+
+async def acall_model(current_state: state.State, config: RunnableConfig) -> dict:
+    cache_key = _response_cache_key(current_state, config)
+    cached = _cached_reply(cache_key)
+    if cached is not None:
+        return cached
+    llm, messages, llm_config = _model_inputs(current_state, config)
+    msg = _parse_manual_tool_call(await llm.ainvoke(messages, llm_config))
+    _cache_reply(cache_key, msg)
     return {"messages": [msg]}
 
+TOOLS_BY_NAME = {t.name: t for t in tools.ALL_TOOLS}
+# Arguments each tool takes from state rather than from the model (InjectedToolArg)
+INJECTED_ARGS = {
+    t.name: [name for name in t.get_input_schema().model_fields if name not in t.tool_call_schema.model_fields]
+    for t in tools.ALL_TOOLS
+}
+# Shared pool for running independent tool calls from one model turn side by side
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="aza-tool")
+
+def _tool_args(tc):
+    args = tc["args"]
+    if isinstance(args, str):
+        args = json.loads(args)
+    return args
+
+def _inject_args(tool_calls, current_state: state.State, config: RunnableConfig):
+    injected = {
+        "user_id": configuration.Configuration.from_runnable_config(config).user_id,
+        "budget_for_expenses": current_state.budget_for_expenses,
+        "currency": current_state.currency,
+        # Checkpoints that predate the ledger still carry their expenses in state
+        "expenses": None if current_state.expense_ledger else (current_state.expenses or None),
+    }
+    calls = []
+    for tc in tool_calls:
+        hidden = INJECTED_ARGS.get(tc["name"])
+        if hidden and isinstance(tc["args"], dict):
+            tc = {**tc, "args": {**tc["args"], **{name: injected[name] for name in hidden if name in injected}}}
+        calls.append(tc)
+    return calls
+
+def _run_tool(tc):
+    # Errors are returned rather than raised so every tool call still gets its ToolMessage
+    if tc["name"] not in TOOLS_BY_NAME:
+        return tc, tc["args"], ValueError(f"Unknown tool: {tc['name']}")
+    try:
+        args = _tool_args(tc)
+        return tc, args, TOOLS_BY_NAME[tc["name"]].invoke(args)
+    except Exception as e:
+        return tc, tc["args"], e
+
+async def _arun_tool(tc):
+    if tc["name"] not in TOOLS_BY_NAME:
+        return tc, tc["args"], ValueError(f"Unknown tool: {tc['name']}")
+    try:
+        args = _tool_args(tc)
+        return tc, args, await TOOLS_BY_NAME[tc["name"]].ainvoke(args)
+    except Exception as e:
+        return tc, tc["args"], e
+
+def _apply_tool_result(name, args, result, updates):
+    # Fold one tool result into the state updates and return the tool message text
+    if name == "budget":
+        updates["income"] = result["income"]
+        updates["savings"] = result["savings"]
+        updates["budget_for_expenses"] = result["budget_for_expenses"]
+        updates["currency"] = result["currency"]
+        updates["savings_goal"] = result["savings"]
+        return result["message"]
+    elif name == "log_expenses":
+        # Entries go to the ledger in _record_expenses; state keeps only aggregates
+        updates["currency"] = result["currency"]
+        return result["message"]
+    elif name == "set_username":
+        updates["username"] = args["username"]
+        return result["message"]
+    elif name == "spending_analytics":
+        return result["message"]
+    return str(result)
+
+def _record_expenses(current_state: state.State, user_id: str, batches) -> dict:
+    expense_ledger = ledger.get_ledger()
+    first_write = not current_state.expense_ledger
+    if first_write and current_state.expenses:
+        # Move expenses from checkpoints that predate the ledger
+        expense_ledger.append(user_id, current_state.expenses, current_state.currency, source="legacy")
+    now = datetime.now().isoformat(sep=" ", timespec="seconds")
+    # Keyed by tool call, so a retried step doesn't log the same expenses twice
+    for expenses, currency, call_id in batches:
+        expense_ledger.append(user_id, expenses, currency, timestamp=now, source=call_id)
+    # Checkpoints written before per-day totals existed are rebuilt from the ledger once
+    if first_write or (current_state.expense_count and not current_state.expenses_by_day):
+        aggregates = expense_ledger.aggregates(user_id)
+    else:
+        # Update the running aggregates from the new batch only
+        by_category = dict(current_state.expenses_by_category)
+        by_day = dict(current_state.expenses_by_day)
+        count = current_state.expense_count
+        for expenses, *_ in batches:
+            for e in expenses:
+                amount = float(e.get("amount") or 0.0)
+                category = ledger.normalize_category(e.get("category"))
+                day = ledger.expense_timestamp(e, now)[:10]
+                by_category[category] = by_category.get(category, 0.0) + amount
+                by_day[day] = by_day.get(day, 0.0) + amount
+                count += 1
+        aggregates = {
+            "expense": float(sum(by_category.values())),
+            "expense_count": count,
+            "expenses_by_category": by_category,
+            "expenses_by_day": by_day,
+        }
+    return {**aggregates, "expense_ledger": user_id, "expenses": []}
+
+def _tool_updates(paired_results, current_state: state.State, config: RunnableConfig):
+    # Results are merged in tool-call order, whatever order they finished in: a later
+    # call overwrites fields set by an earlier one (e.g. two budget calls), while
+    # expense batches accumulate.
+    updates = {}
+    tool_messages = []
+    expense_batches = []
+    # Tool call ids are only unique within a reply on some providers; the message id makes
+    # the ledger key unique per call while staying the same when the step is retried
+    message_id = current_state.messages[-1].id if current_state.messages else None
+    for tc, args, result in paired_results:
+        if isinstance(result, Exception):
+            tool_messages.append({"role": "tool", "content": f"Error: {result}", "tool_call_id": tc["id"]})
+            continue
+        if tc["name"] == "log_expenses":
+            expense_batches.append((result["expenses"], result["currency"], f"{message_id}:{tc['id']}"))
+        content = _apply_tool_result(tc["name"], args, result, updates)
+        tool_messages.append({"role": "tool", "content": str(content), "tool_call_id": tc["id"]})
+    user_id = configuration.Configuration.from_runnable_config(config).user_id
+    if expense_batches:
+        updates.update(_record_expenses(current_state, user_id, expense_batches))
+    if any(name in updates for name in response_cache.FINANCIAL_FIELDS):
+        # Keys already include these fields; dropping the entries just frees the space early
+        response_cache.get_cache().invalidate_user(user_id)
+    updates["messages"] = tool_messages
+    return updates
+
 def store_memory(current_state: state.State, config: RunnableConfig) -> dict:
     tool_calls = current_state.messages[-1].tool_calls
     if not tool_calls:
         return {"messages": []}
+    tool_calls = _inject_args(tool_calls, current_state, config)
 
-    results = []
-    updates = {}
-    for tc in tool_calls:
-        if tc["name"] == "budget":
-            result = tools.budget.invoke(tc["args"])
-            updates["income"] = result["income"]
-            updates["savings"] = result["savings"]
-            updates["budget_for_expenses"] = result["budget_for_expenses"]
-            updates["currency"] = result["currency"]
-            updates["savings_goal"] = result["savings"]
-            results.append(result["message"])
-        elif tc["name"] == "log_expenses":
-            args = tc["args"]
-            if isinstance(args, str):
-                args = json.loads(args)
-            result = tools.log_expenses.invoke(args)
-            updates["expense"] = result["expense"]
-            updates["expenses"] = result["expenses"]
-            updates["currency"] = result["currency"]
-            results.append(result["message"])
-        elif tc["name"] == "math_tool":
-            result = tools.math_tool.invoke(tc["args"])
-            results.append(str(result))
-        elif tc["name"] == "set_username":
-            result = tools.set_username.invoke(tc["args"])
-            updates["username"] = tc["args"]["username"]
-            results.append(result["message"])
-
-    tool_messages = [
-        {"role": "tool", "content": str(result), "tool_call_id": tc["id"]}
-        for tc, result in zip(tool_calls, results)
-    ]
-    updates["messages"] = tool_messages
+    if len(tool_calls) == 1:
+        results = [_run_tool(tool_calls[0])]
+    else:
+        # map() yields in submission order, so results stay paired with their calls
+        results = list(TOOL_EXECUTOR.map(_run_tool, tool_calls))
+    return _tool_updates(results, current_state, config)
+
+async def astore_memory(current_state: state.State, config: RunnableConfig) -> dict:
+    tool_calls = current_state.messages[-1].tool_calls
+    if not tool_calls:
+        return {"messages": []}
+    tool_calls = _inject_args(tool_calls, current_state, config)
+
+    results = await asyncio.gather(*(_arun_tool(tc) for tc in tool_calls))
+    # Ledger and response-cache writes use blocking sqlite3; keep them off the event loop,
+    # where they would stall the aiosqlite checkpointer writing the same file
+    return await asyncio.to_thread(_tool_updates, results, current_state, config)
+
+def fast_path(current_state: state.State, config: RunnableConfig) -> dict:
+    configurable = configuration.Configuration.from_runnable_config(config)
+    msg = current_state.messages[-1] if current_state.messages else None
+    if not configurable.fast_path or not isinstance(msg, HumanMessage) or not isinstance(msg.content, str):
+        return {}
+    command = fastpath.parse_command(msg.content, current_state)
+    if command is None:
+        fastpath.stats.record(None)
+        return {}
+    # Derived from the message so a retried step reuses the ledger idempotency key
+    tc = {"name": command["name"], "args": command["args"], "id": f"fast_{msg.id or uuid4().hex[:12]}"}
+    try:
+        result = TOOLS_BY_NAME[tc["name"]].invoke(tc["args"])
+    except Exception:
+        # Let the model handle anything the tool rejects
+        fastpath.stats.record(None)
+        return {}
+    fastpath.stats.record(tc["name"])
+    updates = _tool_updates([(tc, tc["args"], result)], current_state, config)
+    tool_messages = updates["messages"]
+    reply = fastpath.format_reply(tc["name"], tool_messages[0]["content"], current_state, updates)
+    # Record the same call/result/reply sequence the model would have produced
+    updates["messages"] = [AIMessage(content="", tool_calls=[tc]), *tool_messages, AIMessage(content=reply)]
     return updates
 
+def _summary_request(current_state: state.State, configurable: configuration.Configuration):
+    # Fold everything except the most recent turns into the rolling summary. The kept
+    # window starts at a user message so tool calls stay paired with their results.
+    messages = current_state.messages
+    cut = len(messages) - configurable.messages_to_keep
+    while cut > 0 and not isinstance(messages[cut], HumanMessage):
+        cut -= 1
+    if cut <= 0:
+        return None, []
+    folded = messages[:cut]
+    transcript = "\n".join(f"{msg.type}: {msg.content}" for msg in folded if msg.content)
+    if current_state.summary:
+        summary_prompt = (
+            f"This is the summary of the conversation so far:\n{current_state.summary}\n\n"
+            f"Extend the summary by taking into account these newer messages:\n{transcript}"
+        )
+    else:
+        summary_prompt = f"Summarize this conversation:\n{transcript}"
+    return summary_prompt, [RemoveMessage(id=msg.id) for msg in folded]
+
+def _summary_update(summary, removals: list) -> dict:
+    # Only drop the folded messages once they are actually in the summary; an empty
+    # reply keeps both the old summary and the history for the next attempt
+    if not isinstance(summary, str) or not summary.strip():
+        print(f"[summary] empty summary for {len(removals)} messages; keeping history", file=sys.stderr)
+        return {}
+    return {"summary": summary, "messages": removals}
+
 def summarize_conversation(current_state: state.State, config: RunnableConfig) -> dict:
     configurable = configuration.Configuration.from_runnable_config(config)
-    llm = configurable.get_llm()
-    if len(current_state.messages) > 10:
-        summary_prompt = f"Summarize this conversation:\n{[msg.content for msg in current_state.messages]}"
-        summary = llm.invoke(summary_prompt).content
-        return {"summary": summary}
-    return {}
+    summary_prompt, removals = _summary_request(current_state, configurable)
+    if not summary_prompt:
+        return {}
+    summary = configurable.get_llm(with_tools=False).invoke(summary_prompt).content
+    return _summary_update(summary, removals)
+
+async def asummarize_conversation(current_state: state.State, config: RunnableConfig) -> dict:
+    configurable = configuration.Configuration.from_runnable_config(config)
+    summary_prompt, removals = _summary_request(current_state, configurable)
+    if not summary_prompt:
+        return {}
+    summary = (await configurable.get_llm(with_tools=False).ainvoke(summary_prompt)).content
+    return _summary_update(summary, removals)
 
-def route_message(current_state: state.State) -> str:
+def route_fast_path(current_state: state.State, config: RunnableConfig) -> str:
+    if isinstance(current_state.messages[-1], HumanMessage):
+        return "call_model"
+    return route_message(current_state, config)
+
+def route_message(current_state: state.State, config: RunnableConfig) -> str:
     msg = current_state.messages[-1]
     if msg.tool_calls:
         return "store_memory"
-    elif len(current_state.messages) > 10:
+    elif len(current_state.messages) > configuration.Configuration.from_runnable_config(config).summary_trigger:
         return "summarize_conversation"
     return END
 
-# Custom function to filter messages to content only before saving
-def filter_messages_to_content(state_dict):
-    filtered_messages = [{"content": msg.content} for msg in state_dict["messages"]]
-    state_dict["messages"] = filtered_messages
-    return state_dict
-
-# override state saving
-class CustomStateGraph(StateGraph):
-    def stream(self, input, config=None, stream_mode="updates", **kwargs):
-        # Run the stream as usual
-        for output in super().stream(input, config, stream_mode, **kwargs):
-            yield output
-        # After streaming, filter messages before checkpointing
-        if self.checkpointer:
-            current_state = self.get_state(config).values
-            filtered_state = filter_messages_to_content(current_state)
-            self.checkpointer.put(config, filtered_state)
-
-# Initialize the state graph with custom class
-builder = CustomStateGraph(state.State, config_schema=configuration.Configuration)
-builder.add_node(call_model)
-builder.add_edge("__start__", "call_model")
-builder.add_node(store_memory)
-builder.add_node(summarize_conversation)
+def _visible_token(chunk, filters):
+    msg, metadata = chunk
+    if metadata.get("langgraph_node") != "call_model" or not isinstance(msg, AIMessageChunk):
+        return ""
+    if not isinstance(msg.content, str) or not msg.content or msg.tool_call_chunks:
+        return ""
+    # One filter per model call, so each reply is gated independently
+    return filters.setdefault(msg.id, utils.StreamFilter()).feed(msg.content)
+
+def _flush_filters(filters):
+    # A finished model call may still hold a partial "<think" suffix; release it before
+    # the node update so front ends print it before closing the reply
+    text = "".join(f.flush() for f in filters.values())
+    filters.clear()
+    return text
+
+def stream_with_tokens(input, config):
+    """Run the graph, yielding call_model token deltas alongside node updates.
+
+    Uses LangGraph's combined "updates" and "messages" stream modes. Token deltas from
+    `call_model` are passed through `utils.StreamFilter` so reasoning blocks and raw
+    JSON tool calls never reach the user; tool-call chunks are skipped since the node
+    still assembles the complete tool calls before routing.
+
+    Args:
+        input: The graph input, e.g. {"messages": [HumanMessage(...)]}.
+        config: The RunnableConfig with the user's thread_id.
+
+    Yields:
+        tuple: ("token", str) for visible text deltas, or ("updates", dict) for node updates.
+    """
+    filters = {}
+    for mode, chunk in get_graph().stream(input, config, stream_mode=["updates", "messages"]):
+        if mode == "updates":
+            if "call_model" in chunk and (text := _flush_filters(filters)):
+                yield "token", text
+            yield "updates", chunk
+        elif text := _visible_token(chunk, filters):
+            yield "token", text
+    if text := _flush_filters(filters):
+        yield "token", text
+
+async def astream_with_tokens(input, config, compiled_graph):
+    """Async counterpart of `stream_with_tokens` for a graph built by `async_graph`."""
+    filters = {}
+    async for mode, chunk in compiled_graph.astream(input, config, stream_mode=["updates", "messages"]):
+        if mode == "updates":
+            if "call_model" in chunk and (text := _flush_filters(filters)):
+                yield "token", text
+            yield "updates", chunk
+        elif text := _visible_token(chunk, filters):
+            yield "token", text
+    if text := _flush_filters(filters):
+        yield "token", text
+
+# Initialize the state graph
+builder = StateGraph(state.State, config_schema=configuration.Configuration)
+# Each node carries a sync and an async implementation; invoke/stream use the former,
+# ainvoke/astream the latter. telemetry.timed_node records wall time, tokens and tools.
+builder.add_node("fast_path", telemetry.timed_node("fast_path", fast_path))
+builder.add_edge("__start__", "fast_path")
+builder.add_conditional_edges("fast_path", route_fast_path, ["call_model", "summarize_conversation", END])
+builder.add_node("call_model", telemetry.timed_node("call_model", call_model, acall_model))
+builder.add_node("store_memory", telemetry.timed_node("store_memory", store_memory, astore_memory))
+builder.add_node("summarize_conversation", telemetry.timed_node("summarize_conversation", summarize_conversation, asummarize_conversation))
 builder.add_conditional_edges("call_model", route_message, ["store_memory", "summarize_conversation", END])
 builder.add_edge("store_memory", "call_model")
 builder.add_edge("summarize_conversation", END)
 
-# Set up SQLite checkpointing
-conn = sqlite3.connect("memory_agent.db", check_same_thread=False)
-checkpointer = SqliteSaver(conn)
-graph = builder.compile(checkpointer=checkpointer)
-graph.name = "AzaMan"
\ No newline at end of file
+# Served with the node timings at /metrics (AZA_METRICS_PORT)
+telemetry.register_stats("context", context.stats.stats)
+telemetry.register_stats("fastpath", fastpath.stats.stats)
+telemetry.register_stats("response_cache", lambda: response_cache.get_cache().stats())
+
+# The compiled graph, its checkpointer and background jobs are created by get_graph on
+# first use, so importing this module doesn't open the database or start threads.
+# `graph.graph`, `graph.checkpointer`, `graph.compaction_jobs` and `graph.metrics_server`
+# still work as module attributes through __getattr__.
+_LAZY_ATTRIBUTES = ("graph", "checkpointer", "compaction_jobs", "metrics_server")
+_graph_lock = threading.Lock()
+
+def get_graph():
+    """Return the process-wide compiled graph, compiling it on first call.
+
+    Returns:
+        CompiledStateGraph: The graph compiled with the SQLite (or sharded) checkpointer.
+    """
+    with _graph_lock:
+        if "graph" not in globals():
+            # Set up SQLite checkpointing; messages are compacted inside the one checkpoint write per step.
+            # Reads use per-thread WAL connections; writes share one serialized writer with the ledger.
+            # CHECKPOINT_SHARDS spreads threads over several files by user; CHECKPOINT_BACKEND=memory for tests.
+            saver = telemetry.instrument_checkpointer(sharding.from_env(db.DEFAULT_DB_PATH, serde=serializer.CompactSerializer()))
+            compiled = builder.compile(checkpointer=saver)
+            compiled.name = "AzaMan"
+            globals().update(
+                checkpointer=saver,
+                # Prune old checkpoints in the background when CHECKPOINT_KEEP_LAST/MAX_AGE_DAYS is set, one job per shard file
+                compaction_jobs=[job for job in map(retention.start_from_env, sharding.sqlite_shards(saver)) if job],
+                # Serve Prometheus metrics when AZA_METRICS_PORT is set
+                metrics_server=telemetry.start_from_env(),
+                graph=compiled,
+            )
+        return globals()["graph"]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        get_graph()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@asynccontextmanager
+async def async_graph(db_path: str = db.DEFAULT_DB_PATH):
+    """Compile the graph against aiosqlite-backed AsyncSqliteSavers (one per shard).
+
+    Use with `ainvoke`/`astream` to drive many conversations concurrently from one
+    event loop without blocking on provider calls or the SQLite file.
+
+    Args:
+        db_path: Path to the SQLite checkpoint database (the base name when sharded).
+
+    Yields:
+        CompiledStateGraph: The graph compiled with the async checkpointer.
+    """
+    async with sharding.async_from_env(db_path, serde=serializer.CompactSerializer()) as saver:
+        async_checkpointer = telemetry.instrument_checkpointer(saver, telemetry.ASYNC_CHECKPOINT_METHODS)
+        compiled = builder.compile(checkpointer=async_checkpointer)
+        compiled.name = "AzaMan"
+        yield compiled
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""Expense ledger for Aza Man financial assistant.
+
+This module stores logged expenses in an append-only SQLite table indexed by user and
+date, so the graph state only needs to carry a pointer to the user's ledger and a few
+running aggregates instead of the full expense list.
+
+Ledger writes happen outside the checkpoint write, so a graph step that fails after
+logging and is retried would log the same expenses again. Rows written for a tool call
+carry a `source` key ("<message_id>:<tool_call_id>:<position>", since some providers
+only number tool calls within one reply) with a unique index per user, and re-appending
+them is a no-op. Legacy expense lists migrated from a checkpoint use "legacy:<position>".
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import db
+
+DEFAULT_DB_PATH = "memory_agent.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expense_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_expense_ledger_user_time ON expense_ledger (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_expense_ledger_user_category ON expense_ledger (user_id, category);
+"""
+
+# Created after the source column is ensured, since ledgers from before it lack the column
+SOURCE_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_expense_ledger_user_source ON expense_ledger (user_id, source)
+    WHERE source IS NOT NULL;
+"""
+
+
+def normalize_category(category: Optional[str]) -> str:
+    """Return the canonical (lower-cased) category name used in the ledger."""
+    return str(category or "miscellaneous").lower()
+
+
+def expense_timestamp(expense: Dict[str, Any], default: str) -> str:
+    """Return the expense's date as an ISO timestamp, falling back to default."""
+    date = expense.get("date")
+    if not date:
+        return default
+    try:
+        return datetime.fromisoformat(str(date)).isoformat(sep=" ", timespec="seconds")
+    except ValueError:
+        return default
+
+
+class ExpenseLedger:
+    """Append-only, indexed store of user expenses.
+
+    Attributes:
+        db_path (str): Path to the SQLite database holding the ledger table.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        # Shares the file's writer lock with the checkpointer; reads use per-thread connections
+        self._db = db.get_manager(db_path)
+        with self._db.write() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(expense_ledger)")}
+            if "source" not in columns:
+                conn.execute("ALTER TABLE expense_ledger ADD COLUMN source TEXT")
+            conn.executescript(SOURCE_INDEX)
+
+    def append(self, user_id: str, expenses: Sequence[Dict[str, Any]], currency: str,
+               timestamp: Optional[str] = None, source: Optional[str] = None) -> int:
+        """Append expenses for a user in a single transaction.
+
+        Args:
+            user_id: The user the expenses belong to.
+            expenses: Expense dictionaries with "amount", "category" and optional "date".
+            currency: The currency code (e.g., "NGN").
+            timestamp: ISO timestamp for expenses without a "date"; defaults to now.
+            source: Idempotency key, e.g. the tool_call_id that logged the expenses. Rows
+                already written for this key and user are skipped.
+
+        Returns:
+            int: Number of rows written.
+        """
+        default = timestamp or datetime.now().isoformat(sep=" ", timespec="seconds")
+        rows = [
+            (
+                user_id,
+                expense_timestamp(e, default),
+                float(e.get("amount") or 0.0),
+                normalize_category(e.get("category")),
+                e.get("currency") or currency or "",
+            )
+            for e in expenses
+        ]
+        if source is None:
+            return self.append_rows(rows)
+        if not rows:
+            return 0
+        with self._db.write() as conn:
+            cur = conn.executemany(
+                "INSERT OR IGNORE INTO expense_ledger (user_id, timestamp, amount, category, currency, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [row + (f"{source}:{i}",) for i, row in enumerate(rows)],
+            )
+        return cur.rowcount
+
+    def append_rows(self, rows: Sequence[Tuple[str, str, float, str, str]]) -> int:
+        """Append pre-normalized (user_id, timestamp, amount, category, currency) rows.
+
+        Args:
+            rows: Rows to insert in one transaction.
+
+        Returns:
+            int: Number of rows written.
+        """
+        if not rows:
+            return 0
+        with self._db.write() as conn:
+            conn.executemany(
+                "INSERT INTO expense_ledger (user_id, timestamp, amount, category, currency) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        with self._db.read() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def aggregates(self, user_id: str) -> Dict[str, Any]:
+        """Return the running aggregates kept in graph state for a user.
+
+        Args:
+            user_id: The user to aggregate.
+
+        Returns:
+            Dict[str, Any]: "expense" (total), "expense_count", "expenses_by_category" and
+                "expenses_by_day".
+        """
+        by_category = self.category_totals(user_id)
+        count = self._query("SELECT COUNT(*) FROM expense_ledger WHERE user_id = ?", (user_id,))[0][0]
+        return {
+            "expense": float(sum(by_category.values())),
+            "expense_count": int(count),
+            "expenses_by_category": by_category,
+            "expenses_by_day": dict(self.daily_totals(user_id)),
+        }
+
+    def category_totals(self, user_id: str) -> Dict[str, float]:
+        """Return total spend per category for a user, largest first."""
+        rows = self._query(
+            "SELECT category, SUM(amount) FROM expense_ledger WHERE user_id = ? GROUP BY category ORDER BY 2 DESC",
+            (user_id,),
+        )
+        return {category: float(total) for category, total in rows}
+
+    def daily_totals(self, user_id: str) -> List[Tuple[str, float]]:
+        """Return (YYYY-MM-DD, total) pairs for a user in date order."""
+        rows = self._query(
+            "SELECT substr(timestamp, 1, 10) AS day, SUM(amount) FROM expense_ledger "
+            "WHERE user_id = ? GROUP BY day ORDER BY day",
+            (user_id,),
+        )
+        return [(day, float(total)) for day, total in rows]
+
+    def day_category_totals(self, user_id: str) -> List[Tuple[str, str, float, int]]:
+        """Return (YYYY-MM-DD, category, total, count) for each day and category a user spent on."""
+        rows = self._query(
+            "SELECT substr(timestamp, 1, 10) AS day, category, SUM(amount), COUNT(*) FROM expense_ledger "
+            "WHERE user_id = ? GROUP BY day, category",
+            (user_id,),
+        )
+        return [(day, category, float(total), int(count)) for day, category, total, count in rows]
+
+    def iter_expenses(self, user_id: str, since: Optional[str] = None,
+                      batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield a user's expenses in insertion order without loading them all at once.
+
+        Args:
+            user_id: The user whose expenses to read.
+            since: Optional ISO timestamp lower bound (inclusive).
+            batch_size: Rows fetched per round trip.
+
+        Yields:
+            Dict[str, Any]: Expense with "timestamp", "amount", "category" and "currency".
+        """
+        last_id = 0
+        while True:
+            sql = "SELECT id, timestamp, amount, category, currency FROM expense_ledger WHERE user_id = ? AND id > ?"
+            params: Tuple[Any, ...] = (user_id, last_id)
+            if since:
+                sql += " AND timestamp >= ?"
+                params += (since,)
+            rows = self._query(sql + " ORDER BY id LIMIT ?", params + (batch_size,))
+            if not rows:
+                return
+            for row_id, timestamp, amount, category, currency in rows:
+                yield {"timestamp": timestamp, "amount": amount, "category": category, "currency": currency}
+            last_id = rows[-1][0]
+
+
+_ledger: Optional[ExpenseLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> ExpenseLedger:
+    """Return the process-wide ledger, opening it on first use.
+
+    Returns:
+        ExpenseLedger: The shared ledger backed by memory_agent.db.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = ExpenseLedger()
+        return _ledger
+
+
+def set_ledger(expense_ledger: Optional[ExpenseLedger]) -> Optional[ExpenseLedger]:
+    """Replace the process-wide ledger, e.g. with one on a benchmark or test database.
+
+    Args:
+        expense_ledger: The ledger `get_ledger` should return; None reopens memory_agent.db
+            on next use.
+
+    Returns:
+        Optional[ExpenseLedger]: The previous ledger, so callers can restore it.
+    """
+    global _ledger
+    with _ledger_lock:
+        previous, _ledger = _ledger, expense_ledger
+        return previous
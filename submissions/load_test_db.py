@@ -0,0 +1,166 @@
+"""Concurrent checkpoint load test for Aza Man's SQLite storage.
+
+Simulates N Streamlit sessions hammering one database file: every turn a session reads
+its latest checkpoint a few times (page reruns), writes a new checkpoint plus its pending
+writes, and appends an expense to the ledger. The "shared" mode reproduces the original
+setup (one checkpointer connection behind one lock, a separate ledger connection); the
+"pooled" mode uses `db.ConnectionManager` (WAL, busy timeout, per-thread readers, one
+serialized writer); the "sharded" mode spreads the sessions' threads over --shards pooled
+files with `sharding.ShardedCheckpointer`. Throughput, latency percentiles and "database
+is locked" errors are printed per mode.
+
+Usage:
+    python load_test_db.py                      # 50 sessions, 10 s per mode
+    python load_test_db.py --sessions 100 --duration 20 --modes pooled
+    python load_test_db.py --modes pooled,sharded --shards 4
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+import db
+import ledger
+import serializer
+import sharding
+import telemetry
+
+
+def _payload(turn: int) -> Dict[str, Any]:
+    messages = []
+    for i in range(turn * 2, turn * 2 + 20):
+        messages.append(HumanMessage(content=f"I spent {1_000 + i:,} on food ({i}).", id=f"h{i}") if i % 2 == 0
+                        else AIMessage(content=f"Logged! Total so far: {1_000 * i:,.2f} NGN.", id=f"a{i}"))
+    return {"messages": messages, "username": "Blaq", "income": 750_000.0, "currency": "NGN", "expense": 1_000.0 * turn}
+
+
+class Session(threading.Thread):
+    """One simulated user session running turns until the deadline."""
+
+    def __init__(self, index: int, saver: SqliteSaver, expense_ledger: Any, deadline: float, reads: int):
+        super().__init__(name=f"session-{index}", daemon=True)
+        self.user_id = f"load{index:02d}"
+        self.saver = saver
+        self.expense_ledger = expense_ledger
+        self.deadline = deadline
+        self.reads = reads
+        self.read_seconds: List[float] = []
+        self.write_seconds: List[float] = []
+        self.turns = 0
+        self.locked = 0
+        self.errors = 0
+
+    def run(self):
+        config = {"configurable": {"thread_id": f"thread_{self.user_id}", "checkpoint_ns": ""}}
+        metadata = {"source": "loop", "step": 0, "writes": {}, "parents": {}}
+        while time.monotonic() < self.deadline:
+            try:
+                for _ in range(self.reads):
+                    start = time.perf_counter()
+                    self.saver.get_tuple(config)
+                    self.read_seconds.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                checkpoint = empty_checkpoint()
+                checkpoint["channel_values"] = _payload(self.turns)
+                checkpoint["channel_versions"] = {key: self.turns + 1 for key in checkpoint["channel_values"]}
+                saved = self.saver.put(config, checkpoint, {**metadata, "step": self.turns}, checkpoint["channel_versions"])
+                self.saver.put_writes(saved, [("messages", [AIMessage(content="ok")])], task_id=f"task{self.turns}")
+                self.expense_ledger.append(self.user_id, [{"amount": 1_000, "category": "food"}], "NGN")
+                self.write_seconds.append(time.perf_counter() - start)
+                self.turns += 1
+            except sqlite3.OperationalError as e:
+                if "locked" in str(e):
+                    self.locked += 1
+                else:
+                    self.errors += 1
+
+
+class _SeparateLedger:
+    """The pre-manager ledger: its own connection and lock on the same file."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(ledger.SCHEMA)
+
+    def append(self, user_id, expenses, currency):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO expense_ledger (user_id, timestamp, amount, category, currency) VALUES (?, datetime('now'), ?, ?, ?)",
+                [(user_id, e["amount"], e["category"], currency) for e in expenses],
+            )
+
+
+def run_mode(mode: str, sessions: int, duration: float, reads: int, workdir: str, shards: int = 4) -> Dict[str, float]:
+    path = os.path.join(workdir, f"load_{mode}.db")
+    if mode == "shared":
+        saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False), serde=serializer.CompactSerializer())
+        expense_ledger = _SeparateLedger(path)
+        saver.setup()
+    elif mode == "sharded":
+        savers = [db.checkpointer(p, serde=serializer.CompactSerializer()) for p in sharding.shard_paths(path, shards)]
+        for s in savers:
+            s.setup()
+        saver = sharding.ShardedCheckpointer(savers)
+        expense_ledger = ledger.ExpenseLedger(path)
+    else:
+        saver = db.checkpointer(path, serde=serializer.CompactSerializer())
+        expense_ledger = ledger.ExpenseLedger(path)
+        saver.setup()
+    deadline = time.monotonic() + duration
+    threads = [Session(i, saver, expense_ledger, deadline, reads) for i in range(sessions)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    reads_s = sorted(s for t in threads for s in t.read_seconds)
+    writes_s = sorted(s for t in threads for s in t.write_seconds)
+    turns = sum(t.turns for t in threads)
+    return {
+        "turns": turns,
+        "turns_per_s": turns / elapsed,
+        "reads_per_s": len(reads_s) / elapsed,
+        "read_p50_ms": telemetry.percentile(reads_s, 0.5) * 1000,
+        "read_p95_ms": telemetry.percentile(reads_s, 0.95) * 1000,
+        "write_p50_ms": telemetry.percentile(writes_s, 0.5) * 1000,
+        "write_p95_ms": telemetry.percentile(writes_s, 0.95) * 1000,
+        "locked": sum(t.locked for t in threads),
+        "errors": sum(t.errors for t in threads),
+        "min_turns": min((t.turns for t in threads), default=0),
+        "median_turns": statistics.median([t.turns for t in threads]) if threads else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test concurrent checkpoint reads/writes on SQLite")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent simulated sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each mode")
+    parser.add_argument("--reads", type=int, default=3, help="Checkpoint reads per turn (page reruns)")
+    parser.add_argument("--modes", default="shared,pooled", help="Comma-separated modes: shared, pooled, sharded")
+    parser.add_argument("--shards", type=int, default=4, help="Checkpoint files for the sharded mode")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aza_load_")
+    print(f"{args.sessions} sessions, {args.duration:.0f} s per mode, {args.reads} reads per turn ({workdir})")
+    print(f"{'mode':>8} | {'turns/s':>8} | {'reads/s':>8} | {'read p50/p95 ms':>16} | {'write p50/p95 ms':>17} | {'locked':>6} | {'errors':>6} | {'min/median turns':>16}")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        r = run_mode(mode, args.sessions, args.duration, args.reads, workdir, args.shards)
+        print(f"{mode:>8} | {r['turns_per_s']:>8.1f} | {r['reads_per_s']:>8.1f} | "
+              f"{r['read_p50_ms']:>7.2f}/{r['read_p95_ms']:<8.2f} | {r['write_p50_ms']:>7.2f}/{r['write_p95_ms']:<9.2f} | "
+              f"{r['locked']:>6} | {r['errors']:>6} | {r['min_turns']:>7}/{r['median_turns']:<8}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
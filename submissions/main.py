@@ -1,4 +1,6 @@
+import asyncio
 import os
+import sys
 from uuid import uuid4
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
@@ -9,7 +11,7 @@ load_dotenv()
 
 def print_assistant_response(updates):
     """Helper function to print assistant responses from stream updates."""
-    if "messages" in updates and updates["messages"]:
+    if updates and updates.get("messages"):
         msg = updates["messages"][-1]
         # Handle both dictionary and message object formats
         if isinstance(msg, dict):
@@ -26,8 +28,11 @@ def print_assistant_response(updates):
                 if final_answer:
                     print(f"Aza Man: {final_answer}")
 
-def main() -> None:
-    """Run the Aza Man financial assistant interactively."""
+def start_session() -> dict:
+    """Turn on LangSmith tracing and return the run config for this user's thread.
+
+    Uses USER_ID from the environment, or prompts for it.
+    """
     unique_id = uuid4().hex[:8]
     os.environ["LANGCHAIN_TRACING_V2"] = "true"
     os.environ["LANGCHAIN_PROJECT"] = f"Aza Man - {unique_id}"
@@ -38,10 +43,13 @@ def main() -> None:
         user_id = input("Enter your User ID (e.g., jake00): ").strip() or "user1"
 
     thread_id = f"thread_{user_id}"
-    config = {"configurable": {"user_id": user_id, "thread_id": thread_id}}
+    return {"configurable": {"user_id": user_id, "thread_id": thread_id}}
 
-    # Load initial state from checkpointer
-    initial_state = graph.graph.get_state(config).values or {}
+def conversation(initial_state: dict):
+    """Greet the user, then yield the graph input for each line they type until "exit".
+
+    Shared by `main` and `amain`, which only differ in how they run each turn.
+    """
     print("Welcome to Aza Man, your AI financial assistant!")
     if initial_state.get("username"):
         print(f"Welcome back, {initial_state['username']}! Your last session data is loaded.")
@@ -54,12 +62,55 @@ def main() -> None:
         user_input = input("You: ")
         if user_input.lower().strip() == "exit":
             print("Goodbye!")
-            break
+            return
+        yield {"messages": [HumanMessage(content=user_input)]}
+
+class ReplyPrinter:
+    """Print one turn's stream events, writing reply tokens as they arrive."""
+
+    def __init__(self):
+        self.streaming = False
 
-        # Stream user input and print assistant responses
-        for chunk in graph.graph.stream({"messages": [HumanMessage(content=user_input)]}, config, stream_mode="updates"):
-            for node, updates in chunk.items():
-                print_assistant_response(updates)
+    def __call__(self, mode, chunk):
+        if mode == "token":
+            if not self.streaming:
+                print("Aza Man: ", end="", flush=True)
+                self.streaming = True
+            print(chunk, end="", flush=True)
+            return
+        for node, updates in chunk.items():
+            if node == "call_model" and self.streaming:
+                # Reply was already streamed; just finish the line
+                print()
+                self.streaming = False
+                continue
+            print_assistant_response(updates)
+
+def main() -> None:
+    """Run the Aza Man financial assistant interactively."""
+    config = start_session()
+    for turn in conversation(graph.graph.get_state(config).values or {}):
+        printer = ReplyPrinter()
+        for mode, chunk in graph.stream_with_tokens(turn, config):
+            printer(mode, chunk)
+
+async def amain() -> None:
+    """Run the Aza Man financial assistant interactively on the async graph.
+
+    Uses the aiosqlite-backed checkpointer and async nodes from `graph.async_graph`, so
+    the same event loop can serve other conversations while this one waits on the provider.
+    """
+    config = await asyncio.to_thread(start_session)
+    async with graph.async_graph() as async_graph:
+        turns = conversation((await async_graph.aget_state(config)).values or {})
+        # Read input off the event loop so other conversations keep running
+        while (turn := await asyncio.to_thread(next, turns, None)) is not None:
+            printer = ReplyPrinter()
+            async for mode, chunk in graph.astream_with_tokens(turn, config, async_graph):
+                printer(mode, chunk)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--async" in sys.argv:
+        asyncio.run(amain())
+    else:
+        main()
\ No newline at end of file
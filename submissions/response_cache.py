@@ -0,0 +1,232 @@
+"""Response cache for Aza Man financial assistant.
+
+This module lets `graph.call_model` skip the LLM when a user repeats a question ("am I on
+track?", "how much have I spent?") and none of the financial fields the answer depends on
+have changed. Entries are keyed on a hash of those fields plus the normalized message;
+follow-ups that only make sense in context ("why?", "and the second one?", "yes") also
+key on a digest of the summary and the recent turns, so they never pick up a reply
+given in another conversation. Entries expire after a TTL, are evicted LRU-first, and
+can optionally be persisted to SQLite so they survive restarts. `graph.store_memory`
+drops a user's entries whenever a tool changes one of the fields.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import db
+
+# State fields a cached answer depends on; a change to any of them invalidates the entry
+FINANCIAL_FIELDS = (
+    "username", "income", "budget_for_expenses", "expense", "expense_count",
+    "savings_goal", "savings", "currency",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_response_cache_user ON response_cache (user_id);
+"""
+
+
+# Recent messages a follow-up's key depends on
+CONTEXT_MESSAGES = 4
+
+_FOLLOW_UP_START = re.compile(
+    r"^(?:why|and|but|so|also|then|what about|how about|what if|ok|okay|yes|yeah|yep|no|nope|sure|go ahead|do it|same)\b"
+)
+_FOLLOW_UP_REFERENCE = re.compile(
+    r"\b(?:it|its|that|this|those|these|them|they|one|ones|there|above|before|previous|other|"
+    r"first|second|third|last|again|instead|else)\b"
+)
+
+
+def normalize_message(text: str) -> str:
+    """Lower-case text, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+
+def is_standalone(message: str) -> bool:
+    """Return whether a message can be answered without the conversation before it.
+
+    Very short messages, messages opening like a follow-up ("why", "and ...", "yes") and
+    messages referring back ("that one", "the second", "again") are treated as follow-ups.
+    """
+    text = normalize_message(message)
+    if len(text.split()) < 3:
+        return False
+    return not (_FOLLOW_UP_START.match(text) or _FOLLOW_UP_REFERENCE.search(text))
+
+
+def context_digest(messages, summary: str = "") -> str:
+    """Hash the rolling summary and the last CONTEXT_MESSAGES messages before the current one."""
+    recent = [(m.type, m.content if isinstance(m.content, str) else str(m.content)) for m in messages[-CONTEXT_MESSAGES:]]
+    payload = json.dumps([summary or "", recent], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_key(user_id: str, current_state, message: str, preceding: str = "") -> str:
+    """Hash the user, their financial fields and the normalized message into a cache key.
+
+    Args:
+        user_id: The user the answer is for.
+        current_state: The graph state whose financial fields the answer depends on.
+        message: The user's message.
+        preceding: Earlier context the answer also depends on, e.g. the `context_digest`
+            of the turns a follow-up refers to.
+
+    Returns:
+        str: A hex digest identifying the cached answer.
+    """
+    fields = {name: getattr(current_state, name, None) for name in FINANCIAL_FIELDS}
+    payload = json.dumps(
+        [user_id, fields, normalize_message(message), preceding], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of assistant replies, optionally backed by SQLite.
+
+    Attributes:
+        max_size (int): Maximum in-memory entries before LRU eviction.
+        ttl (float): Seconds an entry stays valid.
+        db_path (Optional[str]): SQLite file for persistent entries, or None.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that went to the LLM.
+        invalidations (int): Entries dropped because a user's financial state changed.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 600.0, db_path: Optional[str] = None):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.db_path = db_path
+        self.hits = self.misses = self.invalidations = 0
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        # Bumped by invalidate_user, so put can tell that its SQLite row raced an invalidation
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = db.get_manager(db_path)
+            with self._db.write() as conn:
+                conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for key, or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        # Read the persistent copy without holding the lock, so other sessions' lookups
+        # don't queue behind this one's SQLite read
+        from_db = False
+        if entry is None and self._db is not None:
+            with self._db.read() as conn:
+                row = conn.execute(
+                    "SELECT user_id, content, created FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+            entry, from_db = (tuple(row), True) if row else (None, False)
+        with self._lock:
+            if entry is not None and now - entry[2] <= self.ttl:
+                if from_db:
+                    self._entries.setdefault(key, entry)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._entries.pop(key, None)
+            self.misses += 1
+        if entry is not None and self._db is not None:
+            with self._db.write() as conn:
+                conn.execute("DELETE FROM response_cache WHERE key = ? AND created <= ?", (key, entry[2]))
+        return None
+
+    def put(self, key: str, user_id: str, content: str) -> None:
+        """Store a reply for key.
+
+        The SQLite write happens outside the lock; if the user is invalidated while it
+        runs, the row is deleted again so it can't outlive the invalidation.
+        """
+        entry = (user_id, content, time.time())
+        with self._lock:
+            generation = self._generations.get(user_id, 0)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        if self._db is None:
+            return
+        with self._db.write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, user_id, content, created) VALUES (?, ?, ?, ?)",
+                (key, *entry),
+            )
+        with self._lock:
+            stale = self._generations.get(user_id, 0) != generation
+        if stale:
+            with self._db.write() as conn:
+                conn.execute("DELETE FROM response_cache WHERE key = ? AND created <= ?", (key, entry[2]))
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached reply for a user.
+
+        Returns:
+            int: Number of in-memory entries removed.
+        """
+        now = time.time()
+        with self._lock:
+            stale = [k for k, entry in self._entries.items() if entry[0] == user_id]
+            for k in stale:
+                del self._entries[k]
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.invalidations += len(stale)
+        if self._db is not None:
+            with self._db.write() as conn:
+                conn.execute("DELETE FROM response_cache WHERE user_id = ? AND created <= ?", (user_id, now))
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/invalidation counters and the in-memory size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide cache, configured from the environment on first use.
+
+    Reads RESPONSE_CACHE_SIZE (default 256), RESPONSE_CACHE_TTL in seconds (default 600)
+    and RESPONSE_CACHE_DB (SQLite path; unset keeps the cache in memory only).
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                max_size=int(os.environ.get("RESPONSE_CACHE_SIZE", "256")),
+                ttl=float(os.environ.get("RESPONSE_CACHE_TTL", "600")),
+                db_path=os.environ.get("RESPONSE_CACHE_DB") or None,
+            )
+        return _cache
@@ -0,0 +1,240 @@
+"""Checkpoint retention for Aza Man financial assistant.
+
+This module bounds the size of memory_agent.db by pruning old LangGraph checkpoints per
+thread (keep the newest N and/or drop those older than a cutoff), removing the pending
+writes that belonged to them, and reclaiming the freed pages with VACUUM. It works on
+the raw `checkpoints`/`writes` tables created by `SqliteSaver`, so it can run in-process
+alongside the graph or from the `compact_db.py` CLI without loading any LLM clients.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# 100-ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+@dataclass
+class RetentionPolicy:
+    """How many checkpoints to keep per thread.
+
+    The newest checkpoint of every thread is always kept, whatever the policy says.
+
+    Attributes:
+        keep_last (Optional[int]): Keep at most this many checkpoints per thread.
+        max_age_days (Optional[float]): Drop checkpoints older than this many days.
+    """
+    keep_last: Optional[int] = 20
+    max_age_days: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["RetentionPolicy"]:
+        """Build a policy from CHECKPOINT_KEEP_LAST / CHECKPOINT_MAX_AGE_DAYS.
+
+        Returns:
+            Optional[RetentionPolicy]: The policy, or None if neither variable is set.
+        """
+        keep_last = os.environ.get("CHECKPOINT_KEEP_LAST")
+        max_age_days = os.environ.get("CHECKPOINT_MAX_AGE_DAYS")
+        if not keep_last and not max_age_days:
+            return None
+        return cls(
+            keep_last=int(keep_last) if keep_last else None,
+            max_age_days=float(max_age_days) if max_age_days else None,
+        )
+
+
+def checkpoint_id_before(unix_seconds: float) -> str:
+    """Return the smallest uuid6 checkpoint id created at unix_seconds.
+
+    LangGraph checkpoint ids are uuid6 values whose string form sorts by creation time,
+    so ids comparing lower than this one are older than the given moment.
+
+    Args:
+        unix_seconds: The cutoff time as a Unix timestamp.
+
+    Returns:
+        str: A uuid6 string usable in `checkpoint_id < ?` comparisons.
+    """
+    timestamp = int(unix_seconds * 10_000_000) + _UUID_EPOCH_OFFSET
+    uuid_int = ((timestamp >> 12) & 0xFFFFFFFFFFFF) << 80
+    uuid_int |= (timestamp & 0x0FFF) << 64
+    uuid_int |= 0x6 << 76  # version 6
+    uuid_int |= 0x8000 << 48  # RFC 4122 variant
+    return str(uuid.UUID(int=uuid_int))
+
+
+def _has_checkpoint_tables(conn: sqlite3.Connection) -> bool:
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('checkpoints', 'writes')"
+    ).fetchall()
+    return len(rows) == 2
+
+
+def thread_stats(conn: sqlite3.Connection, thread_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Report checkpoint counts and stored bytes per thread.
+
+    Args:
+        conn: Connection to the checkpoint database.
+        thread_id: Restrict the report to one thread.
+
+    Returns:
+        List[Dict[str, Any]]: One row per thread with "thread_id", "checkpoints",
+            "checkpoint_bytes", "writes" and "write_bytes", largest first.
+    """
+    if not _has_checkpoint_tables(conn):
+        return []
+    where, params = ("WHERE thread_id = ?", (thread_id,)) if thread_id else ("", ())
+    checkpoints = conn.execute(
+        f"SELECT thread_id, COUNT(*), SUM(IFNULL(LENGTH(checkpoint), 0) + IFNULL(LENGTH(metadata), 0)) "
+        f"FROM checkpoints {where} GROUP BY thread_id",
+        params,
+    ).fetchall()
+    writes = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            f"SELECT thread_id, COUNT(*), SUM(IFNULL(LENGTH(value), 0)) FROM writes {where} GROUP BY thread_id",
+            params,
+        )
+    }
+    report = [
+        {
+            "thread_id": tid,
+            "checkpoints": count,
+            "checkpoint_bytes": size or 0,
+            "writes": writes.get(tid, (0, 0))[0],
+            "write_bytes": writes.get(tid, (0, 0))[1] or 0,
+        }
+        for tid, count, size in checkpoints
+    ]
+    return sorted(report, key=lambda r: r["checkpoint_bytes"] + r["write_bytes"], reverse=True)
+
+
+def compact(conn: sqlite3.Connection, policy: RetentionPolicy,
+            thread_id: Optional[str] = None) -> Dict[str, int]:
+    """Delete checkpoints outside the retention policy and their pending writes.
+
+    Args:
+        conn: Connection to the checkpoint database.
+        policy: Which checkpoints to keep.
+        thread_id: Restrict compaction to one thread.
+
+    Returns:
+        Dict[str, int]: Number of deleted "checkpoints" and "writes".
+    """
+    if not _has_checkpoint_tables(conn):
+        return {"checkpoints": 0, "writes": 0}
+    cutoff = None
+    if policy.max_age_days is not None:
+        cutoff = checkpoint_id_before(time.time() - policy.max_age_days * 86400)
+    keep_last = max(1, policy.keep_last) if policy.keep_last is not None else None
+
+    where, params = ("WHERE thread_id = ?", (thread_id,)) if thread_id else ("", ())
+    threads = conn.execute(f"SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints {where}", params).fetchall()
+    deleted_checkpoints = 0
+    with conn:
+        for tid, ns in threads:
+            newest = conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (tid, ns, (keep_last or 1) - 1),
+            ).fetchone()
+            conditions, args = [], []
+            if keep_last and newest:
+                conditions.append("checkpoint_id < ?")
+                args.append(newest[0])
+            if cutoff:
+                conditions.append("checkpoint_id < ?")
+                args.append(cutoff)
+            if not conditions:
+                continue
+            cursor = conn.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND ({' OR '.join(conditions)}) "
+                "AND checkpoint_id != (SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+                (tid, ns, *args, tid, ns),
+            )
+            deleted_checkpoints += cursor.rowcount
+        cursor = conn.execute(
+            "DELETE FROM writes WHERE NOT EXISTS (SELECT 1 FROM checkpoints c WHERE c.thread_id = writes.thread_id "
+            "AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id)"
+        )
+        deleted_writes = cursor.rowcount
+    return {"checkpoints": deleted_checkpoints, "writes": deleted_writes}
+
+
+def vacuum(conn: sqlite3.Connection) -> None:
+    """Rebuild the database file to return freed pages to the filesystem."""
+    conn.commit()
+    conn.execute("VACUUM")
+    # In WAL mode the rebuilt pages land in the -wal file; fold them back and truncate it
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def db_size(path: str) -> int:
+    """Return the on-disk size of a SQLite database including its WAL file."""
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+class CompactionJob:
+    """Background thread that periodically applies a retention policy to a SqliteSaver.
+
+    Attributes:
+        checkpointer: The `SqliteSaver` whose connection and lock are used.
+        policy (RetentionPolicy): Which checkpoints to keep.
+        interval (float): Seconds between compaction runs.
+        last_result (Dict[str, int]): Deletion counts from the most recent run.
+    """
+
+    def __init__(self, checkpointer, policy: RetentionPolicy, interval: float = 3600.0):
+        self.checkpointer = checkpointer
+        self.policy = policy
+        self.interval = interval
+        self.last_result: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-compaction", daemon=True)
+
+    def run_once(self) -> Dict[str, int]:
+        """Compact now, holding the checkpointer's lock so graph writes don't interleave."""
+        with self.checkpointer.lock:
+            self.last_result = compact(self.checkpointer.conn, self.policy)
+        return self.last_result
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"Checkpoint compaction failed: {e}")
+
+    def start(self) -> "CompactionJob":
+        """Start the background thread and return self."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Signal the background thread to exit after its current run."""
+        self._stop.set()
+
+
+def start_from_env(checkpointer) -> Optional[CompactionJob]:
+    """Start a CompactionJob if a retention policy is configured in the environment.
+
+    Reads CHECKPOINT_KEEP_LAST, CHECKPOINT_MAX_AGE_DAYS and CHECKPOINT_COMPACT_INTERVAL
+    (seconds, default 3600).
+
+    Args:
+        checkpointer: The `SqliteSaver` used by the graph.
+
+    Returns:
+        Optional[CompactionJob]: The running job, or None if retention is not configured.
+    """
+    policy = RetentionPolicy.from_env()
+    if policy is None:
+        return None
+    interval = float(os.environ.get("CHECKPOINT_COMPACT_INTERVAL", "3600"))
+    return CompactionJob(checkpointer, policy, interval).start()
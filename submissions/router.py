@@ -0,0 +1,385 @@
+"""Latency-aware provider router for Aza Man financial assistant.
+
+This module provides the chat model behind `provider="router"`. It keeps rolling
+time-to-first-token and error statistics for each configured backend (e.g. groq,
+together, openrouter), sends each request to the fastest healthy one, and optionally
+hedges: if the first backend hasn't produced a token within its p95 latency, the next
+best backend is started too and whichever answers first wins. Backends that keep failing
+are taken out of rotation by a per-backend circuit breaker, and tenacity backs off and
+retries when every backend failed at once.
+"""
+
+import asyncio
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel, agenerate_from_stream, generate_from_stream
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from tenacity import AsyncRetrying, Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+import telemetry
+
+# Assumed time to first token for a backend with no samples yet
+DEFAULT_LATENCY = 1.0
+# Hedge delay bounds, in seconds
+MIN_HEDGE_DELAY = 0.25
+DEFAULT_HEDGE_DELAY = 2.0
+# Samples needed before the observed p95 replaces DEFAULT_HEDGE_DELAY
+MIN_SAMPLES = 5
+
+# Runs backend streams so a hedged request can race them; losers stop at their next chunk
+ROUTER_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="aza-router")
+
+
+class AllBackendsFailed(RuntimeError):
+    """Raised when no backend produced a response for a request."""
+
+
+class BackendHealth:
+    """Rolling latency/error statistics and circuit breaker for one backend.
+
+    The circuit opens after `failure_threshold` consecutive failures. After `cooldown`
+    seconds it lets a single probe request through (half-open); the probe's outcome
+    closes or re-opens it.
+
+    Attributes:
+        name (str): Backend name ("provider:model").
+        failure_threshold (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds an open circuit waits before probing.
+    """
+
+    def __init__(self, name: str, window: int = 50, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Return whether a request may be sent (closed, or open long enough to probe)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            return not self._probing and time.monotonic() - self._opened_at >= self.cooldown
+
+    def start(self) -> None:
+        """Mark a request as sent; on a half-open circuit this claims the probe."""
+        with self._lock:
+            if self._opened_at is not None:
+                self._probing = True
+
+    def record_success(self, first_token_seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(first_token_seconds)
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            if self._probing or self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the q-quantile of recent time-to-first-token, or None without samples."""
+        with self._lock:
+            samples = sorted(self._latencies)
+        return telemetry.percentile(samples, q) if samples else None
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def score(self) -> float:
+        """Lower is better: median latency, penalized by the recent error rate."""
+        p50 = self.quantile(0.5)
+        return (DEFAULT_LATENCY if p50 is None else p50) * (1 + 4 * self.error_rate())
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            enough = len(self._latencies) >= MIN_SAMPLES
+        return max(MIN_HEDGE_DELAY, self.quantile(0.95)) if enough else DEFAULT_HEDGE_DELAY
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = "closed" if self._opened_at is None else ("half-open" if self._probing else "open")
+            samples = len(self._latencies)
+        return {
+            "state": state,
+            "samples": samples,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "error_rate": self.error_rate(),
+        }
+
+
+_health: Dict[str, BackendHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_health(name: str) -> BackendHealth:
+    """Return the process-wide health tracker for a backend, creating it on first use."""
+    with _health_lock:
+        if name not in _health:
+            _health[name] = BackendHealth(
+                name,
+                failure_threshold=int(os.environ.get("ROUTER_FAILURE_THRESHOLD", "3")),
+                cooldown=float(os.environ.get("ROUTER_COOLDOWN", "30")),
+            )
+        return _health[name]
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Return a health snapshot for every backend seen so far."""
+    with _health_lock:
+        trackers = list(_health.values())
+    return {tracker.name: tracker.snapshot() for tracker in trackers}
+
+
+def parse_backends(spec: str, providers: Sequence[str]) -> List[Tuple[str, str]]:
+    """Parse "provider:model,provider:model" into (provider, model) pairs.
+
+    Args:
+        spec: Comma-separated backends; the model part may itself contain colons.
+        providers: Provider names the router may use.
+
+    Returns:
+        List[Tuple[str, str]]: The backends in priority order.
+
+    Raises:
+        ValueError: If an entry is malformed or names an unsupported provider.
+    """
+    backends = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        provider, _, model = item.partition(":")
+        provider = provider.strip().lower()
+        if not model or provider not in providers:
+            raise ValueError(f"Invalid router backend '{item}'. Use provider:model with provider in {', '.join(providers)}.")
+        backends.append((provider, model.strip()))
+    return backends
+
+
+class RouterChatModel(BaseChatModel):
+    """Chat model that routes each request to the fastest healthy backend.
+
+    Attributes:
+        backends (List[Tuple[str, Any]]): (name, chat model) pairs in priority order.
+        hedge (bool): Start the next best backend if the first is slower than its p95.
+        max_rounds (int): Attempts, with exponential backoff, when every backend fails.
+    """
+    backends: List[Tuple[str, Any]]
+    hedge: bool = True
+    max_rounds: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "RouterChatModel":
+        return self.model_copy(update={"backends": [(name, llm.bind_tools(tools, **kwargs)) for name, llm in self.backends]})
+
+    def _ranked(self) -> List[Tuple[str, Any]]:
+        ranked = [(name, llm) for name, llm in self.backends if get_health(name).available()]
+        if not ranked:
+            raise AllBackendsFailed("All LLM backends are unavailable (circuits open).")
+        # sorted() is stable, so configuration order breaks ties between unmeasured backends
+        return sorted(ranked, key=lambda backend: get_health(backend[0]).score())
+
+    def _race(self, messages: List[BaseMessage], **kwargs: Any) -> Iterator[AIMessageChunk]:
+        pending = self._ranked()
+        events: "queue.Queue[Tuple[str, Optional[AIMessageChunk], Optional[BaseException], bool]]" = queue.Queue()
+        winner: List[Optional[str]] = [None]
+        closed = threading.Event()
+
+        def pump(name: str, llm: Any) -> None:
+            health = get_health(name)
+            start = time.perf_counter()
+            first = True
+            try:
+                for chunk in llm.stream(messages, **kwargs):
+                    if first:
+                        health.record_success(time.perf_counter() - start)
+                        first = False
+                    if closed.is_set() or winner[0] not in (None, name):
+                        return
+                    events.put((name, chunk, None, False))
+                events.put((name, None, None, True))
+            except Exception as e:
+                if first:
+                    health.record_failure()
+                events.put((name, None, e, True))
+
+        running = set()
+
+        def launch() -> Optional[float]:
+            # Returns the hedge deadline for the launched backend, if one is left to hedge with
+            name, llm = pending.pop(0)
+            get_health(name).start()
+            running.add(name)
+            ROUTER_EXECUTOR.submit(pump, name, llm)
+            return time.monotonic() + get_health(name).hedge_delay() if self.hedge and pending else None
+
+        deadline = launch()
+        last_error: Optional[BaseException] = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    name, chunk, error, done = events.get(timeout=timeout)
+                except queue.Empty:
+                    # Hedge: the first backend is slower than usual, start the next one too
+                    deadline = None
+                    if pending:
+                        launch()
+                    continue
+                if winner[0] is None:
+                    if error is not None:
+                        # Failed before producing anything; fail over to the next backend
+                        running.discard(name)
+                        last_error = error
+                        if pending and (not running or deadline is None):
+                            # The replacement is hedged afresh only if it runs alone
+                            hedge_at = launch()
+                            deadline = hedge_at if len(running) == 1 else None
+                        if not running:
+                            raise AllBackendsFailed(f"All LLM backends failed: {last_error}") from last_error
+                        continue
+                    winner[0] = name
+                    deadline = None
+                if name != winner[0]:
+                    continue
+                if error is not None:
+                    raise error
+                if done:
+                    return
+                yield chunk
+        finally:
+            closed.set()
+
+    async def _arace(self, messages: List[BaseMessage], **kwargs: Any) -> AsyncIterator[AIMessageChunk]:
+        pending = self._ranked()
+        events: "asyncio.Queue[Tuple[str, Optional[AIMessageChunk], Optional[BaseException], bool]]" = asyncio.Queue()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def pump(name: str, llm: Any) -> None:
+            health = get_health(name)
+            start = time.perf_counter()
+            first = True
+            try:
+                async for chunk in llm.astream(messages, **kwargs):
+                    if first:
+                        health.record_success(time.perf_counter() - start)
+                        first = False
+                    await events.put((name, chunk, None, False))
+                await events.put((name, None, None, True))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if first:
+                    health.record_failure()
+                await events.put((name, None, e, True))
+
+        def launch() -> Optional[float]:
+            name, llm = pending.pop(0)
+            get_health(name).start()
+            tasks[name] = asyncio.create_task(pump(name, llm))
+            return time.monotonic() + get_health(name).hedge_delay() if self.hedge and pending else None
+
+        deadline = launch()
+        winner: Optional[str] = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    name, chunk, error, done = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    deadline = None
+                    if pending:
+                        launch()
+                    continue
+                if winner is None:
+                    if error is not None:
+                        tasks.pop(name, None)
+                        if pending and (not tasks or deadline is None):
+                            hedge_at = launch()
+                            deadline = hedge_at if len(tasks) == 1 else None
+                        if not tasks:
+                            raise AllBackendsFailed(f"All LLM backends failed: {error}") from error
+                        continue
+                    winner = name
+                    deadline = None
+                    for other, task in tasks.items():
+                        if other != name:
+                            task.cancel()
+                if name != winner:
+                    continue
+                if error is not None:
+                    raise error
+                if done:
+                    return
+                yield chunk
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def _retrying(self, cls):
+        return cls(
+            stop=stop_after_attempt(max(1, self.max_rounds)),
+            wait=wait_exponential(multiplier=0.5, max=4),
+            retry=retry_if_exception_type(AllBackendsFailed),
+            reraise=True,
+        )
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        def start():
+            # Only the wait for the first chunk is retried, so nothing is emitted twice
+            race = self._race(messages, stop=stop, **kwargs)
+            return next(race, None), race
+
+        first, race = self._retrying(Retrying)(start)
+        if first is None:
+            return
+        for chunk in itertools.chain([first], race):
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        async def start():
+            race = self._arace(messages, stop=stop, **kwargs)
+            return await race.__anext__(), race
+
+        try:
+            first, race = await self._retrying(AsyncRetrying)(start)
+        except StopAsyncIteration:
+            return
+        chunk = first
+        while True:
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+            try:
+                chunk = await race.__anext__()
+            except StopAsyncIteration:
+                return
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return generate_from_stream(self._stream(messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop=stop, run_manager=run_manager, **kwargs))
@@ -0,0 +1,221 @@
+"""Offline scripted chat model for Aza Man financial assistant.
+
+This module provides the chat model behind `provider="scripted"`: it replays recorded
+assistant responses and tool calls instead of calling a provider, so the full graph
+(tools, checkpointing, streaming, UI plumbing) can run and be benchmarked on a box with
+no network access. Responses are looked up by the latest user message, which keeps replay
+deterministic across threads and sessions; optional artificial latency models provider
+round trips and token streaming.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+# Reply for messages the script doesn't cover, including summarization requests
+DEFAULT_REPLY = "I'm running in offline scripted mode and have no recorded answer for that."
+
+# The conversation from create_eval_dataset.py, with the tool calls that produce each output
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {"input": "Hi Aza man.", "responses": [
+        {"content": "Hello there! Since this is a new session, may I have your preferred name?"},
+    ]},
+    {"input": "Sure, call me Blaq.", "responses": [
+        {"tool_calls": [{"name": "set_username", "args": {"username": "Blaq"}}]},
+        {"content": "Hi Blaq! How can I help you today?"},
+    ]},
+    {"input": "I want to log my expenses first.", "responses": [
+        {"content": "That's great, Blaq. But we should create a budget for you before we log those expenses. Kindly provide your income, how much you wish to save from that, and which currency I should log everything in."},
+    ]},
+    {"input": "I earn 750k monthly. I wish to save at least 40%.", "responses": [
+        {"content": "Okay, and what is your currency? (e.g., USD, EUR, NGN)"},
+    ]},
+    {"input": "NGN", "responses": [
+        {"tool_calls": [{"name": "budget", "args": {"income": 750000, "savings_goal": "40%", "currency": "NGN"}}]},
+        {"content": "Your budget is now set! How can I assist you further?"},
+    ]},
+    {"input": "I want to log my expenses first.", "responses": [
+        {"content": "Great! Now that your budget is set up, let's log your expenses. Please provide a list of your expenses including the amount and category for each."},
+    ]},
+    {"input": "Oh I have quite a lot o. I spent 80k last Tuesday. I spent 67k yesterday morning. I just spent 35,000 not long ago. I think that’s it for now.", "responses": [
+        {"content": "Hi Blaq! I’ve got your expenses: 80,000.00 NGN, 67,000.00 NGN, and 35,000.00 NGN. Could you specify the categories for each (e.g., 'Food', 'Transportation')? For now, I’ll prepare to log them as 'miscellaneous' with the 'log_expenses' tool if you don’t provide categories next."},
+    ]},
+    {"input": "I don’t remember the categories.", "responses": [
+        {"tool_calls": [{"name": "log_expenses", "args": {"expenses": [
+            {"amount": 80000, "category": "miscellaneous"},
+            {"amount": 67000, "category": "miscellaneous"},
+            {"amount": 35000, "category": "miscellaneous"},
+        ], "currency": "NGN"}}]},
+        {"content": "All set! What else can I help you with, Blaq?"},
+    ]},
+    {"input": "Wait. Am I on track?", "responses": [
+        {"tool_calls": [{"name": "math_tool", "args": {"numbers": [450000, 182000], "operation": "subtract"}}]},
+        {"content": "Hi Blaq! Let’s check if you’re on track. Your budget for expenses is 450,000.00 NGN, and you’ve spent 182,000.00 NGN so far. You have 268,000.00 NGN left, so you’re well within your budget! How can I assist you next?"},
+    ]},
+]
+
+
+def _normalize(text: Any) -> str:
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+
+def load_script(path: Optional[str]) -> List[Dict[str, Any]]:
+    """Load a recorded script from a JSON file, or return DEFAULT_SCRIPT.
+
+    Args:
+        path: JSON file holding a list of {"input": str, "responses": [...]} turns, where
+            each response has "content" and/or "tool_calls"; None or "default" selects
+            the built-in conversation.
+
+    Returns:
+        List[Dict[str, Any]]: The script turns.
+    """
+    if not path or path == "default":
+        return DEFAULT_SCRIPT
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays a recorded conversation.
+
+    The turn is the first recorded turn with the latest user message's input that comes
+    after the thread's current script position, wrapping to the first match once the
+    script is exhausted. The position is a per-thread cursor (the thread id comes from
+    the run metadata LangGraph adds), so repeated inputs stay in step after summarization
+    trims the history; without a thread id it is rebuilt from the user messages still in
+    the history. The step within the turn is how many assistant messages follow the user
+    message, so a tool-calling turn replays its tool call first and its final reply after
+    the tool result.
+
+    Attributes:
+        script (List[Dict[str, Any]]): Recorded turns.
+        latency (float): Seconds to wait before each response.
+        token_delay (float): Seconds between streamed chunks.
+        chunk_size (int): Characters per streamed chunk.
+    """
+    script: List[Dict[str, Any]] = DEFAULT_SCRIPT
+    latency: float = 0.0
+    token_delay: float = 0.0
+    chunk_size: int = 4
+    _cursors: Dict[str, Tuple[str, int]] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        # Tool calls come from the script, so there is nothing to bind
+        return self
+
+    def _next_turn(self, text: str, position: int) -> Optional[int]:
+        matches = [i for i, turn in enumerate(self.script) if _normalize(turn["input"]) == text]
+        if not matches:
+            return None
+        return next((i for i in matches if i > position), matches[0])
+
+    def _position(self, history: Sequence[BaseMessage]) -> int:
+        # Replay the user messages still in the history to find where the script stands
+        position = -1
+        for m in history:
+            if isinstance(m, HumanMessage):
+                index = self._next_turn(_normalize(m.content), position)
+                position = position if index is None else index
+        return position
+
+    def _turn(self, messages: List[BaseMessage], last_human: int, thread_id: Optional[str]) -> Optional[int]:
+        text = _normalize(messages[last_human].content)
+        key = messages[last_human].id or f"{last_human}:{text}"
+        with self._lock:
+            cursor = self._cursors.get(thread_id) if thread_id is not None else None
+            if cursor and cursor[0] == key:
+                # Later steps of the same turn (after a tool result)
+                return cursor[1]
+            index = self._next_turn(text, cursor[1] if cursor else self._position(messages[:last_human]))
+            if index is not None and thread_id is not None:
+                self._cursors[thread_id] = (key, index)
+        return index
+
+    def _response(self, messages: List[BaseMessage], run_manager=None) -> AIMessage:
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=None)
+        if last_human is None:
+            return AIMessage(content=DEFAULT_REPLY)
+        thread_id = (getattr(run_manager, "metadata", None) or {}).get("thread_id")
+        index = self._turn(messages, last_human, None if thread_id is None else str(thread_id))
+        if index is None:
+            return AIMessage(content=DEFAULT_REPLY)
+        responses = self.script[index]["responses"]
+        step = sum(1 for m in messages[last_human + 1:] if m.type == "ai")
+        if step >= len(responses):
+            # The recorded turn ended in a tool call; close it instead of looping
+            return AIMessage(content=DEFAULT_REPLY)
+        response = responses[step]
+        tool_calls = [
+            {"name": tc["name"], "args": tc["args"], "id": f"scripted_{uuid4().hex[:12]}_{i}"}
+            for i, tc in enumerate(response.get("tool_calls", []))
+        ]
+        return AIMessage(content=response.get("content", ""), tool_calls=tool_calls)
+
+    def _chunks(self, msg: AIMessage) -> Iterator[AIMessageChunk]:
+        if msg.tool_calls:
+            yield AIMessageChunk(content="", tool_call_chunks=[
+                {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                for i, tc in enumerate(msg.tool_calls)
+            ])
+            return
+        for start in range(0, len(msg.content), self.chunk_size):
+            yield AIMessageChunk(content=msg.content[start:start + self.chunk_size])
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._response(messages, run_manager))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._response(messages, run_manager))])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._response(messages, run_manager)):
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+            time.sleep(self.token_delay)
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._response(messages, run_manager)):
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+            await asyncio.sleep(self.token_delay)
+
+
+def from_env(script_path: Optional[str] = None) -> ScriptedChatModel:
+    """Build a ScriptedChatModel with latency settings from the environment.
+
+    Reads SCRIPTED_LATENCY (seconds before each response, default 0) and
+    SCRIPTED_TOKEN_DELAY (seconds between streamed chunks, default 0).
+
+    Args:
+        script_path: JSON script to replay, or None/"default" for DEFAULT_SCRIPT.
+
+    Returns:
+        ScriptedChatModel: The configured model.
+    """
+    return ScriptedChatModel(
+        script=load_script(script_path),
+        latency=float(os.environ.get("SCRIPTED_LATENCY", "0")),
+        token_delay=float(os.environ.get("SCRIPTED_TOKEN_DELAY", "0")),
+    )
@@ -0,0 +1,42 @@
+"""Checkpoint serializer for Aza Man financial assistant.
+
+This module compacts graph state as part of the single checkpoint write LangGraph already
+performs: provider response metadata (model info, logprobs, raw usage blocks) is dropped
+from stored messages while their types, content, tool calls and ids are kept, so restored
+conversations still round-trip as proper AIMessage/HumanMessage/ToolMessage objects.
+"""
+
+from typing import Any, Tuple
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+
+def compact_value(value: Any) -> Any:
+    """Return value with response metadata stripped from any messages it holds.
+
+    Handles a single message, a list of messages (channel values and pending writes) and
+    a checkpoint dict with "channel_values". Anything else is returned unchanged.
+
+    Args:
+        value: The object about to be serialized.
+
+    Returns:
+        Any: A compacted copy, or value itself when there is nothing to strip.
+    """
+    if isinstance(value, BaseMessage):
+        return value.model_copy(update={"response_metadata": {}}) if value.response_metadata else value
+    if isinstance(value, list):
+        if any(isinstance(v, BaseMessage) and v.response_metadata for v in value):
+            return [compact_value(v) for v in value]
+        return value
+    if isinstance(value, dict) and "channel_values" in value:
+        return {**value, "channel_values": {k: compact_value(v) for k, v in value["channel_values"].items()}}
+    return value
+
+
+class CompactSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer that compacts messages before they are written to a checkpoint."""
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        return super().dumps_typed(compact_value(obj))
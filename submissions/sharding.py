@@ -0,0 +1,237 @@
+"""Sharded checkpoint storage for Aza Man financial assistant.
+
+All conversation threads used to live in one memory_agent.db, so one heavy user's writes
+and a growing checkpoints table slowed every other user's `get_state`. This module spreads
+threads over N checkpointers picked by a stable hash of the user id (threads are named
+`thread_{user_id}`), behind one `BaseCheckpointSaver` so the graph, app and CLIs don't
+change. Each SQLite shard is its own file with its own writer, so write throughput scales
+with the shard count.
+
+Environment:
+    CHECKPOINT_BACKEND: "sqlite" (default) or "memory" (in-process, for tests).
+    CHECKPOINT_SHARDS: Number of shards (default 1, i.e. just memory_agent.db).
+
+Changing CHECKPOINT_SHARDS moves most users to a different shard, so their earlier
+threads stop being found; pick the count before users accumulate history.
+"""
+
+import hashlib
+import itertools
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import aiosqlite
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+import db
+
+THREAD_PREFIX = "thread_"
+
+_memory_savers: Dict[int, List[MemorySaver]] = {}
+
+
+def user_key(thread_id: str) -> str:
+    """Return the user id a thread belongs to (the thread id itself if not `thread_<user>`)."""
+    thread_id = str(thread_id)
+    return thread_id[len(THREAD_PREFIX):] if thread_id.startswith(THREAD_PREFIX) else thread_id
+
+
+def shard_index(thread_id: str, shards: int) -> int:
+    """Return the shard for a thread; stable across processes, unlike hash()."""
+    if shards <= 1:
+        return 0
+    digest = hashlib.blake2b(user_key(thread_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def shard_paths(db_path: str = db.DEFAULT_DB_PATH, shards: int = 1) -> List[str]:
+    """Return the SQLite file for each shard; a single shard keeps db_path itself.
+
+    Args:
+        db_path: Base database path, e.g. "memory_agent.db".
+        shards: Number of shards.
+
+    Returns:
+        List[str]: One path per shard, e.g. memory_agent.shard0.db, memory_agent.shard1.db.
+    """
+    if shards <= 1:
+        return [db_path]
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.shard{i}{ext or '.db'}" for i in range(shards)]
+
+
+class ShardedCheckpointer(BaseCheckpointSaver):
+    """Checkpointer that routes each thread to one of several underlying checkpointers.
+
+    Calls for a thread go to `shards[shard_index(thread_id, len(shards))]`. Listing without
+    a thread id merges every shard, newest checkpoint first.
+
+    Attributes:
+        shards (List[BaseCheckpointSaver]): The underlying checkpointers.
+    """
+
+    def __init__(self, shards: Sequence[BaseCheckpointSaver], *, serde=None):
+        if not shards:
+            raise ValueError("ShardedCheckpointer needs at least one shard.")
+        super().__init__(serde=serde or shards[0].serde)
+        self.shards = list(shards)
+
+    @property
+    def config_specs(self):
+        return self.shards[0].config_specs
+
+    def shard_for(self, config: RunnableConfig) -> BaseCheckpointSaver:
+        """Return the checkpointer holding the config's thread."""
+        return self.shards[shard_index(config["configurable"]["thread_id"], len(self.shards))]
+
+    def _targets(self, config: Optional[RunnableConfig]) -> List[BaseCheckpointSaver]:
+        if config and (config.get("configurable") or {}).get("thread_id") is not None:
+            return [self.shard_for(config)]
+        return self.shards
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.shard_for(config).get_tuple(config)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        streams = [shard.list(config, filter=filter, before=before, limit=limit) for shard in self._targets(config)]
+        # Sorted in memory like alist: savers only order checkpoints within a thread (MemorySaver
+        # lists threads in insertion order), so the streams can't be merged lazily
+        merged = streams[0] if len(streams) == 1 else sorted(
+            itertools.chain(*streams), key=lambda t: t.config["configurable"]["checkpoint_id"], reverse=True
+        )
+        for i, item in enumerate(merged):
+            if limit is not None and i >= limit:
+                return
+            yield item
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        return self.shard_for(config).put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        return self.shard_for(config).put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        return self.shards[shard_index(thread_id, len(self.shards))].delete_thread(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self.shard_for(config).aget_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        # Shards are listed one after another and merged in memory; fine for admin listings
+        items = []
+        for shard in self._targets(config):
+            items += [item async for item in shard.alist(config, filter=filter, before=before, limit=limit)]
+        items.sort(key=lambda t: t.config["configurable"]["checkpoint_id"], reverse=True)
+        for item in items[:limit] if limit is not None else items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await self.shard_for(config).aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        return await self.shard_for(config).aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await self.shards[shard_index(thread_id, len(self.shards))].adelete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel) -> str:
+        return self.shards[0].get_next_version(current, channel)
+
+
+def _memory(shards: int, serde=None) -> "ShardedCheckpointer":
+    # One in-process store per shard count, shared by the sync and async graphs
+    if shards not in _memory_savers:
+        _memory_savers[shards] = [MemorySaver(serde=serde) for _ in range(shards)]
+    return ShardedCheckpointer(_memory_savers[shards], serde=serde)
+
+
+def _backend() -> Tuple[str, int]:
+    backend = os.environ.get("CHECKPOINT_BACKEND", "sqlite").strip().lower()
+    if backend not in ("sqlite", "memory"):
+        raise ValueError(f"Unsupported CHECKPOINT_BACKEND: {backend}. Use 'sqlite' or 'memory'.")
+    return backend, max(1, int(os.environ.get("CHECKPOINT_SHARDS", "1")))
+
+
+def from_env(db_path: str = db.DEFAULT_DB_PATH, serde=None) -> BaseCheckpointSaver:
+    """Build the graph's checkpointer from CHECKPOINT_BACKEND and CHECKPOINT_SHARDS.
+
+    With the defaults this is a single `PooledSqliteSaver` on db_path, exactly as before;
+    otherwise a ShardedCheckpointer over pooled SQLite files or in-memory savers.
+
+    Args:
+        db_path: Base SQLite path.
+        serde: Serializer for checkpoint blobs.
+
+    Returns:
+        BaseCheckpointSaver: The checkpointer.
+
+    Raises:
+        ValueError: If CHECKPOINT_BACKEND is not "sqlite" or "memory".
+    """
+    backend, shards = _backend()
+    if backend == "memory":
+        return _memory(shards, serde)
+    savers = [db.checkpointer(path, serde=serde) for path in shard_paths(db_path, shards)]
+    return savers[0] if shards == 1 else ShardedCheckpointer(savers, serde=serde)
+
+
+@asynccontextmanager
+async def async_from_env(db_path: str = db.DEFAULT_DB_PATH, serde=None) -> AsyncIterator[BaseCheckpointSaver]:
+    """Async counterpart of `from_env`: one aiosqlite-backed AsyncSqliteSaver per shard.
+
+    Args:
+        db_path: Base SQLite path.
+        serde: Serializer for checkpoint blobs.
+
+    Yields:
+        BaseCheckpointSaver: The checkpointer; its connections close on exit.
+    """
+    backend, shards = _backend()
+    if backend == "memory":
+        yield _memory(shards, serde)
+        return
+    async with AsyncExitStack() as stack:
+        savers = []
+        for path in shard_paths(db_path, shards):
+            async_conn = await stack.enter_async_context(aiosqlite.connect(path, timeout=db.BUSY_TIMEOUT))
+            await async_conn.execute(f"PRAGMA busy_timeout = {int(db.BUSY_TIMEOUT * 1000)}")
+            # Same journal mode as db.connect, so the ledger's sync writer and this
+            # connection don't block each other's readers
+            await async_conn.execute("PRAGMA journal_mode = WAL")
+            savers.append(AsyncSqliteSaver(async_conn, serde=serde))
+        yield savers[0] if shards == 1 else ShardedCheckpointer(savers, serde=serde)
+
+
+def latest_checkpoint_id(checkpointer: BaseCheckpointSaver, config: RunnableConfig) -> Optional[str]:
+    """Return the id of the thread's newest checkpoint, as cheaply as the backend allows.
+
+    SQLite shards answer with one indexed SELECT; other savers fall back to `get_tuple`.
+
+    Args:
+        checkpointer: The graph's checkpointer, sharded or not.
+        config: Config with the thread id.
+
+    Returns:
+        Optional[str]: The checkpoint id, or None if the thread has no checkpoints.
+    """
+    saver = checkpointer.shard_for(config) if isinstance(checkpointer, ShardedCheckpointer) else checkpointer
+    if hasattr(saver, "latest_checkpoint_id"):
+        return saver.latest_checkpoint_id(config)
+    checkpoint = saver.get_tuple(config)
+    return checkpoint.config["configurable"]["checkpoint_id"] if checkpoint else None
+
+
+def sqlite_shards(checkpointer: BaseCheckpointSaver) -> List[BaseCheckpointSaver]:
+    """Return the SQLite-backed savers behind a checkpointer (for retention jobs)."""
+    savers = checkpointer.shards if isinstance(checkpointer, ShardedCheckpointer) else [checkpointer]
+    return [saver for saver in savers if hasattr(saver, "conn")]
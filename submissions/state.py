@@ -14,7 +14,11 @@ class State:
     income: float = 0.0
     budget_for_expenses: float = 0.0
     expense: float = 0.0
-    expenses: List[Dict[str, Any]] = field(default_factory=list)
+    expenses: List[Dict[str, Any]] = field(default_factory=list)  # legacy; entries now live in the ledger
+    expense_ledger: str = ""  # ledger key (user_id) holding this user's expenses
+    expense_count: int = 0
+    expenses_by_category: Dict[str, float] = field(default_factory=dict)
+    expenses_by_day: Dict[str, float] = field(default_factory=dict)  # "YYYY-MM-DD" -> total
     savings_goal: float = 0.0
     savings: float = 0.0
     currency: str = ""
@@ -26,6 +30,14 @@ class State:
             self.messages = []
         if not isinstance(self.expenses, list):
             self.expenses = []
+        if not isinstance(self.expense_ledger, str):
+            self.expense_ledger = ""
+        if not isinstance(self.expense_count, int):
+            self.expense_count = 0
+        if not isinstance(self.expenses_by_category, dict):
+            self.expenses_by_category = {}
+        if not isinstance(self.expenses_by_day, dict):
+            self.expenses_by_day = {}
         if not isinstance(self.username, str):
             self.username = ""
         if not isinstance(self.income, float):
@@ -0,0 +1,329 @@
+"""Latency and token-usage instrumentation for Aza Man financial assistant.
+
+This module times every graph node and checkpointer call, records the prompt/completion
+tokens reported by the provider and the tools each node touched, and exposes the result
+three ways: in-process percentiles (`recorder.stats()`), a Prometheus text rendering
+(`prometheus_text()`, optionally served over HTTP, together with counters other modules
+hand to `register_stats`), and a JSONL event log that `telemetry_report.py` summarizes
+offline.
+
+Environment:
+    AZA_TELEMETRY_JSONL: Append every event to this JSONL file.
+    AZA_METRICS_PORT: Serve Prometheus text on this port at /metrics.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tracers.context import register_configure_hook
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Durations kept per metric for percentiles; older samples roll off
+WINDOW = 2048
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Return the nearest-rank q-quantile of already sorted values (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-q * len(sorted_values) // 1)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class UsageHandler(BaseCallbackHandler):
+    """Callback handler summing token usage across the LLM calls made inside one node."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        prompt = completion = 0
+        found = False
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(generation.message, "usage_metadata", None) if isinstance(generation, ChatGeneration) else None
+                if usage:
+                    found = True
+                    prompt += usage.get("input_tokens", 0)
+                    completion += usage.get("output_tokens", 0)
+        if not found:
+            # Providers that only report usage in llm_output (OpenAI-style token_usage)
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt = usage.get("prompt_tokens", 0)
+            completion = usage.get("completion_tokens", 0)
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+
+
+_usage_var: contextvars.ContextVar[Optional[UsageHandler]] = contextvars.ContextVar("aza_usage", default=None)
+# Attach the active node's UsageHandler to every callback manager configured under it
+register_configure_hook(_usage_var, inheritable=True)
+
+
+class Recorder:
+    """Thread-safe store of timing events with rolling per-metric percentiles.
+
+    Attributes:
+        jsonl_path (Optional[str]): File each event is appended to, or None.
+        counts (Dict[str, int]): Events per metric ("node:call_model", "checkpoint:put", ...).
+        seconds (Dict[str, float]): Total wall time per metric.
+        prompt_tokens (Dict[str, int]): Prompt tokens per node.
+        completion_tokens (Dict[str, int]): Completion tokens per node.
+        tools (Dict[str, Dict[str, int]]): Tool calls requested (call_model, fast_path) or
+            executed (store_memory) per node and tool name.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.prompt_tokens: Dict[str, int] = {}
+        self.completion_tokens: Dict[str, int] = {}
+        self.tools: Dict[str, Dict[str, int]] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: str, seconds: float, thread_id: Optional[str] = None,
+               prompt_tokens: int = 0, completion_tokens: int = 0,
+               tools: Iterable[str] = ()) -> Dict[str, Any]:
+        """Record one timed call and return the event written to the JSONL log."""
+        metric = f"{kind}:{name}"
+        tools = list(tools)
+        event = {"ts": time.time(), "kind": kind, "name": name, "seconds": seconds, "thread_id": thread_id}
+        if prompt_tokens or completion_tokens:
+            event.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if tools:
+            event["tools"] = tools
+        with self._lock:
+            self.counts[metric] = self.counts.get(metric, 0) + 1
+            self.seconds[metric] = self.seconds.get(metric, 0.0) + seconds
+            self._samples.setdefault(metric, deque(maxlen=WINDOW)).append(seconds)
+            if prompt_tokens or completion_tokens:
+                self.prompt_tokens[name] = self.prompt_tokens.get(name, 0) + prompt_tokens
+                self.completion_tokens[name] = self.completion_tokens.get(name, 0) + completion_tokens
+            for tool in tools:
+                by_tool = self.tools.setdefault(name, {})
+                by_tool[tool] = by_tool.get(tool, 0) + 1
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event) + "\n")
+        return event
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return count, total and p50/p95/p99 seconds per metric over the rolling window."""
+        with self._lock:
+            snapshot = {metric: sorted(samples) for metric, samples in self._samples.items()}
+            counts, totals = dict(self.counts), dict(self.seconds)
+        return {
+            metric: {
+                "count": counts[metric],
+                "seconds": totals[metric],
+                **{f"p{int(q * 100)}": percentile(samples, q) for q in QUANTILES},
+            }
+            for metric, samples in snapshot.items()
+        }
+
+    def tokens(self) -> Dict[str, Dict[str, int]]:
+        """Return {"prompt": {node: n}, "completion": {node: n}}, copied under the lock."""
+        with self._lock:
+            return {"prompt": dict(self.prompt_tokens), "completion": dict(self.completion_tokens)}
+
+
+recorder = Recorder(jsonl_path=os.environ.get("AZA_TELEMETRY_JSONL") or None)
+
+
+def _thread_id(config: Optional[RunnableConfig]) -> Optional[str]:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+def _tool_names(current_state, result: Any) -> List[str]:
+    # Tool calls the node produced (call_model, fast_path) or executed (store_memory)
+    messages = list(result.get("messages") or []) if isinstance(result, dict) else []
+    names = [tc["name"] for msg in messages for tc in (getattr(msg, "tool_calls", None) or [])]
+    if not names and messages and all(isinstance(m, dict) and m.get("role") == "tool" for m in messages):
+        last = current_state.messages[-1] if current_state.messages else None
+        names = [tc["name"] for tc in (getattr(last, "tool_calls", None) or [])]
+    return names
+
+
+def timed_node(name: str, func: Callable, afunc: Optional[Callable] = None) -> RunnableLambda:
+    """Wrap a graph node so each run records its wall time, token usage and tools.
+
+    Args:
+        name: The node name.
+        func: The synchronous node function taking (state, config).
+        afunc: Optional async implementation taking (state, config).
+
+    Returns:
+        RunnableLambda: A node runnable with the same sync/async behavior.
+    """
+    def run(current_state, config: RunnableConfig):
+        usage = UsageHandler()
+        token = _usage_var.set(usage)
+        start = time.perf_counter()
+        try:
+            result = func(current_state, config)
+        finally:
+            elapsed = time.perf_counter() - start
+            _usage_var.reset(token)
+        recorder.record("node", name, elapsed, _thread_id(config), usage.prompt_tokens,
+                        usage.completion_tokens, _tool_names(current_state, result))
+        return result
+
+    async def arun(current_state, config: RunnableConfig):
+        usage = UsageHandler()
+        token = _usage_var.set(usage)
+        start = time.perf_counter()
+        try:
+            result = await afunc(current_state, config)
+        finally:
+            elapsed = time.perf_counter() - start
+            _usage_var.reset(token)
+        recorder.record("node", name, elapsed, _thread_id(config), usage.prompt_tokens,
+                        usage.completion_tokens, _tool_names(current_state, result))
+        return result
+
+    return RunnableLambda(run, afunc=arun if afunc else None, name=name)
+
+
+SYNC_CHECKPOINT_METHODS = ("get_tuple", "put", "put_writes")
+ASYNC_CHECKPOINT_METHODS = ("aget_tuple", "aput", "aput_writes")
+
+
+def instrument_checkpointer(checkpointer, methods: Sequence[str] = SYNC_CHECKPOINT_METHODS):
+    """Time the given checkpointer methods on this instance and return it.
+
+    Only the methods the graph actually drives should be listed: async savers implement
+    their sync methods on top of the async ones, so wrapping both would count twice.
+
+    Args:
+        checkpointer: A LangGraph checkpoint saver.
+        methods: Method names to wrap.
+
+    Returns:
+        The same checkpointer.
+    """
+    for method in methods:
+        original = getattr(checkpointer, method)
+        if method.startswith("a"):
+            async def timed(config, *args, _original=original, _name=method, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await _original(config, *args, **kwargs)
+                finally:
+                    recorder.record("checkpoint", _name, time.perf_counter() - start, _thread_id(config))
+        else:
+            def timed(config, *args, _original=original, _name=method, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return _original(config, *args, **kwargs)
+                finally:
+                    recorder.record("checkpoint", _name, time.perf_counter() - start, _thread_id(config))
+        setattr(checkpointer, method, timed)
+    return checkpointer
+
+
+# Counter snapshots other modules export with the live metrics, by metric prefix
+_stat_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_stats(name: str, snapshot: Callable[[], Dict[str, Any]]) -> None:
+    """Serve a module's counters from `prometheus_text()` as `aza_<name>_<key>` gauges.
+
+    Args:
+        name: Metric prefix, e.g. "context".
+        snapshot: Returns the current counters; a {name: number} value becomes one
+            series per name, and values that aren't numbers are skipped.
+    """
+    _stat_sources[name] = snapshot
+
+
+def prometheus_text(stats: Optional[Dict[str, Dict[str, float]]] = None,
+                    tokens: Optional[Dict[str, Dict[str, int]]] = None,
+                    counters: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Render latency summaries, token counters and module counters in the Prometheus text format.
+
+    Args:
+        stats: Per-metric stats as returned by `Recorder.stats()`; defaults to `recorder`.
+        tokens: {"prompt": {node: n}, "completion": {node: n}}; defaults to `recorder`.
+        counters: {prefix: {key: value}}; defaults to the `register_stats` snapshots when
+            stats is also defaulted.
+
+    Returns:
+        str: The exposition text.
+    """
+    if stats is None:
+        stats = recorder.stats()
+        tokens = recorder.tokens()
+        if counters is None:
+            counters = {name: snapshot() for name, snapshot in list(_stat_sources.items())}
+    lines = []
+    for kind in ("node", "checkpoint"):
+        metric = f"aza_{kind}_duration_seconds"
+        lines += [f"# HELP {metric} Wall time per {kind} call.", f"# TYPE {metric} summary"]
+        for key, values in sorted(stats.items()):
+            key_kind, name = key.split(":", 1)
+            if key_kind != kind:
+                continue
+            label = f'{kind}="{name}"'
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{label},quantile="{q}"}} {values[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f"{metric}_sum{{{label}}} {values['seconds']:.6f}")
+            lines.append(f"{metric}_count{{{label}}} {values['count']}")
+    lines += ["# HELP aza_llm_tokens_total Tokens reported by the provider per node.", "# TYPE aza_llm_tokens_total counter"]
+    for token_type, by_node in sorted((tokens or {}).items()):
+        for node, count in sorted(by_node.items()):
+            lines.append(f'aza_llm_tokens_total{{node="{node}",type="{token_type}"}} {count}')
+    for prefix, values in sorted((counters or {}).items()):
+        for key, value in sorted(values.items()):
+            metric = f"aza_{prefix}_{key}"
+            if isinstance(value, dict):
+                # Per-name breakdowns such as hits per tool
+                samples = [(f'{metric}{{name="{name}"}}', n) for name, n in sorted(value.items())]
+            else:
+                samples = [(metric, value)]
+            samples = [(sample, n) for sample, n in samples if isinstance(n, (int, float)) and not isinstance(n, bool)]
+            if samples:
+                lines += [f"# TYPE {metric} gauge", *(f"{sample} {n}" for sample, n in samples)]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """Serve `prometheus_text()` at http://0.0.0.0:<port>/metrics from a daemon thread."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="aza-metrics", daemon=True).start()
+    return server
+
+
+def start_from_env() -> Optional[ThreadingHTTPServer]:
+    """Start the metrics server if AZA_METRICS_PORT is set."""
+    port = os.environ.get("AZA_METRICS_PORT")
+    return start_metrics_server(int(port)) if port else None
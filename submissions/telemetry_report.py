@@ -0,0 +1,64 @@
+import argparse
+import json
+import time
+import telemetry
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize Aza Man node and checkpointer latency from a telemetry JSONL log")
+    parser.add_argument("--file", default="aza_telemetry.jsonl", help="JSONL log written via AZA_TELEMETRY_JSONL")
+    parser.add_argument("--user_id", help="Only include this user's thread")
+    parser.add_argument("--since-minutes", type=float, help="Only include events from the last N minutes")
+    parser.add_argument("--prometheus", action="store_true", help="Print Prometheus text instead of a table")
+    args = parser.parse_args()
+
+    thread_id = f"thread_{args.user_id}" if args.user_id else None
+    cutoff = time.time() - args.since_minutes * 60 if args.since_minutes else None
+    durations, prompt_tokens, completion_tokens, tools = {}, {}, {}, {}
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if (thread_id and event.get("thread_id") != thread_id) or (cutoff and event["ts"] < cutoff):
+                    continue
+                metric = f"{event['kind']}:{event['name']}"
+                durations.setdefault(metric, []).append(event["seconds"])
+                if "prompt_tokens" in event:
+                    prompt_tokens[event["name"]] = prompt_tokens.get(event["name"], 0) + event["prompt_tokens"]
+                    completion_tokens[event["name"]] = completion_tokens.get(event["name"], 0) + event["completion_tokens"]
+                for tool in event.get("tools", []):
+                    key = (event["name"], tool)
+                    tools[key] = tools.get(key, 0) + 1
+    except FileNotFoundError:
+        print(f"No telemetry log at {args.file}. Set AZA_TELEMETRY_JSONL={args.file} before running the app.")
+        return
+
+    if not durations:
+        print("No matching telemetry events.")
+        return
+    stats = {}
+    for metric, values in durations.items():
+        values.sort()
+        stats[metric] = {"count": len(values), "seconds": sum(values), "max": values[-1],
+                         **{f"p{int(q * 100)}": telemetry.percentile(values, q) for q in telemetry.QUANTILES}}
+    if args.prometheus:
+        print(telemetry.prometheus_text(stats, {"prompt": prompt_tokens, "completion": completion_tokens}), end="")
+        return
+
+    print(f"{'metric':<35} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10} {'total s':>9}")
+    for metric, row in sorted(stats.items(), key=lambda item: item[1]["seconds"], reverse=True):
+        print(f"{metric:<35} {row['count']:>7} {row['p50'] * 1000:>10,.1f} {row['p95'] * 1000:>10,.1f} "
+              f"{row['p99'] * 1000:>10,.1f} {row['max'] * 1000:>10,.1f} {row['seconds']:>9,.2f}")
+    if prompt_tokens:
+        print("\nTokens per node (prompt / completion):")
+        for node in sorted(prompt_tokens):
+            print(f"  {node:<33} {prompt_tokens[node]:>10,} / {completion_tokens[node]:,}")
+    if tools:
+        print("\nTool calls per node:")
+        for (node, tool), count in sorted(tools.items(), key=lambda item: item[1], reverse=True):
+            print(f"  {node + ' -> ' + tool:<33} {count:>10,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import pytest
+
+import calculator
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("(450000 - 182000) / 30", 8933.333333333334),
+    ("(450k - 182,000) / 30", 8933.333333333334),
+    ("40% of 750k", 300000.0),
+    ("750k * 40%", 300000.0),
+    ("1.2m - 35,000", 1165000.0),
+    ("10 % 3", 1.0),
+    ("2 ** 10", 1024.0),
+    ("-5 + +3", -2.0),
+    ("7 // 2", 3.0),
+    ("12 × 3 ÷ 4 − 1", 8.0),
+])
+def test_evaluate(expression, expected):
+    assert calculator.evaluate(expression) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("1 / 0", "Division by zero"),
+    ("5 % 0", "Division by zero"),
+    ("0 ** -1", "Division by zero"),
+    ("1e18 ** 100", "out of range"),
+    ("2 ** 101", "Exponent too large"),
+    ("1e999", "out of range"),
+    ("1e999 - 1e999", "out of range"),
+    ("99999999999999999999999", "out of range"),
+    ("(-8) ** 0.5", "out of range"),
+    ("1e18 * 10", "out of range"),
+    ("__import__('os')", "Unsupported syntax"),
+    ("abs(-1)", "Unsupported syntax"),
+    ("'a' * 3", "Unsupported syntax"),
+    ("1 +", "Invalid expression"),
+    ("1+" * 101 + "1", "too long"),
+    ("+".join(["1"] * 40), "too complex"),
+])
+def test_evaluate_rejects(expression, message):
+    with pytest.raises(ValueError, match=message):
+        calculator.evaluate(expression)
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import clients
+import configuration
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    clients.registry.clear()
+    yield
+    clients.registry.clear()
+
+
+def test_async_client_is_per_event_loop():
+    assert clients.get_async_http_client() is None
+
+    async def lookup():
+        return clients.get_async_http_client(), clients.get_async_http_client(), clients.loop_id()
+
+    first, again, first_loop = asyncio.run(lookup())
+    second, _, second_loop = asyncio.run(lookup())
+    assert first is again
+    assert first is not second
+    assert first_loop != second_loop
+
+
+def test_llm_is_rebuilt_for_each_event_loop(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "key-1")
+    cfg = configuration.Configuration(provider="openrouter", model="meta-llama/llama-3.3-70b-instruct")
+
+    async def build():
+        return cfg.get_llm(), cfg.get_llm()
+
+    first, again = asyncio.run(build())
+    second, _ = asyncio.run(build())
+    assert first is again
+    assert first is not second
+    # Outside a loop the SDK owns the async client
+    assert cfg.get_llm() is not first
+
+
+def test_router_key_includes_backend_api_keys(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "key-1")
+    cfg = configuration.Configuration(provider="router", router_backends="openrouter:meta-llama/llama-3.3-70b-instruct,scripted:default")
+    first = cfg.get_llm()
+    assert cfg.get_llm() is first
+    monkeypatch.setenv("OPENROUTER_API_KEY", "key-2")
+    assert cfg.get_llm() is not first
+
+
+def test_make_key_hashes_the_api_key():
+    key = clients.make_key("groq", "llama", "secret", [], loop=3)
+    assert "secret" not in repr(key)
+    assert key != clients.make_key("groq", "llama", "other", [], loop=3)
+    assert key != clients.make_key("groq", "llama", "secret", [], loop=4)
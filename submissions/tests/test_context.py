@@ -0,0 +1,57 @@
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import context
+
+
+def test_assemble_context_returns_this_calls_metrics():
+    # Each thread sends a different history size; its metrics must match its own prompt
+    # even while other threads are overwriting stats.last
+    errors = []
+
+    def worker(n):
+        messages = [HumanMessage(content="word " * n), AIMessage(content="ok")]
+        for _ in range(200):
+            prompt, metrics = context.assemble_context("system", messages, token_budget=0)
+            expected = context.MESSAGE_OVERHEAD_TOKENS + context.count_tokens("system") + sum(
+                context.message_tokens(m) for m in messages)
+            if metrics["full_tokens"] != expected:
+                errors.append((n, metrics))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in (5, 50, 500, 5000)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+
+def test_budget_keeps_latest_turn():
+    messages = [HumanMessage(content="old " * 2000), AIMessage(content="reply"), HumanMessage(content="new question")]
+    prompt, metrics = context.assemble_context("system", messages, token_budget=200)
+    assert prompt[-1].content == "new question"
+    assert metrics["dropped_messages"] == 2
+    assert metrics["tokens_saved"] > 0
+
+
+def test_tight_budget_keeps_the_current_turn_whole():
+    # A tool result must never be sent without the AI tool call and user question before it
+    messages = [
+        HumanMessage(content="Log 2500 for food " + "please " * 100, id="h1"),
+        AIMessage(content="", id="a1", tool_calls=[{"name": "log_expenses", "id": "call_1", "args": {"amount": 2500}}]),
+        ToolMessage(content="Expenses logged!", tool_call_id="call_1", id="t1"),
+    ]
+    prompt, metrics = context.assemble_context("system", messages, token_budget=100)
+    assert [m.id for m in prompt[1:]] == ["h1", "a1", "t1"]
+    assert metrics["dropped_messages"] == 0
+
+
+def test_window_without_a_user_turn_keeps_the_tool_call():
+    messages = [
+        AIMessage(content="x " * 500, id="a0"),
+        AIMessage(content="", id="a1", tool_calls=[{"name": "math_tool", "id": "call_1", "args": {}}]),
+        ToolMessage(content="42", tool_call_id="call_1", id="t1"),
+    ]
+    prompt, _ = context.assemble_context("system", messages, token_budget=20)
+    assert [m.id for m in prompt[1:]] == ["a1", "t1"]
@@ -0,0 +1,119 @@
+import io
+
+import pytest
+
+import expense_import
+import ledger
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>NGN
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250301120000[0:GMT]
+<TRNAMT>-4500.00
+<NAME>BOLT RIDE
+<MEMO>Trip to work
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250302
+<TRNAMT>250000.00
+<NAME>SALARY
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def records(text, filename="export.csv"):
+    return list(expense_import.iter_records(io.StringIO(text), filename))
+
+
+def run_import(tmp_path, text, filename="export.csv", **kwargs):
+    expense_ledger = ledger.ExpenseLedger(str(tmp_path / "ledger.db"))
+    result = expense_import.import_rows(expense_import.iter_records(io.StringIO(text), filename), "u1",
+                                        expense_ledger=expense_ledger, **kwargs)
+    return result, expense_ledger
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("₦1,250.00", 1250.0), ("(350.00)", -350.0), ("-42.10", -42.1), ("", None), ("n/a", None), (None, None),
+])
+def test_parse_amount(value, expected):
+    assert expense_import.parse_amount(value) == expected
+
+
+def test_csv_maps_header_names():
+    rows = records("Transaction Date,Narration,Amount,CCY\n2025-03-01,Shoprite Lekki,\"5,000\",ngn\n")
+    assert rows == [(2, {"amount": "5,000", "date": "2025-03-01", "category": None,
+                         "description": "Shoprite Lekki", "currency": "ngn", "signed": False})]
+
+
+def test_csv_debit_credit_columns_become_signed_amounts():
+    rows = records("Date,Details,Debit,Credit\n2025-03-01,Uber,1500,\n2025-03-02,Salary,,90000\n")
+    assert [(r["amount"], r["signed"]) for _, r in rows] == [(-1500.0, True), (90000.0, True)]
+
+
+def test_csv_without_amount_column_is_rejected():
+    with pytest.raises(ValueError, match="No amount column"):
+        records("Date,Description\n2025-03-01,Uber\n")
+
+
+def test_ofx_records():
+    rows = records(OFX, "statement.ofx")
+    assert [line for line, _ in rows] == [5, 12]
+    assert rows[0][1] == {"signed": True, "amount": "-4500.00", "date": "20250301120000[0:GMT]",
+                          "description": "BOLT RIDE Trip to work", "currency": "NGN"}
+
+
+def test_ofx_detected_by_content():
+    assert len(records(OFX, "statement.txt")) == 2
+
+
+def test_ofx_import_skips_credits(tmp_path):
+    result, expense_ledger = run_import(tmp_path, OFX, "statement.qfx")
+    assert (result.imported, result.skipped, result.total) == (1, 1, 4500.0)
+    assert list(expense_ledger.iter_expenses("u1")) == [
+        {"timestamp": "2025-03-01 00:00:00", "amount": 4500.0, "category": "transport", "currency": "NGN"}]
+
+
+def test_day_first_file_is_read_day_first_throughout(tmp_path):
+    # The first rows fit both orders; 25/03 settles it for the rows already read
+    text = "Date,Amount\n03/04/2025,100\n05/04/2025,100\n25/03/2025,100\n"
+    result, expense_ledger = run_import(tmp_path, text, currency="NGN")
+    assert result.imported == 3
+    assert [e["timestamp"][:10] for e in expense_ledger.iter_expenses("u1")] == ["2025-04-03", "2025-04-05", "2025-03-25"]
+
+
+def test_month_first_file_is_read_month_first(tmp_path):
+    text = "Date,Amount\n03/04/2025,100\n03/25/2025,100\n"
+    _, expense_ledger = run_import(tmp_path, text, currency="USD")
+    assert [e["timestamp"][:10] for e in expense_ledger.iter_expenses("u1")] == ["2025-03-04", "2025-03-25"]
+
+
+def test_ambiguous_file_is_reported(tmp_path):
+    with pytest.raises(ValueError, match="03/04/2025"):
+        run_import(tmp_path, "Date,Amount\n03/04/2025,100\n05/06/2025,100\n")
+
+
+def test_explicit_format_resolves_ambiguity(tmp_path):
+    text = "Date,Amount\n03/04/2025,100\n05/06/2025,100\n"
+    result, expense_ledger = run_import(tmp_path, text, date_format="%m/%d/%Y")
+    assert [e["timestamp"][:10] for e in expense_ledger.iter_expenses("u1")] == ["2025-03-04", "2025-05-06"]
+
+
+def test_dates_that_read_the_same_either_way_are_not_ambiguous(tmp_path):
+    result, _ = run_import(tmp_path, "Date,Amount\n04/04/2025,100\n")
+    assert result.imported == 1
+
+
+def test_two_digit_years_are_not_read_as_year_25(tmp_path):
+    _, expense_ledger = run_import(tmp_path, "Date,Amount\n25/03/25,100\n")
+    assert next(expense_ledger.iter_expenses("u1"))["timestamp"] == "2025-03-25 00:00:00"
+
+
+def test_rows_in_another_format_are_rejected(tmp_path):
+    result, _ = run_import(tmp_path, "Date,Amount\n25/03/2025,100\n2025.03.26,100\nyesterday,100\n")
+    assert (result.imported, result.rejected) == (1, 2)
+    assert result.errors[0] == "row 3: unreadable date '2025.03.26'"
@@ -0,0 +1,101 @@
+import pytest
+
+import fastpath
+from state import State
+
+
+@pytest.fixture
+def budgeted():
+    return State(username="Blaq", income=750_000.0, savings=300_000.0, budget_for_expenses=450_000.0,
+                 currency="NGN", expense=182_000.0)
+
+
+@pytest.fixture
+def fresh():
+    return State()
+
+
+def expenses(command):
+    assert command and command["name"] == "log_expenses"
+    return [(e["amount"], e["category"]) for e in command["args"]["expenses"]]
+
+
+@pytest.mark.parametrize("amount,expected", [("80k", 80_000), ("1.2m", 1_200_000), ("35,000", 35_000), ("450", 450)])
+def test_parse_amount(amount, expected):
+    assert fastpath.parse_amount(amount) == expected
+
+
+@pytest.mark.parametrize("text", ["abc", "80kk", "1,00"])
+def test_parse_amount_rejects(text):
+    assert fastpath.parse_amount(text) is None
+
+
+@pytest.mark.parametrize("text,name", [
+    ("call me Blaq", "Blaq"),
+    ("Sure, call me Blaq.", "Blaq"),
+    ("my name is Ada", "Ada"),
+    ("you can call me O'Neil", "O'Neil"),
+    ("hey call me Mary-Jane!", "Mary-Jane"),
+])
+def test_username_accepted(fresh, text, name):
+    assert fastpath.parse_command(text, fresh) == {"name": "set_username", "args": {"username": name}}
+
+
+@pytest.mark.parametrize("text", [
+    "call me later",
+    "call me tomorrow.",
+    "Call me back",
+    "ok call me now!",
+    "call me please",
+    "call me when you are done",
+    "call me 007",
+])
+def test_username_rejected(fresh, text):
+    assert fastpath.parse_command(text, fresh) is None
+
+
+def test_budget_only_without_income(fresh, budgeted):
+    command = fastpath.parse_command("budget 750k 40% ngn", fresh)
+    assert command == {"name": "budget", "args": {"income": 750_000, "savings_goal": "40%", "currency": "NGN"}}
+    assert fastpath.parse_command("budget 750k 40% ngn", budgeted) is None
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("log 80k food, 35,000 transport", [(80_000, "food"), (35_000, "transport")]),
+    ("spent 5000 on data", [(5_000, "data")]),
+    ("I spent 12k for rent and 3k fuel.", [(12_000, "rent"), (3_000, "fuel")]),
+    ("log 20k school fees", [(20_000, "school fees")]),
+    ("spent 2500", [(2_500, "miscellaneous")]),
+])
+def test_log_accepted(budgeted, text, expected):
+    assert expenses(fastpath.parse_command(text, budgeted)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "add 450000 and 182000",
+    "I spent 80k last Tuesday",
+    "spent 5 minutes thinking",
+    "spent 5 minutes",
+    "spent 2 hours",
+    "I spent 67k yesterday",
+    "spent 10k on food yesterday",
+    "log 5k this morning",
+    "spent 3k in March",
+    "log 20k birthday gift for mum",
+])
+def test_log_rejected(budgeted, text):
+    assert fastpath.parse_command(text, budgeted) is None
+
+
+def test_log_needs_budget(fresh):
+    assert fastpath.parse_command("log 80k food", fresh) is None
+
+
+def test_on_track(budgeted):
+    command = fastpath.parse_command("Wait. Am I on track?", budgeted)
+    assert command == {"name": "math_tool", "args": {"numbers": [450_000.0, 182_000.0], "operation": "subtract"}}
+
+
+@pytest.mark.parametrize("text", ["", "x" * 201, "what should I cut back on?"])
+def test_everything_else_goes_to_the_model(budgeted, text):
+    assert fastpath.parse_command(text, budgeted) is None
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+
+import configuration
+import graph
+import state
+
+
+class FakeLLM:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def invoke(self, prompt):
+        return self.reply
+
+    async def ainvoke(self, prompt):
+        return self.reply
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def use(reply):
+        def get_llm(self, with_tools=True):
+            calls.append(with_tools)
+            return FakeLLM(reply)
+        monkeypatch.setattr(configuration.Configuration, "get_llm", get_llm)
+        return calls
+
+    return use
+
+
+def long_conversation(turns=6):
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"question {i}", id=f"h{i}"), AIMessage(content=f"answer {i}", id=f"a{i}")]
+    return state.State(messages=messages, summary="Earlier: set a budget.")
+
+
+CONFIG = {"configurable": {"messages_to_keep": 2}}
+
+
+@pytest.mark.parametrize("summarize", [
+    graph.summarize_conversation,
+    lambda s, c: asyncio.run(graph.asummarize_conversation(s, c)),
+])
+def test_summary_uses_a_model_without_tools(llm_calls, summarize):
+    calls = llm_calls(AIMessage(content="Blaq set a budget and asked six questions."))
+    update = summarize(long_conversation(), CONFIG)
+    assert calls == [False]
+    assert update["summary"] == "Blaq set a budget and asked six questions."
+    assert all(isinstance(m, RemoveMessage) for m in update["messages"]) and len(update["messages"]) == 10
+
+
+@pytest.mark.parametrize("reply", [
+    AIMessage(content="", tool_calls=[{"name": "math_tool", "args": {}, "id": "call_1"}]),
+    AIMessage(content="   "),
+])
+def test_empty_summary_keeps_history_and_old_summary(llm_calls, reply):
+    llm_calls(reply)
+    assert graph.summarize_conversation(long_conversation(), CONFIG) == {}
@@ -0,0 +1,74 @@
+import sqlite3
+
+import ledger
+
+
+def make_ledger(tmp_path):
+    return ledger.ExpenseLedger(str(tmp_path / "ledger.db"))
+
+
+def test_append_and_aggregates(tmp_path):
+    expense_ledger = make_ledger(tmp_path)
+    expense_ledger.append("u1", [{"amount": 100, "category": "Food", "date": "2026-10-01"},
+                                 {"amount": 50, "category": None}], "NGN", timestamp="2026-10-02 09:00:00")
+    aggregates = expense_ledger.aggregates("u1")
+    assert aggregates["expense"] == 150.0
+    assert aggregates["expense_count"] == 2
+    assert aggregates["expenses_by_category"] == {"food": 100.0, "miscellaneous": 50.0}
+    assert aggregates["expenses_by_day"] == {"2026-10-01": 100.0, "2026-10-02": 50.0}
+
+
+def test_append_with_source_is_idempotent(tmp_path):
+    expense_ledger = make_ledger(tmp_path)
+    expenses = [{"amount": 80000, "category": "rent"}, {"amount": 35000, "category": "food"}]
+    assert expense_ledger.append("u1", expenses, "NGN", source="msg1:call_0") == 2
+    # A retried step replays the same tool call
+    assert expense_ledger.append("u1", expenses, "NGN", source="msg1:call_0") == 0
+    # Same key for another user, or a new call, still logs
+    assert expense_ledger.append("u2", expenses, "NGN", source="msg1:call_0") == 2
+    assert expense_ledger.append("u1", expenses[:1], "NGN", source="msg2:call_0") == 1
+    assert expense_ledger.aggregates("u1")["expense_count"] == 3
+
+
+def test_rows_without_source_are_never_deduplicated(tmp_path):
+    expense_ledger = make_ledger(tmp_path)
+    expense_ledger.append("u1", [{"amount": 1, "category": "data"}], "NGN")
+    expense_ledger.append("u1", [{"amount": 1, "category": "data"}], "NGN")
+    assert expense_ledger.aggregates("u1")["expense_count"] == 2
+
+
+def test_existing_ledger_gains_source_column(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE expense_ledger (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL, amount REAL NOT NULL, category TEXT NOT NULL, currency TEXT NOT NULL);
+        INSERT INTO expense_ledger (user_id, timestamp, amount, category, currency)
+            VALUES ('u1', '2026-10-01 10:00:00', 10, 'food', 'NGN');
+    """)
+    conn.close()
+    expense_ledger = ledger.ExpenseLedger(path)
+    expense_ledger.append("u1", [{"amount": 5, "category": "food"}], "NGN", source="m:c")
+    expense_ledger.append("u1", [{"amount": 5, "category": "food"}], "NGN", source="m:c")
+    assert expense_ledger.aggregates("u1")["expense"] == 15.0
+
+
+def test_store_memory_replay_logs_once(tmp_path):
+    import graph
+    import state
+    from langchain_core.messages import AIMessage
+
+    previous = ledger.set_ledger(make_ledger(tmp_path))
+    try:
+        current_state = state.State(messages=[AIMessage(content="", id="ai1", tool_calls=[{
+            "name": "log_expenses", "id": "call_0",
+            "args": {"expenses": [{"amount": 2500, "category": "food"}], "currency": "NGN"},
+        }])], currency="NGN")
+        config = {"configurable": {"user_id": "u1", "thread_id": "thread_u1"}}
+        first = graph.store_memory(current_state, config)
+        # A retried step replays the same AI message and tool call
+        graph.store_memory(current_state, config)
+        assert ledger.get_ledger().aggregates("u1")["expense_count"] == 1
+        assert first["expense_count"] == 1
+    finally:
+        ledger.set_ledger(previous)
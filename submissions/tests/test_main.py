@@ -0,0 +1,62 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+import graph
+import main
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setenv("PROVIDER", "scripted")
+    monkeypatch.setenv("MODEL", "default")
+    monkeypatch.setenv("USER_ID", "tester12")
+    # start_session turns LangSmith tracing on; restore both variables afterwards
+    monkeypatch.setenv("LANGCHAIN_TRACING_V2", "false")
+    monkeypatch.setenv("LANGCHAIN_PROJECT", "tests")
+    compiled = graph.builder.compile(checkpointer=MemorySaver())
+
+    @asynccontextmanager
+    async def async_graph():
+        yield compiled
+
+    monkeypatch.setattr(graph, "graph", compiled, raising=False)
+    monkeypatch.setattr(graph, "async_graph", async_graph)
+
+    def start_session(real=main.start_session):
+        config = real()
+        # ...but keep the tests offline
+        os.environ["LANGCHAIN_TRACING_V2"] = "false"
+        return config
+    monkeypatch.setattr(main, "start_session", start_session)
+
+    def type_lines(*lines):
+        replies = iter(lines)
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(replies))
+        return compiled
+
+    return type_lines
+
+
+@pytest.mark.parametrize("run", [main.main, lambda: asyncio.run(main.amain())], ids=["sync", "async"])
+def test_entry_points_share_the_conversation_loop(session, capsys, run):
+    compiled = session("Hi Aza man.", "Sure, call me Blaq.", "exit")
+    run()
+    out = capsys.readouterr().out
+    assert "No prior user data found. Starting fresh!" in out
+    assert "Aza Man: Hello there! Since this is a new session, may I have your preferred name?" in out
+    assert "Hi Blaq! How can I help you today?" in out
+    assert out.rstrip().endswith("Goodbye!")
+    assert compiled.get_state({"configurable": {"thread_id": "thread_tester12"}}).values["username"] == "Blaq"
+
+
+def test_returning_user_is_welcomed_back(session, capsys):
+    compiled = session("Hi Aza man.", "Sure, call me Blaq.", "exit")
+    main.main()
+    session("exit")
+    main.main()
+    out = capsys.readouterr().out
+    assert "Welcome back, Blaq! Your last session data is loaded." in out
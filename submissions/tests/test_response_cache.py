@@ -0,0 +1,161 @@
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import graph
+import response_cache
+from response_cache import ResponseCache
+from state import State
+
+
+def budgeted(**kwargs):
+    values = dict(username="Blaq", income=750_000.0, budget_for_expenses=450_000.0, currency="NGN", expense=182_000.0)
+    values.update(kwargs)
+    return State(**values)
+
+
+def test_key_changes_with_financial_fields():
+    key = response_cache.make_key("u1", budgeted(), "Am I on track?")
+    assert key == response_cache.make_key("u1", budgeted(), "  am i on TRACK ")
+    assert key != response_cache.make_key("u1", budgeted(expense=190_000.0), "Am I on track?")
+    assert key != response_cache.make_key("u2", budgeted(), "Am I on track?")
+
+
+def test_invalidate_user_drops_only_that_user():
+    cache = ResponseCache()
+    cache.put("k1", "u1", "reply 1")
+    cache.put("k2", "u1", "reply 2")
+    cache.put("k3", "u2", "reply 3")
+    assert cache.invalidate_user("u1") == 2
+    assert cache.get("k1") is None and cache.get("k2") is None
+    assert cache.get("k3") == "reply 3"
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_invalidate_user_clears_persistent_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=path).put("k1", "u1", "reply")
+    ResponseCache(db_path=path).invalidate_user("u1")
+    assert ResponseCache(db_path=path).get("k1") is None
+
+
+def test_persistent_entries_survive_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=path).put("k1", "u1", "reply")
+    assert ResponseCache(db_path=path).get("k1") == "reply"
+
+
+def test_ttl_expiry(tmp_path):
+    cache = ResponseCache(ttl=0.05, db_path=str(tmp_path / "cache.db"))
+    cache.put("k1", "u1", "reply")
+    assert cache.get("k1") == "reply"
+    time.sleep(0.1)
+    assert cache.get("k1") is None
+    # The expired persistent row is gone too
+    assert ResponseCache(ttl=600, db_path=str(tmp_path / "cache.db")).get("k1") is None
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_size=2)
+    cache.put("a", "u", "A")
+    cache.put("b", "u", "B")
+    cache.get("a")
+    cache.put("c", "u", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_get_reads_db_without_holding_lock(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "cache.db"))
+    cache.put("k1", "u1", "reply")
+    cache._entries.clear()
+    seen = []
+    read = cache._db.read
+
+    def checking_read():
+        # The cache lock is free while this lookup reads SQLite
+        free = cache._lock.acquire(blocking=False)
+        if free:
+            cache._lock.release()
+        seen.append(free)
+        return read()
+
+    cache._db.read = checking_read
+    assert cache.get("k1") == "reply"
+    assert seen == [True]
+
+
+def test_writes_do_not_hold_lock(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "cache.db"))
+    seen = []
+    write = cache._db.write
+
+    def checking_write():
+        free = cache._lock.acquire(blocking=False)
+        if free:
+            cache._lock.release()
+        seen.append(free)
+        return write()
+
+    cache._db.write = checking_write
+    cache.put("k1", "u1", "reply")
+    cache.invalidate_user("u1")
+    assert seen == [True, True]
+
+
+def test_invalidation_during_put_write_leaves_no_row(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(db_path=path)
+    write = cache._db.write
+    calls = []
+
+    def racing_write():
+        # Another session invalidates the user while put's INSERT is on its way
+        calls.append(1)
+        if len(calls) == 1:
+            cache.invalidate_user("u1")
+        return write()
+
+    cache._db.write = racing_write
+    cache.put("k1", "u1", "stale reply")
+    assert cache.get("k1") is None
+    assert ResponseCache(db_path=path).get("k1") is None
+
+
+@pytest.mark.parametrize("text", ["Am I on track?", "How much have I spent so far?", "What is my savings goal?"])
+def test_standalone_questions(text):
+    assert response_cache.is_standalone(text)
+
+
+@pytest.mark.parametrize("text", ["why?", "and the second one?", "yes", "Why is that so high?", "what about transport",
+                                  "can you explain it again"])
+def test_follow_ups(text):
+    assert not response_cache.is_standalone(text)
+
+
+def cache_key(messages, **state):
+    current = budgeted(**state)
+    current.messages = messages
+    return graph._response_cache_key(current, {"configurable": {"user_id": "u1", "response_cache": True}})[1]
+
+
+def test_follow_up_key_depends_on_recent_turns():
+    first = [HumanMessage("How much did I spend on rent?", id="1"), AIMessage("180,000 NGN on rent.", id="2"),
+             HumanMessage("why?", id="3")]
+    second = [HumanMessage("How much did I spend on food?", id="1"), AIMessage("40,000 NGN on food.", id="2"),
+              HumanMessage("why?", id="3")]
+    assert cache_key(first) != cache_key(second)
+    assert cache_key(first) != cache_key(first, summary="Earlier: discussed cutting rent.")
+
+
+def test_standalone_key_ignores_recent_turns():
+    first = [HumanMessage("hello there", id="1"), AIMessage("Hi Blaq!", id="2"), HumanMessage("Am I on track?", id="3")]
+    second = [HumanMessage("log 5k food", id="1"), AIMessage("Logged.", id="2"), HumanMessage("Am I on track?", id="3")]
+    assert cache_key(first) == cache_key(second)
+
+
+def test_reply_to_assistant_question_keys_on_context():
+    first = [AIMessage("Shall I log it as food?", id="1"), HumanMessage("Yes please log it now", id="2")]
+    second = [AIMessage("Shall I log it as rent?", id="1"), HumanMessage("Yes please log it now", id="2")]
+    assert cache_key(first) != cache_key(second)
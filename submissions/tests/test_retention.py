@@ -0,0 +1,73 @@
+import sqlite3
+import time
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+import retention
+
+
+def make_saver(tmp_path):
+    saver = SqliteSaver(sqlite3.connect(str(tmp_path / "ckpt.db"), check_same_thread=False))
+    saver.setup()
+    return saver
+
+
+def put(saver, thread_id, checkpoint_id=None):
+    checkpoint = empty_checkpoint()
+    if checkpoint_id:
+        checkpoint["id"] = checkpoint_id
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    saved = saver.put(config, checkpoint, {"source": "loop", "step": 0, "writes": {}, "parents": {}}, {})
+    saver.put_writes(saved, [("messages", "hi")], task_id=f"task-{checkpoint['id']}")
+    return checkpoint["id"]
+
+
+def ids(saver, thread_id):
+    return [t.checkpoint["id"] for t in saver.list({"configurable": {"thread_id": thread_id}})]
+
+
+def test_keep_last_per_thread(tmp_path):
+    saver = make_saver(tmp_path)
+    a = [put(saver, "thread_a") for _ in range(5)]
+    b = [put(saver, "thread_b") for _ in range(2)]
+    deleted = retention.compact(saver.conn, retention.RetentionPolicy(keep_last=3))
+    assert deleted == {"checkpoints": 2, "writes": 2}
+    assert ids(saver, "thread_a") == a[:1:-1]
+    assert ids(saver, "thread_b") == b[::-1]
+
+
+def test_max_age_keeps_newest_checkpoint(tmp_path):
+    saver = make_saver(tmp_path)
+    now = time.time()
+    old = [put(saver, "thread_a", retention.checkpoint_id_before(now - days * 86400)) for days in (30, 20, 10)]
+    fresh = put(saver, "thread_a")
+    only_old = [put(saver, "thread_b", retention.checkpoint_id_before(now - days * 86400)) for days in (9, 8)]
+    deleted = retention.compact(saver.conn, retention.RetentionPolicy(keep_last=None, max_age_days=15))
+    assert deleted["checkpoints"] == 2
+    assert ids(saver, "thread_a") == [fresh, old[2]]
+    # Every checkpoint of thread_b is older than the cutoff, but its newest one survives
+    retention.compact(saver.conn, retention.RetentionPolicy(keep_last=None, max_age_days=1))
+    assert ids(saver, "thread_b") == [only_old[-1]]
+
+
+def test_compact_single_thread_and_stats(tmp_path):
+    saver = make_saver(tmp_path)
+    for _ in range(4):
+        put(saver, "thread_a")
+        put(saver, "thread_b")
+    retention.compact(saver.conn, retention.RetentionPolicy(keep_last=1), thread_id="thread_a")
+    stats = {row["thread_id"]: row for row in retention.thread_stats(saver.conn)}
+    assert stats["thread_a"]["checkpoints"] == 1 and stats["thread_a"]["writes"] == 1
+    assert stats["thread_b"]["checkpoints"] == 4 and stats["thread_b"]["writes"] == 4
+
+
+def test_checkpoint_id_before_orders_by_time():
+    assert retention.checkpoint_id_before(1_000) < retention.checkpoint_id_before(2_000)
+    assert retention.checkpoint_id_before(time.time() - 60) < empty_checkpoint()["id"]
+
+
+def test_compact_without_tables(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "empty.db"))
+    assert retention.compact(conn, retention.RetentionPolicy()) == {"checkpoints": 0, "writes": 0}
+    assert retention.thread_stats(conn) == []
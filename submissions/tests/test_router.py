@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+import router
+
+
+class FakeChatModel(BaseChatModel):
+    """Streams `reply` after `delay` seconds, or raises if `fail` is set."""
+    reply: str = "ok"
+    delay: float = 0.0
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _chunks(self):
+        if self.fail:
+            raise ConnectionError(f"{self.reply} is down")
+        for word in self.reply.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        yield from self._chunks()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        for chunk in self._chunks():
+            yield chunk
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+
+@pytest.fixture(autouse=True)
+def fresh_health(monkeypatch):
+    monkeypatch.setattr(router, "_health", {})
+    monkeypatch.setattr(router, "DEFAULT_HEDGE_DELAY", 0.05)
+    monkeypatch.setattr(router, "MIN_HEDGE_DELAY", 0.05)
+
+
+def model(*backends, **kwargs):
+    return router.RouterChatModel(backends=[(llm.reply, llm) for llm in backends], **kwargs)
+
+
+def answer(chat_model):
+    return chat_model.invoke([HumanMessage(content="hi")]).content
+
+
+def aanswer(chat_model):
+    return asyncio.run(chat_model.ainvoke([HumanMessage(content="hi")])).content
+
+
+@pytest.fixture(params=["sync", "async"])
+def ask(request):
+    return answer if request.param == "sync" else aanswer
+
+
+def test_first_backend_answers(ask):
+    assert ask(model(FakeChatModel(reply="a b"), FakeChatModel(reply="c"))) == "ab"
+
+
+def test_fails_over_to_next_backend(ask):
+    assert ask(model(FakeChatModel(reply="a", fail=True), FakeChatModel(reply="b"), hedge=False)) == "b"
+    assert router.get_health("a").error_rate() == 1.0
+
+
+def test_hedge_races_a_slow_backend(ask):
+    slow, fast = FakeChatModel(reply="slow", delay=1.0), FakeChatModel(reply="fast")
+    started = time.monotonic()
+    assert ask(model(slow, fast)) == "fast"
+    assert time.monotonic() - started < 0.8
+
+
+def test_failover_to_a_slow_last_backend_does_not_hedge(ask):
+    # The failed first backend's hedge deadline must not fire with nothing left to launch
+    assert ask(model(FakeChatModel(reply="a", fail=True), FakeChatModel(reply="slow", delay=0.2))) == "slow"
+
+
+def test_backend_taking_over_is_hedged(ask):
+    backends = FakeChatModel(reply="a", fail=True), FakeChatModel(reply="slow", delay=1.0), FakeChatModel(reply="c")
+    started = time.monotonic()
+    assert ask(model(*backends)) == "c"
+    assert time.monotonic() - started < 0.8
+
+
+def test_all_backends_failing_raises(ask):
+    with pytest.raises(router.AllBackendsFailed):
+        ask(model(FakeChatModel(reply="a", fail=True), FakeChatModel(reply="b", fail=True), max_rounds=1))
+
+
+def test_circuit_opens_and_half_opens(monkeypatch):
+    health = router.BackendHealth("a", failure_threshold=2, cooldown=10.0)
+    now = [100.0]
+    monkeypatch.setattr(router.time, "monotonic", lambda: now[0])
+    health.record_failure()
+    assert health.available()
+    health.record_failure()
+    assert not health.available() and health.snapshot()["state"] == "open"
+    now[0] += 10.0
+    # Half-open: one probe is let through, and only one
+    assert health.available()
+    health.start()
+    assert not health.available() and health.snapshot()["state"] == "half-open"
+    health.record_failure()
+    assert not health.available() and health.snapshot()["state"] == "open"
+    now[0] += 10.0
+    health.start()
+    health.record_success(0.1)
+    assert health.available() and health.snapshot()["state"] == "closed"
+
+
+def test_open_circuit_is_skipped(ask):
+    router.get_health("a").failure_threshold = 1
+    router.get_health("a").record_failure()
+    assert ask(model(FakeChatModel(reply="a"), FakeChatModel(reply="b"))) == "b"
+
+
+def test_every_circuit_open_raises():
+    router.get_health("a").failure_threshold = 1
+    router.get_health("a").record_failure()
+    with pytest.raises(router.AllBackendsFailed, match="circuits open"):
+        answer(model(FakeChatModel(reply="a"), max_rounds=1))
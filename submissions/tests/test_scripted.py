@@ -0,0 +1,67 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import scripted
+
+SCRIPT = scripted.DEFAULT_SCRIPT
+LOG_FIRST = "I want to log my expenses first."
+
+
+def reply(model, messages, thread_id=None):
+    config = {"metadata": {"thread_id": thread_id}} if thread_id else None
+    return model.invoke(messages, config=config)
+
+
+def play(model, inputs, thread_id=None):
+    """Run the inputs as one conversation, answering tool calls, and return the final replies."""
+    messages, replies = [], []
+    for i, text in enumerate(inputs):
+        messages.append(HumanMessage(content=text, id=f"h{i}"))
+        while True:
+            msg = reply(model, messages, thread_id)
+            messages.append(msg)
+            if not msg.tool_calls:
+                break
+            messages += [ToolMessage(content="ok", tool_call_id=tc["id"]) for tc in msg.tool_calls]
+        replies.append(msg.content)
+    return messages, replies
+
+
+def test_repeated_input_replays_the_next_recorded_turn():
+    _, replies = play(scripted.ScriptedChatModel(), [turn["input"] for turn in SCRIPT])
+    assert replies == [turn["responses"][-1]["content"] for turn in SCRIPT]
+
+
+def test_cursor_keeps_turns_in_step_after_the_history_is_trimmed():
+    model = scripted.ScriptedChatModel()
+    play(model, [turn["input"] for turn in SCRIPT[:5]], thread_id="thread_u1")
+    # Summarization dropped the earlier turns; only the new message is left
+    msg = reply(model, [HumanMessage(content=LOG_FIRST, id="h5")], "thread_u1")
+    assert msg.content == SCRIPT[5]["responses"][0]["content"]
+
+
+def test_position_is_rebuilt_from_the_history_without_a_thread():
+    model = scripted.ScriptedChatModel()
+    history = [HumanMessage(content="NGN", id="h4"), AIMessage(content="Your budget is now set!"),
+               HumanMessage(content=LOG_FIRST, id="h5")]
+    assert reply(model, history).content == SCRIPT[5]["responses"][0]["content"]
+    assert reply(model, [HumanMessage(content=LOG_FIRST)]).content == SCRIPT[2]["responses"][0]["content"]
+
+
+def test_threads_have_separate_cursors():
+    model = scripted.ScriptedChatModel()
+    play(model, [turn["input"] for turn in SCRIPT[:5]], thread_id="thread_u1")
+    msg = reply(model, [HumanMessage(content=LOG_FIRST, id="h0")], "thread_u2")
+    assert msg.content == SCRIPT[2]["responses"][0]["content"]
+
+
+def test_tool_call_then_final_reply_and_unique_ids():
+    model = scripted.ScriptedChatModel()
+    messages, _ = play(model, [turn["input"] for turn in SCRIPT], thread_id="thread_u1")
+    ids = [tc["id"] for m in messages if isinstance(m, AIMessage) for tc in m.tool_calls]
+    assert len(ids) == 4 and len(set(ids)) == 4
+
+
+def test_unknown_input_gets_the_default_reply():
+    model = scripted.ScriptedChatModel()
+    assert reply(model, [HumanMessage(content="Summarize the conversation")], "thread_u1").content == scripted.DEFAULT_REPLY
+    assert reply(model, [AIMessage(content="hi")]).content == scripted.DEFAULT_REPLY
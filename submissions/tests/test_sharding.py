@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+
+import db
+import sharding
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def put(saver, thread_id):
+    checkpoint = empty_checkpoint()
+    saver.put(config(thread_id), checkpoint, {"source": "input", "step": -1, "writes": None}, {})
+    return checkpoint["id"]
+
+
+def test_latest_checkpoint_id_sqlite(tmp_path):
+    saver = db.checkpointer(str(tmp_path / "checkpoints.db"))
+    assert sharding.latest_checkpoint_id(saver, config("thread_u1")) is None
+    put(saver, "thread_u1")
+    newest = put(saver, "thread_u1")
+    put(saver, "thread_u2")
+    assert sharding.latest_checkpoint_id(saver, config("thread_u1")) == newest
+
+
+def test_latest_checkpoint_id_sees_other_writers(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = db.checkpointer(path)
+    first = put(saver, "thread_u1")
+    assert sharding.latest_checkpoint_id(saver, config("thread_u1")) == first
+    # Another process (main.py, the import CLI) writing the same file
+    other = db.PooledSqliteSaver(db.ConnectionManager(path))
+    second = put(other, "thread_u1")
+    assert sharding.latest_checkpoint_id(saver, config("thread_u1")) == second
+
+
+def test_latest_checkpoint_id_sharded_memory():
+    checkpointer = sharding.ShardedCheckpointer([MemorySaver() for _ in range(3)])
+    assert sharding.latest_checkpoint_id(checkpointer, config("thread_u1")) is None
+    put(checkpointer, "thread_u1")
+    newest = put(checkpointer, "thread_u1")
+    assert sharding.latest_checkpoint_id(checkpointer, config("thread_u1")) == newest
+
+
+def test_shard_index_is_stable_and_keyed_on_user():
+    # blake2b, not hash(): the same user lands on the same shard in every process
+    assert [sharding.shard_index(f"thread_user{i}", 4) for i in range(8)] == \
+        [sharding.shard_index(f"user{i}", 4) for i in range(8)]
+    assert sharding.shard_index("thread_jake00", 1) == 0
+    assert len({sharding.shard_index(f"thread_user{i}", 4) for i in range(100)}) == 4
+    assert sharding.user_key("thread_jake00") == "jake00"
+    assert sharding.user_key("jake00") == "jake00"
+
+
+def test_shard_paths():
+    assert sharding.shard_paths("memory_agent.db", 1) == ["memory_agent.db"]
+    assert sharding.shard_paths("data/memory_agent.db", 2) == ["data/memory_agent.shard0.db", "data/memory_agent.shard1.db"]
+    assert sharding.shard_paths("checkpoints", 2) == ["checkpoints.shard0.db", "checkpoints.shard1.db"]
+
+
+def test_sharded_checkpointer_routes_threads():
+    shards = [MemorySaver() for _ in range(3)]
+    checkpointer = sharding.ShardedCheckpointer(shards)
+    threads = [f"thread_user{i}" for i in range(12)]
+    for thread_id in threads:
+        put(checkpointer, thread_id)
+    for thread_id in threads:
+        home = sharding.shard_index(thread_id, 3)
+        assert [s.get_tuple(config(thread_id)) is not None for s in shards] == [i == home for i in range(3)]
+        assert checkpointer.get_tuple(config(thread_id)) is not None
+        assert len(list(checkpointer.list(config(thread_id)))) == 1
+
+
+def test_sharded_list_merges_newest_first_and_applies_limit():
+    checkpointer = sharding.ShardedCheckpointer([MemorySaver() for _ in range(3)])
+    ids = [put(checkpointer, f"thread_user{i}") for i in range(9)]
+    listed = [t.config["configurable"]["checkpoint_id"] for t in checkpointer.list(None)]
+    assert listed == sorted(ids, reverse=True)
+    assert [t.config["configurable"]["checkpoint_id"] for t in checkpointer.list(None, limit=4)] == listed[:4]
+
+
+def test_sharded_delete_thread():
+    checkpointer = sharding.ShardedCheckpointer([MemorySaver() for _ in range(2)])
+    put(checkpointer, "thread_user1")
+    put(checkpointer, "thread_user2")
+    checkpointer.delete_thread("thread_user1")
+    assert checkpointer.get_tuple(config("thread_user1")) is None
+    assert checkpointer.get_tuple(config("thread_user2")) is not None
+
+
+def test_sharded_async_routing():
+    checkpointer = sharding.ShardedCheckpointer([MemorySaver() for _ in range(3)])
+    checkpoint = empty_checkpoint()
+
+    async def run():
+        await checkpointer.aput(config("thread_user5"), checkpoint, {"source": "input", "step": -1, "writes": None}, {})
+        items = [item async for item in checkpointer.alist(None)]
+        return await checkpointer.aget_tuple(config("thread_user5")), items
+
+    found, items = asyncio.run(run())
+    assert found.config["configurable"]["checkpoint_id"] == checkpoint["id"]
+    assert len(items) == 1
+    assert checkpointer.shard_for(config("thread_user5")).get_tuple(config("thread_user5")) is not None
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHECKPOINT_BACKEND", "sqlite")
+    monkeypatch.setenv("CHECKPOINT_SHARDS", "1")
+    assert isinstance(sharding.from_env(str(tmp_path / "one.db")), db.PooledSqliteSaver)
+    monkeypatch.setenv("CHECKPOINT_SHARDS", "3")
+    sharded = sharding.from_env(str(tmp_path / "many.db"))
+    assert [s.manager.path for s in sharding.sqlite_shards(sharded)] == sharding.shard_paths(str(tmp_path / "many.db"), 3)
+    monkeypatch.setenv("CHECKPOINT_BACKEND", "memory")
+    assert sharding.sqlite_shards(sharding.from_env()) == []
+    monkeypatch.setenv("CHECKPOINT_BACKEND", "postgres")
+    with pytest.raises(ValueError, match="CHECKPOINT_BACKEND"):
+        sharding.from_env()
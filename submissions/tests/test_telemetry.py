@@ -0,0 +1,43 @@
+import telemetry
+
+
+def test_prometheus_text_renders_recorder():
+    recorder = telemetry.Recorder()
+    recorder.record("node", "call_model", 0.5, prompt_tokens=120, completion_tokens=30)
+    recorder.record("checkpoint", "put", 0.01)
+    text = telemetry.prometheus_text(recorder.stats(), recorder.tokens())
+    assert 'aza_node_duration_seconds_count{node="call_model"} 1' in text
+    assert 'aza_checkpoint_duration_seconds_sum{checkpoint="put"} 0.010000' in text
+    assert 'aza_llm_tokens_total{node="call_model",type="prompt"} 120' in text
+    assert 'aza_llm_tokens_total{node="call_model",type="completion"} 30' in text
+
+
+def test_tokens_is_a_copy():
+    recorder = telemetry.Recorder()
+    recorder.record("node", "call_model", 0.1, prompt_tokens=1, completion_tokens=1)
+    tokens = recorder.tokens()
+    recorder.record("node", "summarize", 0.1, prompt_tokens=1, completion_tokens=1)
+    assert tokens["prompt"] == {"call_model": 1}
+
+
+def test_registered_counters_are_exported(monkeypatch):
+    monkeypatch.setattr(telemetry, "recorder", telemetry.Recorder())
+    monkeypatch.setattr(telemetry, "_stat_sources", {})
+    telemetry.register_stats("context", lambda: {"turns": 3, "tokens_saved": 1200, "model": "llama"})
+    telemetry.register_stats("fastpath", lambda: {"hit_rate": 0.25, "by_tool": {"log_expenses": 2}})
+    text = telemetry.prometheus_text()
+    assert "aza_context_turns 3" in text
+    assert "aza_context_tokens_saved 1200" in text
+    assert "aza_context_model" not in text
+    assert "aza_fastpath_hit_rate 0.25" in text
+    assert 'aza_fastpath_by_tool{name="log_expenses"} 2' in text
+
+
+def test_graph_exports_registered_counters():
+    import graph  # noqa: F401  (registers its counters on import)
+
+    text = telemetry.prometheus_text()
+    assert "aza_context_tokens_saved " in text
+    assert "aza_fastpath_hit_rate " in text
+    assert "aza_fastpath_llm_calls_avoided " in text
+    assert "aza_response_cache_hit_rate " in text
@@ -0,0 +1,46 @@
+from utils import StreamFilter, split_model_and_provider
+
+
+def run(chunks):
+    f = StreamFilter()
+    return "".join(f.feed(c) for c in chunks) + f.flush()
+
+
+def test_split_model_and_provider():
+    assert split_model_and_provider("groq/llama3") == {"model": "llama3", "provider": "groq"}
+    assert split_model_and_provider("llama3") == {"model": "llama3", "provider": None}
+
+
+def test_think_block_hidden_across_chunks():
+    assert run(["<th", "ink>plan", "ning</th", "ink>  Hello", " there"]) == "Hello there"
+
+
+def test_text_around_think_block_kept():
+    assert run(["Hi <think>x</think>Blaq"]) == "Hi Blaq"
+
+
+def test_partial_tag_suffix_is_held_then_flushed():
+    f = StreamFilter()
+    assert f.feed("Budget is 5 < 10 and a <thi") == "Budget is 5 < 10 and a "
+    assert f.flush() == "<thi"
+    assert f.flush() == ""
+
+
+def test_trailing_lt_released_on_flush():
+    assert run(["x ", "<"]) == "x <"
+
+
+def test_unterminated_think_block_dropped():
+    assert run(["Hello <think>still reasoning </thi"]) == "Hello "
+
+
+def test_json_tool_call_suppressed():
+    f = StreamFilter()
+    assert f.feed('  {"name": "log_expenses"') == ""
+    assert f.feed(', "args": {}}') == ""
+    assert f.flush() == ""
+    assert f.suppressed
+
+
+def test_leading_whitespace_dropped():
+    assert run(["\n\n", "  Welcome"]) == "Welcome"
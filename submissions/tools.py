@@ -1,11 +1,15 @@
 """Tool definitions for Aza Man financial assistant.
 
 This module provides financial tools for budget allocation, expense tracking,
-flexible calculations, and user management, optimized for model compatibility.
+flexible calculations, spending analytics, and user management, optimized for model
+compatibility.
 """
 
-from typing import Union, List, Dict, Any
-from langchain_core.tools import tool
+from typing import Union, List, Dict, Any, Optional
+from typing_extensions import Annotated
+from langchain_core.tools import InjectedToolArg, tool
+import analytics
+import calculator
 
 ALL_TOOLS = []
 
@@ -64,19 +68,26 @@ ALL_TOOLS.append(log_expenses)
 
 
 @tool
-def math_tool(numbers: List[float], operation: str) -> float:
-    """Perform a mathematical operation on a list of numbers.
+def math_tool(numbers: Optional[List[float]] = None, operation: Optional[str] = None,
+              expression: Optional[str] = None) -> float:
+    """Perform a mathematical operation on a list of numbers, or evaluate a whole arithmetic expression.
 
     Args:
         numbers: A list of numbers to operate on (minimum 1 for add/multiply, 2 for subtract/divide).
         operation: The operation to perform ("add", "subtract", "multiply", "divide").
+        expression: A full calculation to evaluate in one call instead of numbers/operation,
+            e.g. "(450000 - 182000) / 30", "40% of 750k" or "1.2m - 35,000". Supports
+            parentheses, + - * / and **, percentages and k/m suffixes.
 
     Returns:
         float: The result of the operation.
 
     Raises:
-        ValueError: If arguments are insufficient or operation is unsupported.
+        ValueError: If arguments are insufficient, the operation is unsupported, or the
+            expression is invalid.
     """
+    if expression:
+        return calculator.evaluate(expression)
     if not numbers:
         raise ValueError("At least one number is required.")
     
@@ -126,4 +137,30 @@ def set_username(username: str) -> Dict[str, Any]:
     }
 
 
-ALL_TOOLS.append(set_username)
\ No newline at end of file
+ALL_TOOLS.append(set_username)
+
+
+# user_id, budget_for_expenses, currency and expenses are filled in from state by the graph
+# and left out of the schema the model sees
+@tool
+def spending_analytics(
+    category: Optional[str] = None,
+    window_days: int = 7,
+    user_id: Annotated[str, InjectedToolArg] = "default",
+    budget_for_expenses: Annotated[float, InjectedToolArg] = 0.0,
+    currency: Annotated[str, InjectedToolArg] = "",
+    expenses: Annotated[Optional[List[Dict[str, Any]]], InjectedToolArg] = None,
+) -> Dict[str, Any]:
+    """Analyze the user's logged expenses: totals per category, average weekly spend, rolling daily average, this month's burn rate, projected month-end spend and when the budget runs out.
+
+    Args:
+        category: Optional category to analyze (e.g., "food"); all expenses when omitted.
+        window_days: Days in the rolling average window (default 7).
+
+    Returns:
+        Dict[str, Any]: Report figures and a message summarizing them.
+    """
+    return analytics.spending_report(user_id, budget_for_expenses, currency, category, window_days, expenses)
+
+
+ALL_TOOLS.append(spending_analytics)
\ No newline at end of file
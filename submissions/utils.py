@@ -1,6 +1,7 @@
 """Utility functions for Aza Man financial assistant.
 
-This module provides helper functions for parsing and processing configuration data.
+This module provides helper functions for parsing and processing configuration data,
+and for cleaning up streamed model output before it is shown to the user.
 """
 
 
@@ -18,4 +19,95 @@ def split_model_and_provider(fully_specified_name: str) -> dict:
     else:
         provider = None
         model = fully_specified_name
-    return {"model": model, "provider": provider}
\ No newline at end of file
+    return {"model": model, "provider": provider}
+
+
+def _partial_suffix_len(text: str, tag: str) -> int:
+    """Return the length of the longest suffix of text that is a proper prefix of tag."""
+    for k in range(min(len(text), len(tag) - 1), 0, -1):
+        if tag.startswith(text[-k:]):
+            return k
+    return 0
+
+
+class StreamFilter:
+    """Incremental filter for streamed model tokens.
+
+    Hides `<think>...</think>` reasoning blocks (even when the tags are split across
+    chunks) and suppresses replies that begin with "{", since those are raw JSON tool
+    calls that `graph.call_model` converts into real tool calls once complete.
+
+    Attributes:
+        emitted (bool): Whether any visible text has been returned so far.
+        suppressed (bool): Whether the reply was detected as a JSON tool-call payload.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.emitted = False
+        self.suppressed = False
+        self._buffer = ""
+        self._in_think = False
+
+    def feed(self, token: str) -> str:
+        """Consume a streamed token and return the text that is safe to display.
+
+        Args:
+            token: The new chunk of model output.
+
+        Returns:
+            str: Visible text (possibly empty) to append to the displayed reply.
+        """
+        self._buffer += token
+        visible = ""
+        while self._buffer:
+            if self._in_think:
+                end = self._buffer.find(self.CLOSE_TAG)
+                if end == -1:
+                    keep = _partial_suffix_len(self._buffer, self.CLOSE_TAG)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[end + len(self.CLOSE_TAG):]
+                self._in_think = False
+                continue
+            start = self._buffer.find(self.OPEN_TAG)
+            if start == -1:
+                keep = _partial_suffix_len(self._buffer, self.OPEN_TAG)
+                visible += self._buffer[:len(self._buffer) - keep]
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+            visible += self._buffer[:start]
+            self._buffer = self._buffer[start + len(self.OPEN_TAG):]
+            self._in_think = True
+        return self._gate(visible)
+
+    def flush(self) -> str:
+        """Release text held back at the end of the stream.
+
+        A trailing partial tag such as "<" or "<thi" is kept by `feed` in case the next
+        chunk completes `<think>`; once the stream has ended it is ordinary reply text.
+        An unterminated reasoning block is still dropped.
+
+        Returns:
+            str: The held-back visible text (possibly empty).
+        """
+        held, self._buffer = self._buffer, ""
+        if self._in_think:
+            return ""
+        return self._gate(held)
+
+    def _gate(self, text: str) -> str:
+        """Drop leading whitespace and JSON tool-call payloads from visible text."""
+        if self.suppressed:
+            return ""
+        if not self.emitted:
+            text = text.lstrip()
+            if not text:
+                return ""
+            if text.startswith("{"):
+                self.suppressed = True
+                return ""
+            self.emitted = True
+        return text